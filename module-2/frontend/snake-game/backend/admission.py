@@ -0,0 +1,191 @@
+"""
+Admission control: a concurrency limit with per-route priorities.
+
+Every API request takes one of ADMISSION_MAX_CONCURRENT slots before it runs.
+Routes are ranked: score submission and game start/end/heartbeat are `high`,
+leaderboard, statistics and export reads are `low`, everything else is
+`normal`. Lower tiers may only fill part of the slots (ADMISSION_LOW_SHARE,
+ADMISSION_NORMAL_SHARE), so a burst of leaderboard reads always leaves room
+for writes, and freed slots go to the highest-priority waiter first.
+
+When no slot is free a request waits at most ADMISSION_QUEUE_TIMEOUT seconds
+in a queue of ADMISSION_QUEUE_SIZE; a full queue makes room for a
+higher-priority arrival by shedding its lowest-priority waiter. Anything that
+cannot be admitted gets an immediate 503 with Retry-After instead of piling up
+until the client times out. Health/readiness probes, internal endpoints and
+static files bypass the limiter. Off unless ADMISSION_ENABLED is set.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import re
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "false").lower() == "true"
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "32"))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "0.5"))
+ADMISSION_NORMAL_SHARE = float(os.getenv("ADMISSION_NORMAL_SHARE", "0.8"))
+ADMISSION_LOW_SHARE = float(os.getenv("ADMISSION_LOW_SHARE", "0.5"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+
+HIGH, NORMAL, LOW = 2, 1, 0
+PRIORITY_NAMES = {HIGH: "high", NORMAL: "normal", LOW: "low"}
+
+# (method, path pattern, priority); first match wins, None bypasses the limiter
+ROUTE_PRIORITIES = [
+    (None, re.compile(r"^/(health|ready)$"), None),
+    (None, re.compile(r"^/(internal/|docs|redoc|openapi\.json)"), None),
+    ("POST", re.compile(r"^/leaderboard$"), HIGH),
+    ("POST", re.compile(r"^/games(/\d+/(end|heartbeat))?$"), HIGH),
+    ("GET", re.compile(r"^/leaderboard"), LOW),
+    ("GET", re.compile(r"^/(stats/|users/\d+/(stats|games/export))"), LOW),
+    (None, re.compile(r"^/(auth|users|games|active-games|leaderboard|stats|execute)\b"), NORMAL),
+]
+
+
+def route_priority(method: str, path: str):
+    """Priority for a request, or None when it bypasses admission (static files too)."""
+    for rule_method, pattern, priority in ROUTE_PRIORITIES:
+        if (rule_method is None or rule_method == method) and pattern.match(path):
+            return priority
+    return None
+
+
+class AdmissionController:
+    """Priority-aware concurrency limiter with a bounded wait queue."""
+
+    def __init__(
+        self,
+        limit: int = ADMISSION_MAX_CONCURRENT,
+        queue_size: int = ADMISSION_QUEUE_SIZE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+        normal_share: float = ADMISSION_NORMAL_SHARE,
+        low_share: float = ADMISSION_LOW_SHARE,
+        enabled: bool = ADMISSION_ENABLED,
+    ):
+        self.enabled = enabled
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.capacity = {
+            HIGH: limit,
+            NORMAL: max(1, int(limit * normal_share)),
+            LOW: max(1, int(limit * low_share)),
+        }
+        self.active = 0
+        self._waiters = []  # heap of (-priority, seq, future)
+        self._seq = itertools.count()
+        self.reset()
+
+    def reset(self):
+        self.stats = {
+            name: {"admitted": 0, "queued": 0, "shed": 0} for name in PRIORITY_NAMES.values()
+        }
+
+    def _grant(self, priority: int):
+        self.active += 1
+        self.stats[PRIORITY_NAMES[priority]]["admitted"] += 1
+
+    def _shed(self, priority: int) -> bool:
+        self.stats[PRIORITY_NAMES[priority]]["shed"] += 1
+        return False
+
+    async def acquire(self, priority: int) -> bool:
+        """Take a slot; False means the request should be shed."""
+        # Queue behind waiters of equal or higher priority, never behind lower ones
+        if self.active < self.capacity[priority] and (not self._waiters or -self._waiters[0][0] < priority):
+            self._grant(priority)
+            return True
+
+        if len(self._waiters) >= self.queue_size:
+            lowest = max(self._waiters, default=None)
+            if lowest is None or -lowest[0] >= priority:
+                return self._shed(priority)
+            # Make room by shedding the lowest-priority, most recent waiter
+            self._waiters.remove(lowest)
+            heapq.heapify(self._waiters)
+            lowest[2].set_result(False)
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (-priority, next(self._seq), future)
+        heapq.heappush(self._waiters, entry)
+        self.stats[PRIORITY_NAMES[priority]]["queued"] += 1
+        try:
+            granted = await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if future.done() and future.result():
+                # Granted just as we gave up: hand the slot on
+                self.release()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            return self._shed(priority)
+        if not granted:
+            return self._shed(priority)
+        return True
+
+    def release(self):
+        self.active -= 1
+        while self._waiters:
+            priority = -self._waiters[0][0]
+            if self.active >= self.capacity[priority]:
+                break
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._grant(priority)
+            future.set_result(True)
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "queueSize": self.queue_size,
+            "saturation": round(self.active / self.limit, 3),
+            "byPriority": self.stats,
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionController to HTTP requests."""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.controller.enabled:
+            return await self.app(scope, receive, send)
+        priority = route_priority(scope["method"], scope["path"])
+        if priority is None:
+            return await self.app(scope, receive, send)
+
+        if not await self.controller.acquire(priority):
+            return await self._reject(send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": "Server is at capacity, retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(ADMISSION_RETRY_AFTER).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+admission = AdmissionController()
@@ -0,0 +1,117 @@
+"""
+Benchmark the in-memory live game registry.
+
+Measures the memory held per thousand live games (tracemalloc, against the
+registry's own estimate and against keeping ORM `Game` objects or dicts), and
+the latency of answering `GET /games/{id}` and `/active-games` from memory
+versus querying a temporary SQLite `games` table of the same size.
+
+Usage:
+    python -m benchmarks.bench_game_registry --games 10000 --lookups 20000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.bench_stats import MODES
+from game_registry import GameRegistry, LiveGame
+from models import Base, Game, User
+
+
+def synthetic_games(count: int, users: int = 1000, seed: int = 42):
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    for game_id in range(1, count + 1):
+        user_id = rng.randint(1, users)
+        yield Game(
+            id=game_id,
+            user_id=user_id,
+            username=f"player{user_id}",
+            mode=rng.choice(MODES),
+            start_time=start + timedelta(seconds=game_id),
+            is_active=1,
+        )
+
+
+def allocated(build):
+    """Bytes still allocated by the object `build()` returns."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return kept, after - before
+
+
+def per_call_us(fn, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--games", type=int, default=10_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    games = list(synthetic_games(args.games))
+    per_1k = 1000 / args.games
+
+    def fill():
+        registry = GameRegistry(max_games=args.games, stale_seconds=3600)
+        for game in games:
+            registry.start(LiveGame.from_game(game))
+        return registry
+
+    registry, registry_bytes = allocated(fill)
+    _, dict_bytes = allocated(lambda: {game.id: game.to_dict() for game in games})
+    _, orm_bytes = allocated(lambda: list(synthetic_games(args.games)))
+    print(f"Memory per 1,000 live games ({args.games:,} held):")
+    print(f"  registry (tracemalloc)   {registry_bytes * per_1k / 1024:>8.1f} KiB")
+    print(f"  registry (footprint())   {registry.footprint()['bytesPer1kGames'] / 1024:>8.1f} KiB")
+    print(f"  dict per game            {dict_bytes * per_1k / 1024:>8.1f} KiB")
+    print(f"  ORM Game objects         {orm_bytes * per_1k / 1024:>8.1f} KiB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(User.__table__.insert(), [
+                {"id": i, "username": f"player{i}", "email": f"player{i}@test.com", "password": "x"}
+                for i in range(1, 1001)
+            ])
+            conn.execute(Game.__table__.insert(), [
+                {c.name: getattr(game, c.key) for c in Game.__table__.columns} for game in games
+            ])
+        db = sessionmaker(bind=engine)()
+        rng = random.Random(7)
+
+        def db_lookup():
+            game = db.query(Game).filter(Game.id == rng.randint(1, args.games)).first()
+            return game.to_dict()
+
+        def db_active():
+            return [g.to_dict() for g in db.query(Game).filter(Game.is_active == 1).order_by(Game.start_time.desc())]
+
+        print("GET /games/{id}:")
+        print(f"  registry                 {per_call_us(lambda: registry.get(rng.randint(1, args.games)).to_dict(), args.lookups):>8.1f} us")
+        print(f"  SQLite by id             {per_call_us(db_lookup, args.lookups):>8.1f} us")
+        print(f"/active-games ({args.games:,} live):")
+        print(f"  registry                 {per_call_us(lambda: [g.to_active() for g in registry.active()], 20) / 1000:>8.1f} ms")
+        print(f"  SQLite is_active scan    {per_call_us(db_active, 20) / 1000:>8.1f} ms")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Compare the WebSocket event channel with the REST game flow.
+
+Starts the API (without the static frontend) under uvicorn in a subprocess
+against a temporary SQLite database, then has --players concurrent players
+each play --games games of --ticks score updates:
+- REST: POST /games, a POST /games/{id}/heartbeat per tick,
+  POST /games/{id}/end and POST /leaderboard, over keep-alive connections;
+- WebSocket: one socket per player; start and end are acked, ticks are not.
+
+Reports games/sec, events/sec and the server process's CPU time per game
+(read from /proc, so Linux only). Needs the `websockets` package.
+
+Usage:
+    python -m benchmarks.bench_ingest --players 16 --games 20 --ticks 10
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import websockets
+from sqlalchemy import create_engine
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def serve(port: int):
+    import uvicorn
+    import main
+
+    # API only: the frontend mount at "/" would shadow the routes
+    main.app.router.routes[:] = [r for r in main.app.router.routes if getattr(r, "name", None) != "frontend"]
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as fh:
+        fields = fh.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+async def rest_player(client, games, ticks):
+    for _ in range(games):
+        game_id = (await client.post("/games", json={"mode": "walls"})).json()["gameSession"]["id"]
+        for score in range(ticks):
+            await client.post(f"/games/{game_id}/heartbeat", json={"score": score})
+        await client.post(f"/games/{game_id}/end", json={"score": ticks})
+        await client.post("/leaderboard", json={"score": ticks, "mode": "walls"})
+
+
+async def ws_player(url, games, ticks):
+    async with websockets.connect(url) as ws:
+        seq = 0
+        for _ in range(games):
+            seq += 1
+            await ws.send(f'{{"t":"start","mode":"walls","seq":{seq}}}')
+            ack = await ws.recv()
+            game_id = int(ack.split('"id":')[1].split(",")[0].rstrip("}"))
+            for score in range(ticks):
+                await ws.send(f'{{"t":"tick","id":{game_id},"score":{score}}}')
+            seq += 1
+            await ws.send(f'{{"t":"end","id":{game_id},"score":{ticks},"seq":{seq}}}')
+            await ws.recv()
+
+
+async def run_flow(flow, args, port, pid):
+    base = f"http://127.0.0.1:{port}"
+    before, started = cpu_seconds(pid), time.perf_counter()
+    if flow == "rest":
+        limits = httpx.Limits(max_connections=args.players)
+        async with httpx.AsyncClient(base_url=base, limits=limits) as client:
+            await asyncio.gather(*(rest_player(client, args.games, args.ticks) for _ in range(args.players)))
+        requests_per_game = args.ticks + 3
+    else:
+        url = f"ws://127.0.0.1:{port}/ws/games"
+        await asyncio.gather(*(ws_player(url, args.games, args.ticks) for _ in range(args.players)))
+        requests_per_game = args.ticks + 2
+    elapsed, cpu = time.perf_counter() - started, cpu_seconds(pid) - before
+    games = args.players * args.games
+    print(
+        f"{flow:<10} {games / elapsed:>9.1f} {games * requests_per_game / elapsed:>10.0f} "
+        f"{cpu / games * 1000:>12.2f} {elapsed:>8.2f}"
+    )
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--players", type=int, default=16)
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--ticks", type=int, default=10)
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.serve:
+        return serve(args.serve)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        env = {**os.environ, "DATABASE_URL": url, "ADMISSION_ENABLED": "false", "ADMIN_TOKEN": "bench"}
+        subprocess.run(
+            [sys.executable, "-c", "import models; from database import init_db; init_db()"], env=env, check=True
+        )
+        port = free_port()
+        server = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_ingest", "--serve", str(port)], env=env)
+        try:
+            for _ in range(100):
+                try:
+                    httpx.get(f"http://127.0.0.1:{port}/health")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+            print(f"{'flow':<10} {'games/s':>9} {'events/s':>10} {'CPU ms/game':>12} {'seconds':>8}")
+            for flow in ("rest", "websocket"):
+                asyncio.run(run_flow(flow, args, port, server.pid))
+            print("Batches:", httpx.get(f"http://127.0.0.1:{port}/internal/ingest", headers={"X-Admin-Token": "bench"}).json())
+        finally:
+            server.terminate()
+            server.wait()
+        create_engine(url).dispose()
+
+
+if __name__ == "__main__":
+    main()
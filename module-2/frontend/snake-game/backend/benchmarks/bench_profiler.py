@@ -0,0 +1,121 @@
+"""
+Measure what the sampling profiler and tracemalloc cost a running worker.
+
+Runs a request-shaped workload (a leaderboard query through the ORM plus JSON
+encoding of the rows) on the main thread for --seconds, with --threads idle
+threadpool-like threads alongside: with nothing attached, with the sampler at
+each of --intervals, and with tracemalloc tracing. The settings take turns for
+--repeat rounds and the median throughput is reported; overhead is relative to
+the unprofiled median. "sampler CPU" is the sampler thread's own stack-walking
+time as a share of one core.
+
+Usage:
+    python -m benchmarks.bench_profiler --seconds 2 --intervals 10 5 1
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from models import Base, LeaderboardEntry, User
+from profiler import SamplingProfiler
+
+
+def seed(engine, rows: int):
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add_all(User(username=f"p{i}", email=f"p{i}@example.com", password="x") for i in range(100))
+        db.flush()
+        db.add_all(
+            LeaderboardEntry(user_id=1 + i % 100, username=f"p{i % 100}", score=(i * 7919) % 5000,
+                             mode="walls", date=datetime(2024, 1, 1))
+            for i in range(rows)
+        )
+        db.commit()
+
+
+def workload(engine, seconds: float) -> float:
+    """Requests per second of the leaderboard-shaped workload."""
+    done, deadline = 0, time.perf_counter() + seconds
+    with Session(engine) as db:
+        while time.perf_counter() < deadline:
+            rows = (
+                db.query(LeaderboardEntry)
+                .filter(LeaderboardEntry.mode == "walls")
+                .order_by(LeaderboardEntry.score.desc())
+                .limit(50)
+                .all()
+            )
+            json.dumps([{"username": r.username, "score": r.score, "date": r.date.isoformat()} for r in rows])
+            db.expire_all()
+            done += 1
+    return done / seconds
+
+
+def measure(engine, args, setting):
+    sampler, stats = None, {}
+    if setting == "tracemalloc":
+        tracemalloc.start()
+    elif setting != "off":
+        sampler = SamplingProfiler(interval_ms=setting)
+        sampler.start()
+    try:
+        rate = workload(engine, args.seconds)
+    finally:
+        if sampler is not None:
+            sampler.stop()
+            stats = sampler.summary()
+        if setting == "tracemalloc":
+            tracemalloc.stop()
+    return rate, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2)
+    parser.add_argument("--intervals", type=float, nargs="+", default=[10, 5, 1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    seed(engine, args.rows)
+    stop = threading.Event()
+    idle = [threading.Thread(target=stop.wait, name=f"worker-{i}", daemon=True) for i in range(args.threads)]
+    for thread in idle:
+        thread.start()
+
+    settings = ["off", *args.intervals, "tracemalloc"]
+    results = {setting: [] for setting in settings}
+    workload(engine, 1)  # warm up the ORM's compiled-statement cache
+    # Interleave the settings so drift in machine speed hits all of them alike
+    for _ in range(args.repeat):
+        for setting in settings:
+            results[setting].append(measure(engine, args, setting))
+
+    print(f"{'setting':<14} {'req/s':>9} {'overhead':>9} {'samples':>8} {'ms/sample':>10} {'sampler CPU':>12}")
+    baseline = statistics.median(rate for rate, _ in results["off"])
+    for setting in settings:
+        rate = statistics.median(rate for rate, _ in results[setting])
+        stats = results[setting][-1][1]
+        label = setting if isinstance(setting, str) else f"sample {setting:g}ms"
+        # Share of one core the sampler thread itself spends walking stacks
+        cpu = f"{stats['samplerMsPerSample'] / setting * 100:.1f}%" if stats else ""
+        print(
+            f"{label:<14} {rate:>9.0f} {(1 - rate / baseline) * 100:>8.1f}% "
+            f"{stats.get('samples', ''):>8} {stats.get('samplerMsPerSample', ''):>10} {cpu:>12}"
+        )
+    stop.set()
+
+
+if __name__ == "__main__":
+    main()
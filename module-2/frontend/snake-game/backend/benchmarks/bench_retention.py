@@ -0,0 +1,116 @@
+"""
+Benchmark leaderboard compaction on a synthetic history.
+
+Loads --rows entries (six months of games by --users players) into a
+temporary SQLite database, applies the retention policy, and reports rows
+removed, run time, the longest single delete transaction, and how the table
+size and a top-50 leaderboard read change. Score submissions issued during
+compaction are timed to show how long writers wait behind the deletes.
+
+Usage:
+    python -m benchmarks.bench_retention --rows 1000000 --keep-best 10 --keep-days 30
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, event, func, select
+
+from benchmarks.bench_stats import synthetic_entries
+from bulk_io import import_records
+from models import Base, User, LeaderboardEntry
+from retention import compact_leaderboard
+
+# synthetic_entries spreads dates over 180 days from 2026-01-01
+NOW = datetime(2026, 7, 1)
+
+
+def top_read_ms(engine, repeat=20):
+    table = LeaderboardEntry.__table__
+    query = select(table).where(table.c.mode == "walls").order_by(table.c.score.desc()).limit(50)
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            conn.execute(query).all()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--keep-best", type=int, default=10)
+    parser.add_argument("--keep-days", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause", type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 30})
+
+        @event.listens_for(engine, "connect")
+        def wal(dbapi_conn, record):
+            dbapi_conn.execute("PRAGMA journal_mode=WAL")
+
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(User.__table__.insert(), [
+                {"username": f"player{i}", "email": f"player{i}@test.com", "password": "x"}
+                for i in range(1, args.users + 1)
+            ])
+        import_records(LeaderboardEntry, synthetic_entries(args.rows, args.users), bind=engine, batch_size=10_000)
+
+        def count():
+            with engine.connect() as conn:
+                return conn.execute(select(func.count()).select_from(LeaderboardEntry.__table__)).scalar()
+
+        before_rows, before_read = count(), top_read_ms(engine)
+        dry = compact_leaderboard(engine, args.keep_best, args.keep_days, args.batch_size, pause=0, dry_run=True, now=NOW)
+        print(f"Dry run: would delete {dry['deleted']:,} of {before_rows:,} rows ({dry['seconds']} s)")
+
+        waits, done = [], threading.Event()
+
+        def writer():
+            while not done.is_set():
+                started = time.perf_counter()
+                with engine.begin() as conn:
+                    conn.execute(LeaderboardEntry.__table__.insert(), {
+                        "user_id": 1, "username": "player1", "score": 1, "mode": "walls", "date": NOW,
+                    })
+                waits.append(time.perf_counter() - started)
+                time.sleep(0.005)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        report = compact_leaderboard(
+            engine, args.keep_best, args.keep_days, args.batch_size, pause=args.pause, now=NOW
+        )
+        done.set()
+        thread.join()
+
+        size_before = os.path.getsize(path)
+        with engine.connect() as conn:
+            conn.exec_driver_sql("VACUUM")
+        after_rows = count()
+        print(
+            f"Deleted {report['deleted']:,} rows in {report['batches']} batches, {report['seconds']} s "
+            f"({report['deleted'] / report['seconds']:,.0f} rows/s), longest batch {report['longestBatchMs']} ms"
+        )
+        waits.sort()
+        print(
+            f"Concurrent score inserts: {len(waits)}, p50 {waits[len(waits) // 2] * 1000:.2f} ms, "
+            f"max {waits[-1] * 1000:.2f} ms"
+        )
+        print(f"Rows {before_rows:,} -> {after_rows:,}; file {size_before / 2**20:.1f} -> "
+              f"{os.path.getsize(path) / 2**20:.1f} MiB after VACUUM")
+        print(f"Top-50 read {before_read:.2f} -> {top_read_ms(engine):.2f} ms")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
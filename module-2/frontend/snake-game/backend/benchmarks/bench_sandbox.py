@@ -0,0 +1,123 @@
+"""
+Benchmark the pooled Python execution service.
+
+Measures executions/sec and latency percentiles of the warm worker pool at
+several concurrency levels, against two cold starts:
+- a fresh interpreter per snippet (what the server would pay without a pool);
+- fetching the Pyodide runtime the browser editor downloads before its first
+  run (`js/executor.js`), when the CDN is reachable. This is only the download;
+  the browser then still compiles the WebAssembly and boots the interpreter.
+
+Usage:
+    python -m benchmarks.bench_sandbox --workers 2 --concurrency 1 4 16 --runs 200
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+import urllib.request
+
+from sandbox import ExecutionPool, PoolBusy
+
+SNIPPET = "squares = [n * n for n in range(1000)]\nprint(sum(squares))"
+PYODIDE_FILES = (
+    "https://cdn.jsdelivr.net/pyodide/v0.23.4/full/pyodide.js",
+    "https://cdn.jsdelivr.net/pyodide/v0.23.4/full/pyodide.asm.js",
+    "https://cdn.jsdelivr.net/pyodide/v0.23.4/full/pyodide.asm.wasm",
+    "https://cdn.jsdelivr.net/pyodide/v0.23.4/full/python_stdlib.zip",
+)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def report(label, latencies, elapsed, rejected=0):
+    print(
+        f"  {label:<24} {len(latencies) / elapsed:>9.1f}/s  p50 {percentile(latencies, 0.5) * 1000:>8.2f} ms"
+        f"  p99 {percentile(latencies, 0.99) * 1000:>8.2f} ms  rejected {rejected}"
+    )
+
+
+async def pooled(pool, concurrency, runs):
+    latencies, rejected = [], 0
+
+    async def client(count):
+        nonlocal rejected
+        for _ in range(count):
+            started = time.perf_counter()
+            try:
+                await pool.run(SNIPPET)
+            except PoolBusy:
+                rejected += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(runs // concurrency) for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started, rejected
+
+
+def fresh_interpreter(runs):
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(runs):
+        run_started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", SNIPPET], check=True, capture_output=True)
+        latencies.append(time.perf_counter() - run_started)
+    return latencies, time.perf_counter() - started
+
+
+def pyodide_download():
+    total, started = 0, time.perf_counter()
+    for url in PYODIDE_FILES:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            total += len(response.read())
+    return total, time.perf_counter() - started
+
+
+async def main_async(args):
+    # Measures the pool, not its isolation, so it also runs without root
+    pool = ExecutionPool(workers=args.workers, queue_size=args.queue_size, require_isolation=False)
+    started = time.perf_counter()
+    await pool.start()
+    print(f"Pool of {args.workers} workers warmed in {(time.perf_counter() - started) * 1000:.0f} ms")
+    await pool.run(SNIPPET)
+    try:
+        for concurrency in args.concurrency:
+            latencies, elapsed, rejected = await pooled(pool, concurrency, args.runs)
+            report(f"pool, {concurrency} concurrent", latencies, elapsed, rejected)
+        print(f"  {pool.status()}")
+    finally:
+        await pool.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--cold-runs", type=int, default=20)
+    parser.add_argument("--skip-pyodide", action="store_true")
+    args = parser.parse_args(argv)
+
+    print("Warm pool:")
+    asyncio.run(main_async(args))
+
+    print("Cold start:")
+    latencies, elapsed = fresh_interpreter(args.cold_runs)
+    report("fresh interpreter", latencies, elapsed)
+    if not args.skip_pyodide:
+        try:
+            size, seconds = pyodide_download()
+            print(f"  {'Pyodide download':<24} {size / 1024 / 1024:>8.1f} MiB in {seconds * 1000:.0f} ms (per browser)")
+        except OSError as exc:
+            print(f"  {'Pyodide download':<24} skipped ({exc})")
+
+
+if __name__ == "__main__":
+    main()
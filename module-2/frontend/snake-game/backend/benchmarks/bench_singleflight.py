@@ -0,0 +1,110 @@
+"""
+Load-test single-flight coalescing of the leaderboard read.
+
+Fires bursts of identical concurrent `GET /leaderboard?mode=walls&limit=50`
+calls at increasing concurrency, with coalescing off and on, against a
+temporary SQLite database, and counts the SQL statements each burst executes.
+The endpoint coroutine is awaited directly (its sessions come from the
+benchmark database through the get_db override) so the numbers reflect the
+handler and database, not HTTP parsing.
+
+By default the shared query runs in the threadpool, as it does on PostgreSQL;
+--event-loop runs it on the event loop instead, as the app does on SQLite.
+
+Usage:
+    python -m benchmarks.bench_singleflight --rows 200000 --concurrency 1 10 50 200
+    python -m benchmarks.bench_singleflight --event-loop
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.bench_stats import synthetic_entries
+from bulk_io import import_records
+from main import app, get_db, get_leaderboard
+from models import Base, User, LeaderboardEntry
+from singleflight import single_flight
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def burst(concurrency):
+    """`concurrency` simultaneous leaderboard reads; returns per-call latencies."""
+
+    async def one():
+        started = time.perf_counter()
+        await get_leaderboard(mode="walls", limit=50)
+        return time.perf_counter() - started
+
+    return await asyncio.gather(*(one() for _ in range(concurrency)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--event-loop", action="store_true", help="run the shared query on the event loop (the SQLite path)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", pool_size=40, max_overflow=0)
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(User.__table__.insert(), [
+                {"username": f"player{i}", "email": f"player{i}@test.com", "password": "x"}
+                for i in range(1, args.users + 1)
+            ])
+        import_records(LeaderboardEntry, synthetic_entries(args.rows, args.users), bind=engine, batch_size=10_000)
+        Session = sessionmaker(bind=engine)
+
+        def bench_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        # The coalesced query opens its own session through get_db
+        app.dependency_overrides[get_db] = bench_db
+        # A pooled engine, like PostgreSQL: run the shared query in the threadpool
+        single_flight.threaded = not args.event_loop
+
+        statements = 0
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def count(conn, cursor, statement, parameters, context, executemany):
+            nonlocal statements
+            statements += 1
+
+        print(f"{'coalescing':<11} {'conc':>5} {'queries/burst':>14} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for enabled in (False, True):
+            single_flight.enabled = enabled
+            for concurrency in args.concurrency:
+                statements = 0
+                latencies = []
+                started = time.perf_counter()
+                for _ in range(args.bursts):
+                    latencies += asyncio.run(burst(concurrency))
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{'on' if enabled else 'off':<11} {concurrency:>5} {statements / args.bursts:>14.1f} "
+                    f"{len(latencies) / elapsed:>9.0f} {percentile(latencies, 0.5) * 1000:>8.2f} "
+                    f"{percentile(latencies, 0.99) * 1000:>8.2f}"
+                )
+        print("Per-key metrics:", single_flight.metrics()["keys"])
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark statistics endpoints over a synthetic leaderboard.
+
+Compares the SQL-aggregated `stats` functions with a naive row-by-row Python
+computation (the `user_highscore` approach) on a temporary SQLite database.
+
+Usage:
+    python -m benchmarks.bench_stats --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from bulk_io import import_records
+from models import Base, User, LeaderboardEntry
+from stats import stats_cache, user_stats, mode_stats
+
+MODES = ("walls", "pass-through")
+
+
+def synthetic_entries(rows: int, users: int, seed: int = 42):
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    for _ in range(rows):
+        user_id = rng.randint(1, users)
+        yield {
+            "user_id": user_id,
+            "username": f"player{user_id}",
+            "score": int(rng.gammavariate(2.0, 60.0)),
+            "mode": rng.choice(MODES),
+            "date": start + timedelta(seconds=rng.randint(0, 180 * 86400)),
+        }
+
+
+def naive_mode_stats(db, mode):
+    scores = [e.score for e in db.query(LeaderboardEntry).filter(LeaderboardEntry.mode == mode).all()]
+    scores.sort()
+    histogram = {}
+    for score in scores:
+        histogram[score // 50] = histogram.get(score // 50, 0) + 1
+    return {
+        "entries": len(scores),
+        "averageScore": sum(scores) / len(scores),
+        "median": scores[len(scores) // 2],
+        "histogram": histogram,
+    }
+
+
+def timed(label, fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<32} {best * 1000:10.1f} ms")
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=5_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(User.__table__.insert(), [
+                {"username": f"player{i}", "email": f"player{i}@test.com", "password": "x"}
+                for i in range(1, args.users + 1)
+            ])
+        report = import_records(LeaderboardEntry, synthetic_entries(args.rows, args.users), bind=engine, batch_size=10_000)
+        print(f"Loaded {report['rows']} rows in {report['seconds']}s ({report['rowsPerSecond']} rows/sec)")
+
+        db = sessionmaker(bind=engine)()
+        print("Mode statistics (walls):")
+        naive = timed("naive Python (row objects)", lambda: naive_mode_stats(db, "walls"), repeat=1)
+
+        def cold_mode():
+            stats_cache.clear()
+            mode_stats(db, "walls")
+
+        sql = timed("SQL aggregation (cold cache)", cold_mode)
+        timed("SQL aggregation (cached)", lambda: mode_stats(db, "walls"))
+
+        print("User statistics (player1):")
+
+        def cold_user():
+            stats_cache.clear()
+            user_stats(db, 1, "all")
+
+        timed("SQL aggregation (cold cache)", cold_user)
+        timed("SQL aggregation (cached)", lambda: user_stats(db, 1, "all"))
+        print(f"Speedup over naive mode stats: {naive / sql:.1f}x")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Streaming bulk export and import for leaderboard entries and game history.
+
+Exports stream rows from a server-side cursor in fixed-size batches, so memory
+stays constant regardless of table size. Imports load NDJSON or CSV files with
+`COPY` on PostgreSQL and batched `executemany` on SQLite.
+
+Usage:
+    python bulk_io.py import leaderboard scores.ndjson
+    python bulk_io.py import games history.csv --batch-size 5000
+"""
+
+import argparse
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+from database import engine, is_sqlite
+from models import LeaderboardEntry, Game
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+BATCH_SIZE = 1000
+
+MODELS = {
+    "leaderboard": LeaderboardEntry,
+    "games": Game,
+}
+
+
+def export_columns(model) -> list:
+    return [column.name for column in model.__table__.columns]
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def stream_rows(query, model, fmt: str, batch_size: int = BATCH_SIZE) -> Iterator[str]:
+    """Yield the rows of `query` serialized as NDJSON lines or CSV chunks."""
+    columns = export_columns(model)
+    rows = (
+        query.with_entities(*model.__table__.columns)
+        .execution_options(stream_results=True)
+        .yield_per(batch_size)
+    )
+
+    if fmt == "ndjson":
+        for row in rows:
+            yield json.dumps(dict(zip(columns, map(_encode, row)))) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_encode(value) for value in row])
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def read_records(path: str, fmt: Optional[str] = None) -> Iterator[dict]:
+    """Read NDJSON or CSV records; the format defaults to the file extension."""
+    fmt = fmt or ("csv" if path.endswith(".csv") else "ndjson")
+    with open(path, newline="") as handle:
+        if fmt == "csv":
+            for record in csv.DictReader(handle):
+                yield {key: (value if value != "" else None) for key, value in record.items()}
+        else:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _default(column):
+    default = column.default
+    if default is None:
+        return None
+    return default.arg(None) if default.is_callable else default.arg
+
+
+def _coerce(model, record: dict) -> dict:
+    """Map a record onto the table's columns, converting text values to their types.
+
+    Every row gets every column (in table order) so a batch can be written with
+    one column list: absent columns take their default, and only the
+    auto-increment id is left for the database to assign.
+    """
+    row = {}
+    for column in model.__table__.columns:
+        if column.autoincrement is True and record.get(column.name) is None:
+            continue
+        if column.name not in record:
+            row[column.name] = _default(column)
+            continue
+        value = record[column.name]
+        if value is not None and isinstance(value, str):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is int:
+                value = int(value)
+        row[column.name] = value
+    return row
+
+
+def _batches(records: Iterable[dict], size: int) -> Iterator[list]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _by_columns(batch: list) -> Iterator[tuple]:
+    """Split a batch into (columns, rows) groups that share the same columns."""
+    groups = {}
+    for row in batch:
+        groups.setdefault(tuple(row), []).append(row)
+    return iter(groups.items())
+
+
+def _copy_batch(cursor, table: str, columns: tuple, batch: list):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        writer.writerow(["" if row[c] is None else _encode(row[c]) for c in columns])
+    buffer.seek(0)
+    quoted = ", ".join(f'"{c}"' for c in columns)
+    cursor.copy_expert(f'COPY "{table}" ({quoted}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+
+def import_records(model, records: Iterable[dict], bind=None, batch_size: int = BATCH_SIZE) -> dict:
+    """Bulk-load records into `model`'s table and report throughput."""
+    bind = bind or engine
+    table = model.__table__
+    rows = (_coerce(model, record) for record in records)
+    started = time.perf_counter()
+    count = 0
+
+    if bind.dialect.name == "postgresql":
+        raw = bind.raw_connection()
+        try:
+            cursor = raw.cursor()
+            for batch in _batches(rows, batch_size):
+                for columns, group in _by_columns(batch):
+                    _copy_batch(cursor, table.name, columns, group)
+                count += len(batch)
+            # Explicit ids bypass the sequence; move it past the imported rows.
+            # An empty table has no MAX(id): restart at 1 with is_called false.
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f'COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM "{table.name}"'
+            )
+            raw.commit()
+        finally:
+            raw.close()
+    else:
+        with bind.begin() as conn:
+            for batch in _batches(rows, batch_size):
+                # executemany compiles one statement, from the first row's keys
+                for _, group in _by_columns(batch):
+                    conn.execute(table.insert(), group)
+                count += len(batch)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": count,
+        "seconds": round(elapsed, 3),
+        "rowsPerSecond": round(count / elapsed) if elapsed > 0 else count,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import leaderboard or game history")
+    sub = parser.add_subparsers(dest="command", required=True)
+    importer = sub.add_parser("import", help="Load an NDJSON or CSV file")
+    importer.add_argument("table", choices=sorted(MODELS))
+    importer.add_argument("path")
+    importer.add_argument("--format", choices=sorted(EXPORT_FORMATS))
+    importer.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    from database import init_db
+
+    init_db()
+    report = import_records(
+        MODELS[args.table],
+        read_records(args.path, args.format),
+        batch_size=args.batch_size,
+    )
+    backend = "executemany" if is_sqlite else "COPY"
+    print(
+        f"Imported {report['rows']} rows into {args.table} via {backend} "
+        f"in {report['seconds']}s ({report['rowsPerSecond']} rows/sec)"
+    )
+
+
+if __name__ == "__main__":
+    main()
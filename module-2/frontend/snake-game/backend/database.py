@@ -55,4 +55,7 @@ def get_db():
 
 def init_db():
     """Create all tables defined in models."""
+    from partitions import maintain_partitions
+
     Base.metadata.create_all(bind=engine)
+    maintain_partitions(engine)
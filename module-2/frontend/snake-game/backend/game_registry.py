@@ -0,0 +1,167 @@
+"""
+Process-local registry of live games.
+
+`POST /games` registers the game here after inserting its row, heartbeats
+update the current score in memory only, and `POST /games/{id}/end` retires
+the entry before the final score is written to the database in the
+background. `/active-games` and `GET /games/{id}` for a live game are answered
+from memory without a query; the `games` table stays the durable record.
+
+Each game is a `__slots__` record (no per-instance dict) whose username and
+mode strings are interned, so thousands of games share a handful of strings.
+The registry holds at most ACTIVE_GAMES_MAX games: games not heard from for
+ACTIVE_GAMES_STALE_SECONDS are dropped, and when it is still full the game
+with the oldest heartbeat is evicted. Its footprint, per thousand games, is
+served at /internal/active-games.
+
+Registries are not shared between worker processes; each one lists the games
+started through it.
+"""
+
+import os
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+ACTIVE_GAMES_MAX = int(os.getenv("ACTIVE_GAMES_MAX", "10000"))
+ACTIVE_GAMES_STALE_SECONDS = float(os.getenv("ACTIVE_GAMES_STALE_SECONDS", "600"))
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+class LiveGame:
+    """Compact in-memory state of one game in progress."""
+
+    __slots__ = ("id", "user_id", "username", "mode", "start_time", "score", "heartbeat")
+
+    def __init__(self, id: int, user_id: int, username: str, mode: str, start_time: float, score: int = 0):
+        self.id = id
+        self.user_id = user_id
+        self.username = sys.intern(username)
+        self.mode = sys.intern(mode)
+        self.start_time = start_time
+        self.score = score
+        self.heartbeat = time.time()
+
+    @classmethod
+    def from_game(cls, game) -> "LiveGame":
+        """Build from a freshly inserted `Game` row (naive UTC start time)."""
+        return cls(game.id, game.user_id, game.username, game.mode,
+                   game.start_time.replace(tzinfo=timezone.utc).timestamp())
+
+    def size(self) -> int:
+        """Bytes held by this record and its numbers (strings are shared)."""
+        return sys.getsizeof(self) + sum(
+            sys.getsizeof(getattr(self, name)) for name in ("id", "user_id", "start_time", "score", "heartbeat")
+        )
+
+    def to_dict(self) -> dict:
+        """Same shape as `Game.to_dict()` plus the live score and heartbeat."""
+        return {
+            "id": self.id,
+            "userId": self.user_id,
+            "username": self.username,
+            "mode": self.mode,
+            "startTime": _iso(self.start_time),
+            "endTime": None,
+            "score": None,
+            "isActive": True,
+            "currentScore": self.score,
+            "lastHeartbeat": _iso(self.heartbeat),
+        }
+
+    def to_active(self) -> dict:
+        """Entry for `/active-games` (the spectator list)."""
+        return {
+            "id": self.id,
+            "username": self.username,
+            "mode": self.mode,
+            "currentScore": self.score,
+            "gameStartTime": _iso(self.start_time),
+            "isPlaying": True,
+        }
+
+
+class GameRegistry:
+    """Bounded map of game id to LiveGame, ordered by last heartbeat."""
+
+    def __init__(self, max_games: int = ACTIVE_GAMES_MAX, stale_seconds: float = ACTIVE_GAMES_STALE_SECONDS):
+        self.max_games = max_games
+        self.stale_seconds = stale_seconds
+        self._games = OrderedDict()
+        self.stats = {"started": 0, "ended": 0, "expired": 0, "evicted": 0}
+
+    def __len__(self):
+        return len(self._games)
+
+    def _expire(self, now: float):
+        cutoff = now - self.stale_seconds
+        while self._games:
+            game = next(iter(self._games.values()))
+            if game.heartbeat >= cutoff:
+                break
+            self._games.popitem(last=False)
+            self.stats["expired"] += 1
+
+    def start(self, game: LiveGame) -> LiveGame:
+        self._expire(game.heartbeat)
+        while len(self._games) >= self.max_games:
+            self._games.popitem(last=False)
+            self.stats["evicted"] += 1
+        self._games[game.id] = game
+        self.stats["started"] += 1
+        return game
+
+    def heartbeat(self, game_id: int, score: Optional[int] = None) -> Optional[LiveGame]:
+        game = self._games.get(game_id)
+        if game is None:
+            return None
+        if score is not None:
+            game.score = score
+        game.heartbeat = time.time()
+        self._games.move_to_end(game_id)
+        return game
+
+    def get(self, game_id: int) -> Optional[LiveGame]:
+        game = self._games.get(game_id)
+        if game is not None and game.heartbeat < time.time() - self.stale_seconds:
+            return None
+        return game
+
+    def end(self, game_id: int) -> Optional[LiveGame]:
+        game = self._games.pop(game_id, None)
+        if game is not None:
+            self.stats["ended"] += 1
+        return game
+
+    def active(self) -> list:
+        """Live games, most recently started first."""
+        self._expire(time.time())
+        return sorted(self._games.values(), key=lambda game: game.start_time, reverse=True)
+
+    def footprint(self) -> dict:
+        games = list(self._games.values())
+        strings = {id(s): s for game in games for s in (game.username, game.mode)}
+        total = (
+            sys.getsizeof(self._games)
+            + sum(game.size() for game in games)
+            + sum(sys.getsizeof(s) for s in strings.values())
+        )
+        return {
+            "games": len(games),
+            "maxGames": self.max_games,
+            "bytes": total,
+            "bytesPer1kGames": round(total * 1000 / len(games)) if games else 0,
+            **self.stats,
+        }
+
+    def clear(self):
+        self._games.clear()
+        self.stats = dict.fromkeys(self.stats, 0)
+
+
+game_registry = GameRegistry()
@@ -0,0 +1,222 @@
+"""
+WebSocket ingestion of in-game events with group-committed database writes.
+
+One socket per player carries a whole game as compact JSON messages instead of
+an HTTP request per step:
+
+    -> {"t": "start", "mode": "walls", "seq": 1}
+    <- {"t": "ack", "seq": 1, "id": 42}
+    -> {"t": "tick", "id": 42, "score": 30}             (no seq: no ack)
+    -> {"t": "end", "id": 42, "score": 77, "seq": 2}
+    <- {"t": "ack", "seq": 2, "id": 42, "percentile": 81.5}
+
+Ticks only touch the in-memory live game registry. Starts and ends from all
+connections are queued for INGEST_FLUSH_MS (or until INGEST_BATCH_SIZE are
+waiting) and written in a single transaction: games inserted, games closed,
+leaderboard entries added. Like the routes' queries the write runs on the
+event loop, so it never shares the SQLite connection with another thread.
+Every event is acked once its batch has committed, so an ack means the write
+is durable; an ended game leaves the live registry only then, so an end whose
+batch failed can be sent again. An end for a game the registry no longer holds
+(evicted, expired or from before a restart) is checked against its row instead.
+"""
+
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from sqlalchemy import bindparam, insert, update
+
+from game_registry import LiveGame, game_registry
+from models import GAME_MODES, Game, LeaderboardEntry
+from sketches import percentile_tracker
+from stats import stats_cache
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "200"))
+INGEST_FLUSH_MS = float(os.getenv("INGEST_FLUSH_MS", "5"))
+
+
+class EventError(Exception):
+    """An event the client sent that cannot be applied."""
+
+
+class EventBatcher:
+    """Queue start/end events and write them in one transaction per batch."""
+
+    def __init__(self, session_factory: Callable, batch_size: int = INGEST_BATCH_SIZE, flush_ms: float = INGEST_FLUSH_MS):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_seconds = flush_ms / 1000
+        self._pending = []
+        self._timer = None
+        # Games with an end queued or being written; a second end is refused
+        self.ending = set()
+        self.reset()
+
+    def reset(self):
+        self.stats = {"events": 0, "batches": 0, "largestBatch": 0}
+
+    async def submit(self, event: dict) -> dict:
+        """Queue an event and wait until its batch has committed."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((event, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            results = self.write([event for event, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def write(self, events: list) -> list:
+        """Apply a batch in one transaction; returns one result per event."""
+        starts = [event for event in events if event["t"] == "start"]
+        ends = [event for event in events if event["t"] == "end"]
+        now = datetime.utcnow()
+
+        with self.session_factory() as db:
+            ids = []
+            if starts:
+                rows = [
+                    {"user_id": e["user_id"], "username": e["username"], "mode": e["mode"],
+                     "start_time": now, "is_active": 1}
+                    for e in starts
+                ]
+                ids = list(db.execute(insert(Game).returning(Game.id, sort_by_parameter_order=True), rows).scalars())
+            if ends:
+                db.execute(
+                    update(Game.__table__)
+                    .where(Game.__table__.c.id == bindparam("game_id"))
+                    .values(end_time=now, score=bindparam("final_score"), is_active=0),
+                    [{"game_id": e["id"], "final_score": e.get("score")} for e in ends],
+                )
+                scored = [e for e in ends if e.get("score") is not None]
+                if scored:
+                    db.execute(insert(LeaderboardEntry), [
+                        {"user_id": e["user_id"], "username": e["username"], "score": e["score"],
+                         "mode": e["mode"], "date": now}
+                        for e in scored
+                    ])
+            db.commit()
+
+            started = iter(ids)
+            results = []
+            for event in events:
+                if event["t"] == "start":
+                    game_id = next(started)
+                    game_registry.start(LiveGame(
+                        game_id, event["user_id"], event["username"], event["mode"],
+                        now.replace(tzinfo=timezone.utc).timestamp(),
+                    ))
+                    results.append({"id": game_id})
+                else:
+                    game_registry.end(event["id"])
+                    result = {"id": event["id"]}
+                    if event.get("score") is not None:
+                        stats_cache.invalidate(event["user_id"], event["mode"])
+                        result["percentile"] = self._percentile(db, event)
+                    results.append(result)
+            if ends:
+                try:
+                    percentile_tracker.maybe_checkpoint(db)
+                except Exception:
+                    db.rollback()  # Retried at the next batch; the entries are already committed
+
+        self.stats["events"] += len(events)
+        self.stats["batches"] += 1
+        self.stats["largestBatch"] = max(self.stats["largestBatch"], len(events))
+        return results
+
+
+    @staticmethod
+    def _percentile(db, event: dict) -> Optional[float]:
+        """The entry is committed either way, so a sketch failure only drops its percentile."""
+        try:
+            return percentile_tracker.percentile(db, event["mode"], event["score"])
+        except Exception:
+            db.rollback()
+            return None
+
+
+def _score(message: dict) -> Optional[int]:
+    score = message.get("score")
+    if score is not None and (not isinstance(score, int) or isinstance(score, bool) or score < 0):
+        raise EventError("score must be a non-negative integer")
+    return score
+
+
+class GameChannel:
+    """One player's socket: turns its messages into registry updates and batched writes."""
+
+    def __init__(self, batcher: EventBatcher, user_id: int, username: str):
+        self.batcher = batcher
+        self.user_id = user_id
+        self.username = username
+
+    def _own_game(self, message: dict, stored: bool = False) -> LiveGame:
+        """The player's live game; with `stored`, also an active row the registry lost."""
+        game = game_registry.get(message.get("id"))
+        if game is None and stored:
+            game = self._stored_game(message.get("id"))
+        if game is None or game.user_id != self.user_id:
+            raise EventError(f"unknown game {message.get('id')}")
+        return game
+
+    def _stored_game(self, game_id) -> Optional[LiveGame]:
+        # Evicted, expired or started before a restart: the row still says who owns it
+        if not isinstance(game_id, int) or isinstance(game_id, bool):
+            return None
+        with self.batcher.session_factory() as db:
+            game = db.query(Game).filter(
+                Game.id == game_id, Game.user_id == self.user_id, Game.is_active == 1,
+            ).first()
+            return LiveGame.from_game(game) if game is not None else None
+
+    async def handle(self, message: dict) -> Optional[dict]:
+        """Apply one message and return the fields of its ack."""
+        if not isinstance(message, dict):
+            raise EventError("messages are JSON objects")
+        kind = message.get("t")
+        if kind == "tick":
+            game = self._own_game(message)
+            game_registry.heartbeat(game.id, _score(message))
+            return {"id": game.id}
+        if kind == "start":
+            if message.get("mode") not in GAME_MODES:
+                raise EventError(f"start needs a mode: one of {', '.join(GAME_MODES)}")
+            return await self.batcher.submit({
+                "t": "start", "user_id": self.user_id, "username": self.username, "mode": message["mode"],
+            })
+        if kind == "end":
+            game = self._own_game(message, stored=True)
+            score = _score(message)
+            if game.id in self.batcher.ending:
+                raise EventError(f"game {game.id} is already ending")
+            # Retired from the registry by the batch, once the end has committed
+            self.batcher.ending.add(game.id)
+            try:
+                return await self.batcher.submit({
+                    "t": "end", "id": game.id, "user_id": self.user_id, "username": self.username,
+                    "mode": game.mode, "score": score,
+                })
+            finally:
+                self.batcher.ending.discard(game.id)
+        raise EventError(f"unknown message type {kind!r}")
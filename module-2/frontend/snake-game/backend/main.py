@@ -3,19 +3,35 @@ FastAPI backend for Snake Game with SQLAlchemy ORM database support.
 Supports PostgreSQL and SQLite.
 """
 
+import asyncio
+import hmac
 import os
-from fastapi import FastAPI, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager, contextmanager
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from pathlib import Path
 
-from database import SessionLocal, init_db
-from models import User, LeaderboardEntry, Game
+from database import SessionLocal, engine, init_db
+from models import GAME_MODES, User, LeaderboardEntry, Game
+from partitions import GAME_LOOKUP_MONTHS, partition_filter
+from bulk_io import EXPORT_FORMATS, stream_rows
+from stats import stats_cache, user_stats, mode_stats
+from sketches import percentile_tracker
+from singleflight import single_flight
+from game_registry import LiveGame, game_registry
+from admission import AdmissionMiddleware, admission
+from readiness import DatabaseProbe, readiness
+import retention
+from ingest import EventBatcher, EventError, GameChannel
+import profiler
+from sandbox import CODE_EXEC_ENABLED, CODE_EXEC_MAX_CODE, PoolBusy, execution_pool
 
 # Initialize database tables (lazy init for tests)
 _db_initialized = False
@@ -31,7 +47,46 @@ def ensure_db_init():
             # Database may already be initialized or we're in a test environment
             pass
 
-app = FastAPI(title="Snake Game Backend")
+last_compaction = {}
+
+
+def record_compaction(report: dict):
+    last_compaction.update(report, finishedAt=current_time())
+    # Player statistics and percentiles are computed from the rows that were just removed
+    stats_cache.clear()
+    if report.get("deleted"):
+        percentile_tracker.rebuild()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build (or restore) the percentile sketches now rather than inside the
+    # first score submission, which would block the event loop while it scans
+    ensure_db_init()
+    db = SessionLocal()
+    try:
+        percentile_tracker.catch_up(db)
+    except Exception:
+        # Database not reachable yet; the first submission builds them instead
+        pass
+    finally:
+        db.close()
+    if CODE_EXEC_ENABLED:
+        # Warm the sandbox workers before the first snippet arrives
+        await execution_pool.start()
+    compaction = None
+    if retention.LEADERBOARD_RETENTION_INTERVAL > 0:
+        compaction = asyncio.create_task(retention.run_periodically(on_compacted=record_compaction))
+    yield
+    if compaction is not None:
+        compaction.cancel()
+    await execution_pool.close()
+
+
+app = FastAPI(title="Snake Game Backend", lifespan=lifespan)
+
+# Concurrency limit with per-route priorities; sheds load with 503 + Retry-After
+app.add_middleware(AdmissionMiddleware, controller=admission)
 
 # CORS middleware for development
 app.add_middleware(
@@ -40,6 +95,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
 # Mount frontend static files
@@ -52,6 +108,11 @@ elif (frontend_dir / "css").exists():
     app.mount("/", StaticFiles(directory=frontend_dir, html=True), name="frontend")
 
 
+# Any other mode is a 422, so unknown strings never become cache keys or sketches
+GameMode = Literal[GAME_MODES]
+ModeFilter = Literal[("all", *GAME_MODES)]
+
+
 # Pydantic request models
 class LoginRequest(BaseModel):
     username: str
@@ -66,17 +127,26 @@ class SignupRequest(BaseModel):
 
 class ScoreRequest(BaseModel):
     score: int
-    mode: str
+    mode: GameMode
 
 
 class StartGameRequest(BaseModel):
-    mode: str
+    mode: GameMode
 
 
 class EndGameRequest(BaseModel):
     score: Optional[int] = None
 
 
+class HeartbeatRequest(BaseModel):
+    score: Optional[int] = None
+
+
+class ExecuteRequest(BaseModel):
+    code: str
+    language: str = "python"
+
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -86,6 +156,22 @@ def get_db():
         db.close()
 
 
+def session_scope():
+    """Session for work that outlives a request, resolved like get_db (overrides included)."""
+    return contextmanager(app.dependency_overrides.get(get_db, get_db))()
+
+
+# Internal metrics endpoints are admin only, hidden unless ADMIN_TOKEN is set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
 # Helper functions
 def current_time():
     return datetime.utcnow().isoformat()
@@ -156,15 +242,22 @@ async def me():
 
 # Routes: Leaderboard
 @app.get("/leaderboard")
-async def get_leaderboard(mode: Optional[str] = "all", limit: int = 50, db: Session = Depends(get_db)):
-    seed_default_users(db)
-    
-    query = db.query(LeaderboardEntry)
-    if mode and mode != "all":
-        query = query.filter(LeaderboardEntry.mode == mode)
-    
-    entries = query.order_by(LeaderboardEntry.score.desc()).limit(limit).all()
-    return {"leaderboard": [e.to_dict() for e in entries]}
+async def get_leaderboard(mode: Optional[str] = "all", limit: int = 50):
+    # Released before waiting on the flight, so waiters never pin pool connections
+    with session_scope() as db:
+        seed_default_users(db)
+
+    def load():
+        # Own session: the shared query may outlive the request that started it
+        with session_scope() as session:
+            query = session.query(LeaderboardEntry).filter(*partition_filter(LeaderboardEntry.date))
+            if mode and mode != "all":
+                query = query.filter(LeaderboardEntry.mode == mode)
+
+            entries = query.order_by(LeaderboardEntry.score.desc()).limit(limit).all()
+            return {"leaderboard": [e.to_dict() for e in entries]}
+
+    return await single_flight.do(f"leaderboard:{mode}:{limit}", load)
 
 
 @app.post("/leaderboard")
@@ -185,52 +278,98 @@ async def submit_score(payload: ScoreRequest, db: Session = Depends(get_db)):
     db.add(entry)
     db.commit()
     db.refresh(entry)
+    stats_cache.invalidate(entry.user_id, entry.mode)
 
-    return JSONResponse(status_code=201, content={"entry": entry.to_dict()})
+    percentile = percentile_tracker.percentile(db, entry.mode, entry.score)
+    percentile_tracker.maybe_checkpoint(db)
+
+    return JSONResponse(status_code=201, content={"entry": entry.to_dict(), "percentile": percentile})
 
 
 @app.get("/users/me/highscore")
-async def user_highscore(mode: Optional[str] = "all", db: Session = Depends(get_db)):
+async def user_highscore(mode: Optional[str] = "all"):
+    with session_scope() as db:
+        seed_default_users(db)
+
+    def load():
+        with session_scope() as session:
+            user = session.query(User).first()
+            if not user:
+                return {"highScore": 0}
+
+            query = session.query(LeaderboardEntry).filter(
+                LeaderboardEntry.user_id == user.id,
+                *partition_filter(LeaderboardEntry.date),
+            )
+            if mode and mode != "all":
+                query = query.filter(LeaderboardEntry.mode == mode)
+
+            high = query.with_entities(func.max(LeaderboardEntry.score)).scalar()
+            return {"highScore": high or 0}
+
+    # "me" is always the first user for now; key on the user id once auth lands
+    return await single_flight.do(f"highscore:{mode}", load)
+
+
+
+# Routes: Statistics
+@app.get("/users/{user_id}/stats")
+async def get_user_stats(user_id: int, mode: ModeFilter = "all", db: Session = Depends(get_db)):
     seed_default_users(db)
-    
-    user = db.query(User).first()
-    if not user:
-        return {"highScore": 0}
 
-    query = db.query(LeaderboardEntry).filter(LeaderboardEntry.user_id == user.id)
+    if not db.query(User.id).filter(User.id == user_id).first():
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return user_stats(db, user_id, mode)
+
+
+@app.get("/stats/{mode}")
+async def get_mode_stats(mode: ModeFilter, db: Session = Depends(get_db)):
+    seed_default_users(db)
+
+    return mode_stats(db, mode)
+
+
+
+# Routes: Bulk export
+def export_response(query, model, fmt: str, filename: str):
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {fmt}")
+    return StreamingResponse(
+        stream_rows(query, model, fmt),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+
+@app.get("/leaderboard/export")
+async def export_leaderboard(mode: Optional[str] = "all", format: str = "ndjson", db: Session = Depends(get_db)):
+    query = db.query(LeaderboardEntry).filter(*partition_filter(LeaderboardEntry.date))
     if mode and mode != "all":
         query = query.filter(LeaderboardEntry.mode == mode)
 
-    high = max([e.score for e in query.all()], default=0)
-    return {"highScore": high}
+    return export_response(query.order_by(LeaderboardEntry.id), LeaderboardEntry, format, "leaderboard")
+
+
+@app.get("/users/{user_id}/games/export")
+async def export_user_games(user_id: int, format: str = "ndjson", db: Session = Depends(get_db)):
+    if db.get(User, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    query = db.query(Game).filter(Game.user_id == user_id, *partition_filter(Game.start_time))
+    return export_response(query.order_by(Game.id), Game, format, f"games-{user_id}")
 
 
 
 # Routes: Active Games
 @app.get("/active-games")
-async def active_games(db: Session = Depends(get_db)):
-    seed_default_users(db)
-    
-    # Return mock active games (for spectator mode)
-    mock_players = [
-        {
-            "id": 1,
-            "username": "speedmaster",
-            "mode": "walls",
-            "currentScore": 120,
-            "gameStartTime": current_time(),
-            "isPlaying": True,
-        },
-        {
-            "id": 2,
-            "username": "player1",
-            "mode": "pass-through",
-            "currentScore": 80,
-            "gameStartTime": current_time(),
-            "isPlaying": True,
-        },
-    ]
-    return {"games": mock_players}
+async def active_games():
+    # Served from the in-process registry; no database query
+    return {"games": [game.to_active() for game in game_registry.active()]}
+
+
+@app.get("/internal/active-games", dependencies=[Depends(require_admin)])
+async def active_games_footprint():
+    return game_registry.footprint()
 
 
 # Routes: Games
@@ -251,36 +390,213 @@ async def start_game(payload: StartGameRequest, db: Session = Depends(get_db)):
     db.add(game)
     db.commit()
     db.refresh(game)
+    game_registry.start(LiveGame.from_game(game))
 
     return JSONResponse(status_code=201, content={"gameSession": game.to_dict()})
 
 
 @app.get("/games/{game_id}")
-async def game_state(game_id: int, db: Session = Depends(get_db)):
-    game = db.query(Game).filter(Game.id == game_id).first()
-    if not game:
-        return {"gameId": game_id, "timestamp": current_time()}
-
-    return {"gameId": game_id, "timestamp": current_time(), **game.to_dict()}
+async def game_state(game_id: int):
+    live = game_registry.get(game_id)
+    if live is not None:
+        return {"gameId": game_id, "timestamp": current_time(), **live.to_dict()}
+
+    # Finished, expired or started by another worker: fall back to the table
+    def load():
+        with session_scope() as session:
+            game = session.query(Game).filter(
+                Game.id == game_id,
+                *partition_filter(Game.start_time, GAME_LOOKUP_MONTHS),
+            ).first()
+            return game.to_dict() if game else {}
+
+    game = await single_flight.do(f"game:{game_id}", load)
+    return {"gameId": game_id, "timestamp": current_time(), **game}
+
+
+@app.post("/games/{game_id}/heartbeat")
+async def game_heartbeat(game_id: int, payload: Optional[HeartbeatRequest] = None):
+    live = game_registry.heartbeat(game_id, payload.score if payload else None)
+    if live is None:
+        raise HTTPException(status_code=404, detail="Game is not live")
+    return {"gameId": game_id, "currentScore": live.score}
+
+
+async def persist_game_end(game_id: int, score: Optional[int], end_time: datetime):
+    # async so it runs on the event loop, never beside a request on the shared SQLite connection.
+    # Own session: the request's has been closed by the time this runs.
+    with session_scope() as db:
+        updated = db.query(Game).filter(
+            Game.id == game_id,
+            *partition_filter(Game.start_time, GAME_LOOKUP_MONTHS),
+        ).update(
+            {Game.end_time: end_time, Game.score: score, Game.is_active: 0},
+            synchronize_session=False,
+        )
+        db.commit()
+    # Retire the live game only once the table says it ended; if the write
+    # fails it stays live and is served (and can be ended again) as before.
+    if updated:
+        game_registry.end(game_id)
 
 
 @app.post("/games/{game_id}/end")
-async def end_game(game_id: int, payload: Optional[EndGameRequest] = None, db: Session = Depends(get_db)):
-    game = db.query(Game).filter(Game.id == game_id).first()
-    
-    if game:
-        game.end_time = datetime.utcnow()
-        game.score = payload.score if payload else None
-        game.is_active = 0
-        db.commit()
+async def end_game(
+    game_id: int,
+    background_tasks: BackgroundTasks,
+    payload: Optional[EndGameRequest] = None,
+):
+    score = payload.score if payload else None
+    end_time = datetime.utcnow()
+    # The response does not depend on the row; write it after responding
+    background_tasks.add_task(persist_game_end, game_id, score, end_time)
 
     return {
         "gameId": game_id,
-        "score": payload.score if payload else None,
-        "endTime": current_time(),
+        "score": score,
+        "endTime": end_time.isoformat(),
     }
 
 
+# Routes: Game event stream
+event_batcher = EventBatcher(session_scope)
+
+
+@app.websocket("/ws/games")
+async def game_events(websocket: WebSocket):
+    with session_scope() as db:
+        seed_default_users(db)
+        # Same stand-in identity as the REST routes until auth lands
+        user = db.query(User).first()
+        player = (user.id, user.username) if user else None
+    if player is None:
+        await websocket.close(code=4401)
+        return
+
+    await websocket.accept()
+    channel = GameChannel(event_batcher, *player)
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except (KeyError, ValueError):
+                # KeyError: a binary frame, which has no "text" to decode
+                await websocket.send_json({"t": "error", "seq": None, "error": "invalid JSON"})
+                continue
+            seq = message.get("seq") if isinstance(message, dict) else None
+            try:
+                result = await channel.handle(message)
+            except EventError as exc:
+                await websocket.send_json({"t": "error", "seq": seq, "error": str(exc)})
+                continue
+            if seq is not None:
+                await websocket.send_json({"t": "ack", "seq": seq, **result})
+    except WebSocketDisconnect:
+        pass
+
+
+@app.get("/internal/ingest", dependencies=[Depends(require_admin)])
+async def ingest_metrics():
+    return event_batcher.stats
+
+
+# Routes: Code execution (admin only, off unless CODE_EXEC_ENABLED)
+@app.get("/execute/status", dependencies=[Depends(require_admin)])
+async def execute_status():
+    if not CODE_EXEC_ENABLED:
+        raise HTTPException(status_code=404, detail="Code execution is disabled")
+    return {"enabled": True, "languages": ["python"], **execution_pool.status()}
+
+
+@app.post("/execute", dependencies=[Depends(require_admin)])
+async def execute_code(payload: ExecuteRequest):
+    if not CODE_EXEC_ENABLED:
+        raise HTTPException(status_code=404, detail="Code execution is disabled")
+    if payload.language.lower().strip() not in ("python", "py"):
+        raise HTTPException(status_code=400, detail=f"Unsupported language: {payload.language}")
+    if not payload.code.strip():
+        raise HTTPException(status_code=400, detail="No code provided")
+    if len(payload.code) > CODE_EXEC_MAX_CODE:
+        raise HTTPException(status_code=413, detail="Code too large")
+
+    try:
+        result = await execution_pool.run(payload.code)
+    except PoolBusy:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "All Python workers are busy, try again shortly"},
+            headers={"Retry-After": "1"},
+        )
+    return {**result, "language": "python"}
+
+
+# Routes: Profiling (admin only, off unless PROFILER_ENABLED)
+def require_profiler_enabled():
+    if not profiler.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+def capture_seconds(seconds: float) -> float:
+    if not 0 < seconds <= profiler.PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {profiler.PROFILER_MAX_SECONDS:g}]")
+    return seconds
+
+
+@app.get("/internal/profile", dependencies=[Depends(require_profiler_enabled), Depends(require_admin)])
+async def profile_worker(seconds: float = 5, format: str = "collapsed", interval_ms: float = profiler.PROFILER_INTERVAL_MS):
+    if format not in ("collapsed", "svg", "json"):
+        raise HTTPException(status_code=400, detail=f"Unsupported profile format: {format}")
+    if interval_ms < 1:
+        raise HTTPException(status_code=400, detail="interval_ms must be at least 1")
+    try:
+        sampler = await profiler.profile(capture_seconds(seconds), interval_ms)
+    except profiler.ProfilerBusy:
+        raise HTTPException(status_code=409, detail="A capture is already running in this worker")
+
+    summary = sampler.summary()
+    if format == "json":
+        return {**summary, "stacks": dict(sampler.stacks.most_common())}
+    headers = {"X-Profile-Samples": str(summary["samples"])}
+    if format == "svg":
+        title = f"{seconds:g}s at {interval_ms:g}ms, pid {os.getpid()}"
+        return Response(profiler.flamegraph_svg(sampler.stacks, title), media_type="image/svg+xml", headers=headers)
+    return PlainTextResponse(sampler.collapsed(), headers=headers)
+
+
+@app.get("/internal/memory", dependencies=[Depends(require_profiler_enabled), Depends(require_admin)])
+async def memory_growth(seconds: float = 30, limit: int = 25, frames: int = 1):
+    try:
+        return await profiler.memory_growth(capture_seconds(seconds), limit, frames)
+    except profiler.ProfilerBusy:
+        raise HTTPException(status_code=409, detail="A capture is already running in this worker")
+
+
+@app.get("/internal/retention", dependencies=[Depends(require_admin)])
+async def retention_status():
+    return {
+        "keepBest": retention.LEADERBOARD_KEEP_BEST,
+        "keepDays": retention.LEADERBOARD_KEEP_DAYS,
+        "intervalSeconds": retention.LEADERBOARD_RETENTION_INTERVAL,
+        "lastRun": last_compaction or None,
+    }
+
+
+@app.get("/internal/singleflight", dependencies=[Depends(require_admin)])
+async def singleflight_metrics():
+    return single_flight.metrics()
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+database_probe = DatabaseProbe(engine)
+
+
+@app.get("/ready")
+async def readiness_check():
+    ready, report = await readiness(database_probe, admission)
+    if not ready:
+        return JSONResponse(status_code=503, content=report, headers={"Retry-After": "5"})
+    return report
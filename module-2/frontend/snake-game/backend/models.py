@@ -2,10 +2,14 @@
 SQLAlchemy ORM models for the Snake Game application.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
+from partitions import PARTITIONING_ENABLED, partition_table_args
+
+# Modes the frontend plays (GAME_MODES in js/game.js)
+GAME_MODES = ("pass-through", "walls")
 
 
 class User(Base):
@@ -32,13 +36,26 @@ class User(Base):
 
 class LeaderboardEntry(Base):
     __tablename__ = "leaderboard"
-
-    id = Column(Integer, primary_key=True, index=True)
+    __table_args__ = (
+        # Per-mode ranking, histograms and quantiles without a table scan
+        Index("ix_leaderboard_mode_score", "mode", "score"),
+        Index("ix_leaderboard_mode_date", "mode", "date"),
+        partition_table_args("date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     username = Column(String(255), nullable=False)
     score = Column(Integer, nullable=False, index=True)
     mode = Column(String(50), nullable=False)  # 'walls' or 'pass-through'
-    date = Column(DateTime, default=datetime.utcnow, index=True)
+    # Partition key; partitioned tables need it in the primary key
+    date = Column(
+        DateTime,
+        default=datetime.utcnow,
+        index=True,
+        primary_key=PARTITIONING_ENABLED,
+        nullable=not PARTITIONING_ENABLED,
+    )
 
     # Relationships
     user = relationship("User", back_populates="leaderboard_entries")
@@ -56,12 +73,19 @@ class LeaderboardEntry(Base):
 
 class Game(Base):
     __tablename__ = "games"
+    __table_args__ = partition_table_args("start_time")
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     username = Column(String(255), nullable=False)
     mode = Column(String(50), nullable=False)  # 'walls' or 'pass-through'
-    start_time = Column(DateTime, default=datetime.utcnow)
+    # Partition key; partitioned tables need it in the primary key
+    start_time = Column(
+        DateTime,
+        default=datetime.utcnow,
+        primary_key=PARTITIONING_ENABLED,
+        nullable=not PARTITIONING_ENABLED,
+    )
     end_time = Column(DateTime, nullable=True)
     score = Column(Integer, nullable=True)
     is_active = Column(Integer, default=1)  # SQLite compatibility: use int as bool
@@ -80,3 +104,12 @@ class Game(Base):
             "score": self.score,
             "isActive": bool(self.is_active),
         }
+
+
+class SketchCheckpoint(Base):
+    __tablename__ = "quantile_sketches"
+
+    mode = Column(String(50), primary_key=True)
+    payload = Column(Text, nullable=False)  # JSON-serialized KLL sketch
+    last_entry_id = Column(Integer, nullable=False)  # Last leaderboard id folded in
+    updated_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,173 @@
+"""
+Declarative partitioning for the leaderboard and games tables (PostgreSQL only).
+
+When DB_PARTITIONING=true and DATABASE_URL points at PostgreSQL, both tables are
+created as `PARTITION BY RANGE` on their timestamp column with one partition per
+calendar month, optionally sub-partitioned by `LIST (mode)`. SQLite deployments
+are unaffected.
+
+Run `python partitions.py` from cron (daily is plenty) to pre-create upcoming
+months and detach/drop months that fall outside the retention window.
+"""
+
+import os
+import re
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import text
+
+from database import engine, is_sqlite
+
+PARTITIONING_ENABLED = (
+    not is_sqlite and os.getenv("DB_PARTITIONING", "false").lower() == "true"
+)
+PARTITION_BY_MODE = os.getenv("DB_PARTITION_BY_MODE", "false").lower() == "true"
+# Number of future months to keep created ahead of time
+PARTITION_PREMAKE_MONTHS = int(os.getenv("DB_PARTITION_PREMAKE_MONTHS", "3"))
+# Months of data to keep; 0 keeps every partition forever
+PARTITION_RETENTION_MONTHS = int(os.getenv("DB_PARTITION_RETENTION_MONTHS", "0"))
+# Detach expired partitions but keep them around instead of dropping them
+PARTITION_DETACH_ONLY = os.getenv("DB_PARTITION_DETACH_ONLY", "false").lower() == "true"
+# How far back a game lookup by id searches (games end shortly after they start)
+GAME_LOOKUP_MONTHS = int(os.getenv("DB_GAME_LOOKUP_MONTHS", "2"))
+
+GAME_MODES = ("walls", "pass-through")
+
+# Partitioned table name -> partition key column
+PARTITIONED_TABLES = {
+    "leaderboard": "date",
+    "games": "start_time",
+}
+
+_PARTITION_NAME = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def partition_table_args(column: str) -> dict:
+    """Table kwargs that make a model's table partitioned when enabled."""
+    if not PARTITIONING_ENABLED:
+        return {}
+    return {"postgresql_partition_by": f"RANGE ({column})"}
+
+
+def month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(moment: datetime, months: int) -> datetime:
+    index = moment.year * 12 + (moment.month - 1) + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, start: datetime) -> str:
+    return f"{table}_p{start:%Y%m}"
+
+
+def _mode_suffix(mode: str) -> str:
+    return re.sub(r"[^a-z0-9]", "_", mode.lower())
+
+
+def partition_floor(months: Optional[int] = None, now: Optional[datetime] = None) -> Optional[datetime]:
+    """Oldest partition boundary still worth scanning, or None for no bound."""
+    months = PARTITION_RETENTION_MONTHS if months is None else months
+    if not PARTITIONING_ENABLED or months <= 0:
+        return None
+    return add_months(month_start(now or datetime.utcnow()), -(months - 1))
+
+
+def partition_filter(column, months: Optional[int] = None, now: Optional[datetime] = None) -> list:
+    """Filter clauses on the partition key so the planner can prune partitions.
+
+    Returns an empty list when partitioning is disabled, so callers can always
+    write `query.filter(*partition_filter(Model.column))`.
+    """
+    floor = partition_floor(months, now)
+    if floor is None:
+        return []
+    return [column >= floor]
+
+
+def create_month_partition(conn, table: str, start: datetime):
+    """Create the partition covering the month starting at `start`."""
+    name = partition_name(table, start)
+    end = add_months(start, 1)
+    sub = " PARTITION BY LIST (mode)" if PARTITION_BY_MODE else ""
+    conn.execute(text(
+        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}'){sub}"
+    ))
+    if PARTITION_BY_MODE:
+        for mode in GAME_MODES:
+            conn.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{name}_{_mode_suffix(mode)}" '
+                f"PARTITION OF \"{name}\" FOR VALUES IN ('{mode}')"
+            ))
+        conn.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{name}_other" PARTITION OF "{name}" DEFAULT'
+        ))
+
+
+def ensure_partitions(conn, table: str, now: Optional[datetime] = None) -> list:
+    """Create partitions from the retention floor through the premake horizon."""
+    current = month_start(now or datetime.utcnow())
+    first = partition_floor(now=now) or current
+    created = []
+    month = first
+    while month <= add_months(current, PARTITION_PREMAKE_MONTHS):
+        create_month_partition(conn, table, month)
+        created.append(partition_name(table, month))
+        month = add_months(month, 1)
+    # Catch-all so inserts outside the created range never fail
+    conn.execute(text(
+        f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{table}" DEFAULT'
+    ))
+    return created
+
+
+def list_partitions(conn, table: str) -> list:
+    """Names of the direct monthly partitions of `table`."""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table"
+    ), {"table": table})
+    return sorted(name for (name,) in rows if _PARTITION_NAME.search(name))
+
+
+def expire_partitions(conn, table: str, now: Optional[datetime] = None) -> list:
+    """Detach (and drop, unless DB_PARTITION_DETACH_ONLY) partitions past retention."""
+    floor = partition_floor(now=now)
+    if floor is None:
+        return []
+    expired = []
+    for name in list_partitions(conn, table):
+        year, month = _PARTITION_NAME.search(name).groups()
+        if datetime(int(year), int(month), 1) >= floor:
+            continue
+        conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+        if not PARTITION_DETACH_ONLY:
+            conn.execute(text(f'DROP TABLE "{name}"'))
+        expired.append(name)
+    return expired
+
+
+def maintain_partitions(bind=None, now: Optional[datetime] = None) -> dict:
+    """Create upcoming partitions and expire old ones for every partitioned table."""
+    if not PARTITIONING_ENABLED:
+        return {}
+    report = {}
+    with (bind or engine).begin() as conn:
+        for table in PARTITIONED_TABLES:
+            report[table] = {
+                "created": ensure_partitions(conn, table, now),
+                "expired": expire_partitions(conn, table, now),
+            }
+    return report
+
+
+if __name__ == "__main__":
+    if not PARTITIONING_ENABLED:
+        print("Partitioning disabled (set DB_PARTITIONING=true with a PostgreSQL DATABASE_URL)")
+    for table, result in maintain_partitions().items():
+        print(f"{table}: ensured {len(result['created'])}, expired {result['expired']}")
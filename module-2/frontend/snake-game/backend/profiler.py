@@ -0,0 +1,223 @@
+"""
+On-demand sampling profiler and memory growth snapshots for a live worker.
+
+`/internal/profile` starts a sampler thread that every PROFILER_INTERVAL_MS
+reads the current frame of every other thread (`sys._current_frames()`), so it
+sees the event loop thread (coroutines run on its stack), the threadpool and
+any background threads, without tracing every call. Samples are folded into
+collapsed stacks (`thread;outer;...;inner count`, the input format of
+flamegraph.pl and speedscope) or rendered as a self-contained SVG flamegraph.
+
+`/internal/memory` traces allocations with tracemalloc for a window and
+returns the source lines whose allocated memory grew the most. tracemalloc
+slows every allocation while it runs, so it is only on during that window.
+
+Both are off unless PROFILER_ENABLED=true and, like the other /internal
+routes, need the ADMIN_TOKEN. One capture runs at a time per worker, for at
+most PROFILER_MAX_SECONDS.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from html import escape
+
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "10"))
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ProfilerBusy(Exception):
+    """Another capture is already running in this worker."""
+
+
+def _frame_label(code, lineno: int) -> str:
+    path = code.co_filename
+    if path.startswith(_BACKEND_DIR):
+        path = os.path.relpath(path, _BACKEND_DIR)
+    else:
+        # site-packages/sqlalchemy/orm/query.py -> sqlalchemy/orm/query.py
+        marker = path.rfind("-packages" + os.sep)
+        path = path[marker + 10:] if marker >= 0 else os.path.basename(path)
+    name = getattr(code, "co_qualname", code.co_name)
+    # ';' separates frames in the collapsed format
+    return f"{name} ({path}:{lineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    """Periodically sample every thread's stack into collapsed-stack counts."""
+
+    def __init__(self, interval_ms: float = PROFILER_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self.stacks = Counter()
+        self.samples = 0
+        self.sample_seconds = 0.0
+        # (code, line) -> label, so a hot frame is formatted once per capture
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        me = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        labels = self._labels
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                key = (frame.f_code, frame.f_lineno)
+                label = labels.get(key)
+                if label is None:
+                    label = labels[key] = _frame_label(*key)
+                stack.append(label)
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            started = time.perf_counter()
+            self._sample()
+            self.sample_seconds += time.perf_counter() - started
+            self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> dict:
+        return {
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "intervalMs": self.interval * 1000,
+            "samplerMsPerSample": round(self.sample_seconds / self.samples * 1000, 3) if self.samples else 0.0,
+        }
+
+
+def flamegraph_svg(stacks: Counter, title: str = "Flame graph", width: int = 1200) -> str:
+    """Render collapsed stacks as a static SVG flame graph (hover for details)."""
+    root = {"children": {}, "count": 0}
+    for stack, count in stacks.items():
+        node = root
+        node["count"] += count
+        for frame in stack.split(";"):
+            node = node["children"].setdefault(frame, {"children": {}, "count": 0})
+            node["count"] += count
+
+    row, total = 16, max(root["count"], 1)
+    rects, depth_reached = [], 0
+
+    def walk(node, name, x, depth):
+        nonlocal depth_reached
+        depth_reached = max(depth_reached, depth)
+        w = node["count"] / total * width
+        if w < 0.3:
+            return
+        rects.append((name, x, depth, w, node["count"]))
+        for child_name, child in sorted(node["children"].items()):
+            walk(child, child_name, x, depth + 1)
+            x += child["count"] / total * width
+
+    x = 0.0
+    for name, child in sorted(root["children"].items()):
+        walk(child, name, x, 0)
+        x += child["count"] / total * width
+
+    height = (depth_reached + 1) * row + 30
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="monospace" font-size="11">',
+        f'<text x="4" y="14">{escape(title)} ({total} samples)</text>',
+    ]
+    for name, x, depth, w, count in rects:
+        y = height - (depth + 1) * row
+        hue = 20 + (hash(name) % 40)
+        label = escape(name[: int(w / 7)]) if w > 21 else ""
+        parts.append(
+            f'<g><title>{escape(name)} ({count} samples, {count / total:.1%})</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row - 1}" fill="hsl({hue},90%,60%)"/>'
+            f'<text x="{x + 2:.1f}" y="{y + 11}">{label}</text></g>'
+        )
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+class Captures:
+    """Allow one profile or memory capture at a time per worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy()
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+def memory_diff(before, after, limit: int = 25) -> dict:
+    """Top source lines by allocated-memory growth between two snapshots."""
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    before, after = before.filter_traces(ignore), after.filter_traces(ignore)
+    stats = after.compare_to(before, "lineno")
+    grown = [stat for stat in stats if stat.size_diff > 0][:limit]
+    return {
+        "totalGrowthBytes": sum(stat.size_diff for stat in stats),
+        "top": [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "sizeDiffBytes": stat.size_diff,
+                "sizeBytes": stat.size,
+                "countDiff": stat.count_diff,
+            }
+            for stat in grown
+        ],
+    }
+
+
+captures = Captures()
+
+
+async def profile(seconds: float, interval_ms: float = PROFILER_INTERVAL_MS) -> SamplingProfiler:
+    """Sample all threads for `seconds` while the event loop keeps serving requests."""
+    with captures:
+        sampler = SamplingProfiler(interval_ms)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+    return sampler
+
+
+async def memory_growth(seconds: float, limit: int = 25, frames: int = 1) -> dict:
+    """Trace allocations for `seconds` and report where memory grew."""
+    with captures:
+        # Leave tracemalloc running if someone else (PYTHONTRACEMALLOC) started it
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(frames)
+        try:
+            before = tracemalloc.take_snapshot()
+            await asyncio.sleep(seconds)
+            after = tracemalloc.take_snapshot()
+        finally:
+            if started:
+                tracemalloc.stop()
+    return {"seconds": seconds, **memory_diff(before, after, limit)}
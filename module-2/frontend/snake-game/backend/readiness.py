@@ -0,0 +1,92 @@
+"""
+Readiness probe: can this instance take traffic right now?
+
+`/health` only says the process is up. `/ready` also checks the database with
+a `SELECT 1` (cached for READY_PROBE_INTERVAL seconds and coalesced, so load
+balancer polling never adds load of its own), reports connection pool and
+admission saturation, and answers 503 while the database is unreachable or
+the pool is above READY_MAX_SATURATION. Docker's HEALTHCHECK and Render's
+healthCheckPath point here so a wedged instance is taken out of rotation.
+
+Admission saturation is reported only: a busy instance that sheds its excess
+is still serving, and with a single instance (Render) taking it out of
+rotation would turn a burst into a full outage.
+"""
+
+import asyncio
+import os
+import time
+
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+from singleflight import single_flight
+
+READY_PROBE_INTERVAL = float(os.getenv("READY_PROBE_INTERVAL", "5"))
+READY_PROBE_TIMEOUT = float(os.getenv("READY_PROBE_TIMEOUT", "2"))
+READY_MAX_SATURATION = float(os.getenv("READY_MAX_SATURATION", "0.9"))
+
+
+def pool_status(engine) -> dict:
+    """Checked-out connections against the pool's capacity (None for unbounded pools)."""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"type": type(pool).__name__, "saturation": None}
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    return {
+        "type": type(pool).__name__,
+        "size": pool.size(),
+        "checkedOut": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "capacity": capacity,
+        "saturation": round(pool.checkedout() / capacity, 3) if capacity else None,
+    }
+
+
+class DatabaseProbe:
+    """`SELECT 1` with a cached result."""
+
+    def __init__(self, engine, interval: float = READY_PROBE_INTERVAL, timeout: float = READY_PROBE_TIMEOUT):
+        self.engine = engine
+        self.interval = interval
+        self.timeout = timeout
+        self.result = None
+
+    def _probe(self) -> dict:
+        started = time.perf_counter()
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as exc:
+            return {"ok": False, "error": f"{type(exc).__name__}: {exc}", "checkedAt": time.time()}
+        return {"ok": True, "latencyMs": round((time.perf_counter() - started) * 1000, 2), "checkedAt": time.time()}
+
+    async def check(self) -> dict:
+        if self.result is None or time.time() - self.result["checkedAt"] >= self.interval:
+            try:
+                self.result = await asyncio.wait_for(single_flight.do("ready:db", self._probe), self.timeout)
+            except asyncio.TimeoutError:
+                self.result = {"ok": False, "error": f"probe timed out after {self.timeout:g}s", "checkedAt": time.time()}
+        return {**self.result, "ageSeconds": round(time.time() - self.result["checkedAt"], 2)}
+
+    def reset(self):
+        self.result = None
+
+
+async def readiness(probe: DatabaseProbe, admission) -> tuple:
+    """(ready, report) for the `/ready` endpoint."""
+    database = await probe.check()
+    pool = pool_status(probe.engine)
+    load = admission.status()
+    reasons = []
+    if not database["ok"]:
+        reasons.append("database unavailable")
+    if pool["saturation"] is not None and pool["saturation"] >= READY_MAX_SATURATION:
+        reasons.append("connection pool saturated")
+    return not reasons, {
+        "status": "ready" if not reasons else "unavailable",
+        "reasons": reasons,
+        "database": database,
+        "pool": pool,
+        "admission": load,
+    }
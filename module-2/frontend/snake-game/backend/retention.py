@@ -0,0 +1,161 @@
+"""
+Leaderboard retention: compact history nobody will read again.
+
+Every score submission appends a row, but the leaderboard only ever shows top
+scores. The retention policy keeps, for each player and mode, their best
+LEADERBOARD_KEEP_BEST entries plus every entry from the last
+LEADERBOARD_KEEP_DAYS days; everything else is deleted. Setting either to 0
+drops that half of the policy (both 0 disables compaction).
+
+Compaction walks players in chunks of LEADERBOARD_RETENTION_USERS, ranks each
+chunk's entries with ROW_NUMBER() (served by the user_id index), and deletes
+the doomed ids in transactions of at most LEADERBOARD_RETENTION_BATCH rows,
+pausing LEADERBOARD_RETENTION_PAUSE seconds between them so score submissions
+never wait behind a long delete. New rows only push older ones further down a
+player's ranking, so ids chosen for deletion stay deletable.
+
+Run `python retention.py [--dry-run]` from cron, or set
+LEADERBOARD_RETENTION_INTERVAL to run it inside the app every that many
+seconds. Per-player statistics are computed from the remaining rows, and the
+percentile sketches are rebuilt from them: right away for an in-app run, at the
+next app start for a cron run (which drops the sketch checkpoint).
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+
+from database import engine
+from models import LeaderboardEntry, SketchCheckpoint
+
+LEADERBOARD_KEEP_BEST = int(os.getenv("LEADERBOARD_KEEP_BEST", "10"))
+LEADERBOARD_KEEP_DAYS = int(os.getenv("LEADERBOARD_KEEP_DAYS", "30"))
+LEADERBOARD_RETENTION_BATCH = int(os.getenv("LEADERBOARD_RETENTION_BATCH", "1000"))
+LEADERBOARD_RETENTION_USERS = int(os.getenv("LEADERBOARD_RETENTION_USERS", "500"))
+LEADERBOARD_RETENTION_PAUSE = float(os.getenv("LEADERBOARD_RETENTION_PAUSE", "0.01"))
+# Seconds between in-process compactions; 0 leaves it to cron
+LEADERBOARD_RETENTION_INTERVAL = float(os.getenv("LEADERBOARD_RETENTION_INTERVAL", "0"))
+
+
+def expired_ids(conn, user_ids: list, keep_best: int, cutoff: Optional[datetime]) -> list:
+    """Ids of these players' entries that fall outside the policy."""
+    entry = LeaderboardEntry.__table__.c
+    rank = func.row_number().over(
+        partition_by=(entry.user_id, entry.mode),
+        order_by=(entry.score.desc(), entry.id),
+    ).label("rank")
+    ranked = select(entry.id, entry.date, rank).where(entry.user_id.in_(user_ids)).subquery()
+
+    query = select(ranked.c.id).order_by(ranked.c.id)
+    if keep_best:
+        query = query.where(ranked.c.rank > keep_best)
+    if cutoff is not None:
+        query = query.where(ranked.c.date < cutoff)
+    return list(conn.execute(query).scalars())
+
+
+def compact_leaderboard(
+    bind=None,
+    keep_best: int = LEADERBOARD_KEEP_BEST,
+    keep_days: int = LEADERBOARD_KEEP_DAYS,
+    batch_size: int = LEADERBOARD_RETENTION_BATCH,
+    users_per_scan: int = LEADERBOARD_RETENTION_USERS,
+    pause: float = LEADERBOARD_RETENTION_PAUSE,
+    dry_run: bool = False,
+    now: Optional[datetime] = None,
+) -> dict:
+    """Apply the retention policy and report what was (or would be) removed."""
+    if not keep_best and not keep_days:
+        raise ValueError("Retention policy would delete every entry; set keep_best or keep_days")
+    bind = bind or engine
+    table = LeaderboardEntry.__table__
+    cutoff = (now or datetime.utcnow()) - timedelta(days=keep_days) if keep_days else None
+    started = time.perf_counter()
+    report = {"dryRun": dry_run, "keepBest": keep_best, "keepDays": keep_days,
+              "users": 0, "deleted": 0, "batches": 0, "longestBatchMs": 0.0}
+
+    last_user = 0
+    while True:
+        with bind.connect() as conn:
+            user_ids = list(conn.execute(
+                select(table.c.user_id).distinct()
+                .where(table.c.user_id > last_user)
+                .order_by(table.c.user_id)
+                .limit(users_per_scan)
+            ).scalars())
+            if not user_ids:
+                break
+            ids = expired_ids(conn, user_ids, keep_best, cutoff)
+        last_user = user_ids[-1]
+        report["users"] += len(user_ids)
+
+        for offset in range(0, len(ids), batch_size):
+            batch = ids[offset:offset + batch_size]
+            if not dry_run:
+                statement = delete(table).where(table.c.id.in_(batch))
+                if cutoff is not None:
+                    # Lets partitioned tables prune recent months
+                    statement = statement.where(table.c.date < cutoff)
+                batch_started = time.perf_counter()
+                with bind.begin() as conn:
+                    conn.execute(statement)
+                # Longest time a delete transaction held its locks
+                report["longestBatchMs"] = max(
+                    report["longestBatchMs"], round((time.perf_counter() - batch_started) * 1000, 2)
+                )
+                if pause:
+                    time.sleep(pause)
+            report["deleted"] += len(batch)
+            report["batches"] += 1
+
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+async def run_periodically(interval: float = LEADERBOARD_RETENTION_INTERVAL, on_compacted=None):
+    """Compact every `interval` seconds in a worker thread until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            report = await asyncio.to_thread(compact_leaderboard)
+        except Exception as exc:
+            # Keep the schedule alive through a transient database error
+            report = {"error": f"{type(exc).__name__}: {exc}"}
+        if on_compacted is not None:
+            on_compacted(report)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Delete leaderboard entries outside the retention policy")
+    parser.add_argument("--keep-best", type=int, default=LEADERBOARD_KEEP_BEST)
+    parser.add_argument("--keep-days", type=int, default=LEADERBOARD_KEEP_DAYS)
+    parser.add_argument("--batch-size", type=int, default=LEADERBOARD_RETENTION_BATCH)
+    parser.add_argument("--pause", type=float, default=LEADERBOARD_RETENTION_PAUSE)
+    parser.add_argument("--dry-run", action="store_true", help="count what would be deleted")
+    args = parser.parse_args(argv)
+
+    report = compact_leaderboard(
+        keep_best=args.keep_best,
+        keep_days=args.keep_days,
+        batch_size=args.batch_size,
+        pause=args.pause,
+        dry_run=args.dry_run,
+    )
+    if report["deleted"] and not args.dry_run:
+        # The checkpointed sketches still count the deleted rows
+        with engine.begin() as conn:
+            conn.execute(delete(SketchCheckpoint))
+    verb = "Would delete" if args.dry_run else "Deleted"
+    print(
+        f"{verb} {report['deleted']} leaderboard rows for {report['users']} players "
+        f"in {report['batches']} batches ({report['seconds']}s, longest batch {report['longestBatchMs']} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
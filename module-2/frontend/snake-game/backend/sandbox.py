@@ -0,0 +1,432 @@
+"""
+Pooled, sandboxed Python execution for the in-page code editor.
+
+Snippets run in a pool of pre-warmed worker processes instead of a Pyodide
+runtime downloaded by every browser. Off by default (CODE_EXEC_ENABLED).
+
+Limits, per snippet:
+- wall clock: CODE_EXEC_TIMEOUT seconds, enforced by the parent, which kills
+  the worker and starts a fresh one;
+- CPU: RLIMIT_CPU is raised to the worker's used CPU time plus
+  CODE_EXEC_CPU_SECONDS before each run, so a busy loop gets SIGXCPU;
+- memory: RLIMIT_AS of CODE_EXEC_MEMORY_MB per worker;
+- output: CODE_EXEC_MAX_OUTPUT characters, the rest is cut off;
+- no file writes (RLIMIT_FSIZE=0), no new processes (RLIMIT_NPROC=0) and a
+  scratch working directory.
+
+Isolation, per worker: the environment is replaced by a minimal one (no
+DATABASE_URL or tokens), the worker moves into its own network namespace (no
+interfaces but loopback; Python 3.12+) and then drops to the unprivileged
+CODE_EXEC_USER account, which also makes the app's /proc entries unreadable to
+the snippet. Both need the app to start as root with CAP_SYS_ADMIN (which
+Docker's default profile withholds). A worker that misses either one exits
+before running any code and the pool refuses to start, so the service fails
+closed instead of running snippets with the app's user and network.
+`/execute/status` reports what each worker got.
+
+On top of that an audit hook (sys.addaudithook) refuses file opens outside the
+standard library, sockets, subprocesses and ctypes once the worker is ready.
+It is defense in depth only: it is not a security boundary, and code that
+finds a way around it is still confined by the worker's user, namespace and
+rlimits.
+
+Workers are recycled after CODE_EXEC_MAX_RUNS runs (or after any failure) so
+state leaked by one snippet cannot pile up. When every worker is busy,
+requests wait in a queue of at most CODE_EXEC_QUEUE_SIZE; beyond that, or
+after waiting CODE_EXEC_QUEUE_TIMEOUT seconds, run() raises PoolBusy and the
+endpoint answers 503 with Retry-After.
+"""
+
+import asyncio
+import builtins
+import io
+import multiprocessing
+import os
+import signal
+import sys
+import sysconfig
+import tempfile
+import time
+import traceback
+
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import pwd
+    import resource
+except ImportError:  # Windows: no rlimits or users, wall-clock limit only
+    pwd = resource = None
+
+CODE_EXEC_ENABLED = os.getenv("CODE_EXEC_ENABLED", "false").lower() == "true"
+CODE_EXEC_WORKERS = int(os.getenv("CODE_EXEC_WORKERS", "2"))
+CODE_EXEC_TIMEOUT = float(os.getenv("CODE_EXEC_TIMEOUT", "5"))
+CODE_EXEC_CPU_SECONDS = int(os.getenv("CODE_EXEC_CPU_SECONDS", "2"))
+CODE_EXEC_MEMORY_MB = int(os.getenv("CODE_EXEC_MEMORY_MB", "256"))
+CODE_EXEC_MAX_RUNS = int(os.getenv("CODE_EXEC_MAX_RUNS", "100"))
+CODE_EXEC_QUEUE_SIZE = int(os.getenv("CODE_EXEC_QUEUE_SIZE", "32"))
+CODE_EXEC_QUEUE_TIMEOUT = float(os.getenv("CODE_EXEC_QUEUE_TIMEOUT", "10"))
+CODE_EXEC_MAX_OUTPUT = int(os.getenv("CODE_EXEC_MAX_OUTPUT", "65536"))
+CODE_EXEC_MAX_CODE = int(os.getenv("CODE_EXEC_MAX_CODE", "65536"))
+CODE_EXEC_USER = os.getenv("CODE_EXEC_USER", "nobody")
+
+# The whole environment a snippet sees; nothing of the app's is passed on
+WORKER_ENV = {"PATH": "/usr/bin:/bin", "LANG": "C.UTF-8"}
+
+# Audit events refused once a worker is ready (exact names, or prefixes ending in ".")
+BLOCKED_EVENTS = (
+    "socket.", "ctypes.", "subprocess.", "shutil.", "pty.", "os.system", "os.exec", "os.spawn",
+    "os.posix_spawn", "os.fork", "os.forkpty", "os.kill", "os.killpg", "os.listdir", "os.scandir",
+    "os.remove", "os.rename", "os.rmdir", "os.mkdir", "os.symlink", "os.link", "os.chmod",
+    "os.chown", "os.truncate", "os.putenv", "os.unsetenv", "gc.get_objects", "gc.get_referrers",
+    "gc.get_referents",
+)
+# The only files a snippet may open, read-only: the standard library and installed packages.
+# Resolved up front, sysconfig cannot load its data once the worker has dropped root.
+STDLIB_PATHS = tuple({
+    os.path.realpath(path) + os.sep
+    for key, path in sysconfig.get_paths().items() if key in ("stdlib", "platstdlib", "purelib", "platlib")
+})
+# Imported before the first snippet so common imports are free
+PREWARM_MODULES = ("math", "random", "json", "itertools", "functools", "collections", "re", "datetime")
+
+
+class PoolBusy(Exception):
+    """Every worker is busy and the wait queue is full or timed out."""
+
+
+class _LimitedOutput(io.StringIO):
+    def __init__(self, limit: int):
+        super().__init__()
+        self.limit = limit
+        self.truncated = False
+
+    def write(self, text):
+        room = self.limit - self.tell()
+        if room <= 0:
+            self.truncated = True
+            return len(text)
+        if len(text) > room:
+            self.truncated = True
+        return super().write(text[:room])
+
+
+def _audit_guard():
+    """Audit hook refusing BLOCKED_EVENTS and opens other than reading the stdlib."""
+    exact = frozenset(e for e in BLOCKED_EVENTS if not e.endswith("."))
+    prefixes = tuple(e for e in BLOCKED_EVENTS if e.endswith("."))
+    write_flags = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_APPEND | os.O_TRUNC
+
+    def hook(event, args):
+        if event == "open":
+            path, mode, flags = args
+            writes = any(c in mode for c in "wax+") if isinstance(mode, str) else bool(flags & write_flags)
+            if isinstance(path, bytes):
+                path = os.fsdecode(path)
+            if writes or not isinstance(path, str) or not os.path.realpath(path).startswith(STDLIB_PATHS):
+                raise PermissionError("file access is not allowed in the sandbox")
+        elif event in exact or event.startswith(prefixes):
+            raise PermissionError(f"'{event}' is not allowed in the sandbox")
+    return hook
+
+
+def _isolate(user: str) -> dict:
+    """Scrub the environment, leave the network and drop root; returns what applied.
+
+    `network` is whether the worker got its own network namespace, `user`
+    whether it now runs as CODE_EXEC_USER, an existing account other than root.
+    """
+    os.environ.clear()
+    os.environ.update(WORKER_ENV)
+    network = False
+    if hasattr(os, "unshare") and os.getuid() == 0:
+        try:
+            os.unshare(os.CLONE_NEWNET)
+            network = True
+        except OSError:
+            # No CAP_SYS_ADMIN (e.g. Docker's default profile): the host network stays reachable
+            pass
+    dropped = False
+    if pwd is not None and os.getuid() == 0:
+        try:
+            account = pwd.getpwnam(user)
+        except KeyError:
+            account = None
+        if account is not None and account.pw_uid != 0:
+            os.setgroups([])
+            os.setgid(account.pw_gid)
+            os.setuid(account.pw_uid)
+            dropped = True
+    return {"network": network, "user": dropped, "uid": os.getuid() if pwd is not None else None}
+
+
+def _apply_limits(memory_mb: int):
+    if resource is None:
+        return
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+    # Root ignores RLIMIT_NPROC; only reachable with require_isolation=False
+    if os.getuid() != 0:
+        resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+
+def _set_cpu_budget(seconds: int):
+    if resource is None:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _format_error(exc: BaseException) -> str:
+    """Traceback of the snippet's own frames, without the sandbox machinery."""
+    frames = [f for f in traceback.extract_tb(exc.__traceback__) if f.filename != __file__]
+    lines = ["Traceback (most recent call last):\n", *traceback.format_list(frames)] if frames else []
+    return "".join(lines + traceback.format_exception_only(type(exc), exc))
+
+
+def _execute(code: str, max_output: int) -> dict:
+    output = _LimitedOutput(max_output)
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    old_stdout, old_stderr = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = output
+    try:
+        exec(compile(code, "<snippet>", "exec"), namespace)
+        success, error = True, None
+    except MemoryError:
+        success, error = False, "MemoryError: memory limit exceeded"
+    except BaseException as exc:
+        success, error = False, _format_error(exc)
+    finally:
+        sys.stdout, sys.stderr = old_stdout, old_stderr
+    text = output.getvalue()
+    if output.truncated:
+        text += "\n[output truncated]"
+    result = {"success": success, "output": text}
+    if error:
+        result["error"] = error
+    return result
+
+
+def _worker_main(conn, cpu_seconds: int, memory_mb: int, max_output: int, user: str, require_isolation: bool):
+    """Worker process loop: receive a snippet, run it, send the result."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for name in PREWARM_MODULES:
+        __import__(name)
+    isolation = _isolate(user)
+    if require_isolation and not (isolation["network"] and isolation["user"]):
+        conn.send(("refused", isolation))
+        return
+    os.chdir(tempfile.mkdtemp(prefix="sandbox-"))
+    _apply_limits(memory_mb)
+    sys.addaudithook(_audit_guard())
+    conn.send(("ready", isolation))
+    while True:
+        code = conn.recv()
+        if code is None:
+            return
+        _set_cpu_budget(cpu_seconds)
+        conn.send(_execute(code, max_output))
+
+
+class _Worker:
+    def __init__(self, ctx, cpu_seconds, memory_mb, max_output, user, require_isolation):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child, cpu_seconds, memory_mb, max_output, user, require_isolation),
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+        self.runs = 0
+        self.isolation = None
+
+    def wait_ready(self, timeout: float = 30):
+        message = self.conn.recv() if self.conn.poll(timeout) else None
+        if isinstance(message, tuple) and message[0] == "refused":
+            self.kill()
+            raise RuntimeError(
+                f"sandbox worker could not be isolated ({message[1]}): start the app as root on "
+                "Python 3.12+ with CAP_SYS_ADMIN and an existing unprivileged CODE_EXEC_USER"
+            )
+        if not isinstance(message, tuple) or message[0] != "ready":
+            self.kill()
+            raise RuntimeError("sandbox worker failed to start")
+        self.isolation = message[1]
+
+    def run(self, code: str, timeout: float) -> dict:
+        """Blocking: send one snippet and wait up to `timeout` for its result."""
+        self.runs += 1
+        self.conn.send(code)
+        try:
+            if self.conn.poll(timeout):
+                return self.conn.recv()
+        except EOFError:
+            pass
+        self.kill()
+        if self.process.exitcode == -signal.SIGXCPU:
+            return {"success": False, "output": "", "error": "CPU time limit exceeded", "killed": True}
+        if self.process.exitcode is not None and self.process.exitcode != -signal.SIGKILL:
+            return {"success": False, "output": "", "error": f"worker exited ({self.process.exitcode})", "killed": True}
+        return {"success": False, "output": "", "error": f"Python execution timeout ({timeout:g}s)", "killed": True}
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(1)
+        self.kill()
+
+
+def _context():
+    """Never fork the app process itself, with its threads and DB connections.
+
+    A forkserver that has only imported this module forks cheap, clean
+    workers; platforms without it spawn fresh interpreters.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload([__name__])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+class ExecutionPool:
+    """Pre-warmed worker processes shared by all requests in this app process."""
+
+    def __init__(
+        self,
+        workers: int = CODE_EXEC_WORKERS,
+        timeout: float = CODE_EXEC_TIMEOUT,
+        cpu_seconds: int = CODE_EXEC_CPU_SECONDS,
+        memory_mb: int = CODE_EXEC_MEMORY_MB,
+        max_runs: int = CODE_EXEC_MAX_RUNS,
+        queue_size: int = CODE_EXEC_QUEUE_SIZE,
+        queue_timeout: float = CODE_EXEC_QUEUE_TIMEOUT,
+        max_output: int = CODE_EXEC_MAX_OUTPUT,
+        user: str = CODE_EXEC_USER,
+        require_isolation: bool = True,
+    ):
+        """`require_isolation=False` runs unisolated workers; for tests and benchmarks only."""
+        self.size = workers
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_runs = max_runs
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.max_output = max_output
+        self.user = user
+        self.require_isolation = require_isolation
+        self.isolation = None
+        self._ctx = _context()
+        self._idle = None
+        self._start_lock = None
+        self._waiting = 0
+        self.stats = {"runs": 0, "rejected": 0, "recycled": 0, "killed": 0}
+
+    def _new_worker(self) -> _Worker:
+        worker = _Worker(
+            self._ctx, self.cpu_seconds, self.memory_mb, self.max_output, self.user, self.require_isolation,
+        )
+        worker.wait_ready()
+        self.isolation = worker.isolation
+        return worker
+
+    async def start(self):
+        """Start and warm every worker; later calls are no-ops."""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._idle is not None:
+                return
+            idle = asyncio.Queue()
+            workers = await asyncio.gather(
+                *(run_in_threadpool(self._new_worker) for _ in range(self.size)), return_exceptions=True,
+            )
+            failed = [w for w in workers if isinstance(w, BaseException)]
+            if failed:
+                for worker in workers:
+                    if not isinstance(worker, BaseException):
+                        await run_in_threadpool(worker.stop)
+                raise failed[0]
+            for worker in workers:
+                idle.put_nowait(worker)
+            self._idle = idle
+
+    async def _acquire(self) -> _Worker:
+        if not self._idle.empty():
+            return self._idle.get_nowait()
+        if self._waiting >= self.queue_size:
+            self.stats["rejected"] += 1
+            raise PoolBusy()
+        self._waiting += 1
+        try:
+            return await asyncio.wait_for(self._idle.get(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.stats["rejected"] += 1
+            raise PoolBusy()
+        finally:
+            self._waiting -= 1
+
+    async def _release(self, worker: _Worker, result: dict):
+        if result.pop("killed", False) or not worker.alive():
+            self.stats["killed"] += 1
+            worker.kill()
+            worker = await run_in_threadpool(self._new_worker)
+        elif worker.runs >= self.max_runs:
+            self.stats["recycled"] += 1
+            await run_in_threadpool(worker.stop)
+            worker = await run_in_threadpool(self._new_worker)
+        self._idle.put_nowait(worker)
+
+    async def run(self, code: str) -> dict:
+        """Run one snippet; returns {success, output, error?, durationMs}."""
+        await self.start()
+        worker = await self._acquire()
+        started = time.perf_counter()
+        result = {"success": False, "output": "", "error": "sandbox failure", "killed": True}
+        try:
+            result = await run_in_threadpool(worker.run, code, self.timeout)
+        finally:
+            # Shielded: the worker must go back to the pool even if the client went away
+            await asyncio.shield(self._release(worker, dict(result)))
+        self.stats["runs"] += 1
+        result.pop("killed", None)
+        result["durationMs"] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    def status(self) -> dict:
+        return {
+            "workers": self.size,
+            "idle": self._idle.qsize() if self._idle is not None else 0,
+            "waiting": self._waiting,
+            "queueSize": self.queue_size,
+            "isolation": self.isolation,
+            **self.stats,
+        }
+
+    async def close(self):
+        if self._idle is None:
+            return
+        while not self._idle.empty():
+            await run_in_threadpool(self._idle.get_nowait().stop)
+        self._idle = None
+
+
+execution_pool = ExecutionPool()
@@ -0,0 +1,106 @@
+"""
+Single-flight coalescing for identical concurrent reads.
+
+When many clients ask for the same thing at once (everyone refreshing the
+leaderboard when a tournament ends), only the first request runs the query;
+requests for the same key that arrive while it is in flight wait for it and
+share its serialized result. Nothing is cached once the query finishes, so a
+result is never older than the query that produced it.
+
+The query runs as its own task, so a leader whose client disconnects does not
+cancel the work the followers are waiting on; it must therefore open its own
+database session rather than borrow the leader's request-scoped one. On
+PostgreSQL the task runs the query in the threadpool, keeping the event loop
+free to accept the requests being coalesced. SQLite runs on one shared
+connection (StaticPool) that must not be used from two threads at once, so
+there the query runs on the event loop like the routes' own queries and only
+requests that arrive before it starts are coalesced.
+
+Per-key metrics (calls, executions, coalesced callers) are kept for the most
+recently used SINGLEFLIGHT_METRICS_KEYS keys and served at /internal/singleflight.
+Set SINGLEFLIGHT_ENABLED=false to run every read independently.
+"""
+
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Callable
+
+from starlette.concurrency import run_in_threadpool
+
+from database import is_sqlite
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+SINGLEFLIGHT_METRICS_KEYS = int(os.getenv("SINGLEFLIGHT_METRICS_KEYS", "1000"))
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution."""
+
+    def __init__(
+        self,
+        enabled: bool = SINGLEFLIGHT_ENABLED,
+        metrics_keys: int = SINGLEFLIGHT_METRICS_KEYS,
+        # SQLite's single StaticPool connection must stay on the event loop, so
+        # there a query blocks the loop while it runs: only callers already
+        # waiting when it starts are coalesced, later ones start a new flight.
+        threaded: bool = not is_sqlite,
+    ):
+        self.enabled = enabled
+        self.metrics_keys = metrics_keys
+        self.threaded = threaded
+        self._inflight = {}
+        self._metrics = OrderedDict()
+
+    def _record(self, key: str, executed: bool):
+        metrics = self._metrics.pop(key, None) or {"calls": 0, "executions": 0, "coalesced": 0}
+        metrics["calls"] += 1
+        metrics["executions" if executed else "coalesced"] += 1
+        self._metrics[key] = metrics
+        while len(self._metrics) > self.metrics_keys:
+            self._metrics.popitem(last=False)
+
+    async def _run(self, fn: Callable):
+        if self.threaded:
+            return await run_in_threadpool(fn)
+        return fn()
+
+    async def do(self, key: str, fn: Callable):
+        """Return fn()'s result, sharing it with concurrent callers of the same key.
+
+        `fn` is synchronous, may run in the threadpool and should return
+        plain, already-serialized data since every caller gets the same object.
+        """
+        if not self.enabled:
+            self._record(key, executed=True)
+            return await self._run(fn)
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(fn))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self._record(key, executed=True)
+        else:
+            self._record(key, executed=False)
+        # Shielded so one cancelled caller does not cancel the shared task
+        return await asyncio.shield(task)
+
+    def metrics(self) -> dict:
+        keys = dict(self._metrics)
+        calls = sum(m["calls"] for m in keys.values())
+        coalesced = sum(m["coalesced"] for m in keys.values())
+        return {
+            "enabled": self.enabled,
+            "inflight": len(self._inflight),
+            "calls": calls,
+            "coalesced": coalesced,
+            "coalescedRatio": round(coalesced / calls, 4) if calls else 0.0,
+            "keys": keys,
+        }
+
+    def reset(self):
+        self._metrics.clear()
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,222 @@
+"""
+Approximate score percentiles with KLL quantile sketches.
+
+One sketch per game mode answers "what fraction of scores is below X" in
+microseconds without counting over the leaderboard table. Sketches are built
+from the leaderboard when the app starts (restored from the
+`quantile_sketches` checkpoint table when there is one, so a restart only
+replays entries added since), then caught up with new entries on every score
+submission.
+
+Catch-up follows the entry id. With concurrent writers (PostgreSQL) a
+transaction can commit an id below one already folded in; ids skipped over are
+re-checked on later catch-ups for SKETCH_GAP_SECONDS, so such late rows are
+still counted. A row committed later than that, or skipped just before a
+restart, is missed until the sketches are rebuilt.
+
+Rows deleted by leaderboard retention would otherwise stay counted: an in-app
+compaction calls `rebuild()`, and `retention.py` run from cron drops the
+checkpoint, so the sketches are rebuilt from the remaining rows (at the next
+score submission, or at the next start for a cron run).
+
+Error bounds: with the default k=200 the normalized rank error is at most about
+1.65% with 99% probability (Karnin, Lang & Liberty, 2016), i.e. a reported
+percentile of 97.0 means the exact value lies within roughly 95.35-98.65.
+Sketch size stays around 3k stored values per mode regardless of row count.
+"""
+
+import json
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from models import LeaderboardEntry, SketchCheckpoint
+
+SKETCH_K = int(os.getenv("SKETCH_K", "200"))
+SKETCH_CHECKPOINT_INTERVAL = float(os.getenv("SKETCH_CHECKPOINT_INTERVAL", "300"))
+SKETCH_GAP_SECONDS = float(os.getenv("SKETCH_GAP_SECONDS", "60"))
+# Skipped ids remembered at once; only the highest (most recent) are kept
+MAX_GAPS = 1000
+
+
+class KLLSketch:
+    """KLL streaming quantile sketch over numeric values."""
+
+    def __init__(self, k: int = SKETCH_K, c: float = 2.0 / 3.0, seed: Optional[int] = None):
+        self.k = k
+        self.c = c
+        self.n = 0
+        self.compactors = []
+        self._size = 0
+        self._max_size = 0
+        self._rng = random.Random(seed)
+        self._grow()
+
+    def _capacity(self, height: int) -> int:
+        depth = len(self.compactors) - height - 1
+        return int(math.ceil(self.c ** depth * self.k)) + 1
+
+    def _grow(self):
+        self.compactors.append([])
+        self._max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def update(self, value):
+        self.compactors[0].append(value)
+        self._size += 1
+        self.n += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def _compress(self):
+        for height, items in enumerate(self.compactors):
+            if len(items) < self._capacity(height):
+                continue
+            if height + 1 >= len(self.compactors):
+                self._grow()
+            items.sort()
+            # Odd item out stays behind; every other item is promoted with double weight
+            kept = [items.pop()] if len(items) % 2 else []
+            offset = self._rng.randint(0, 1)
+            self.compactors[height + 1].extend(items[offset::2])
+            self.compactors[height] = kept
+            self._size = sum(len(c) for c in self.compactors)
+            return
+
+    def rank(self, value) -> int:
+        """Approximate number of values strictly below `value`."""
+        return sum(
+            (1 << height) * sum(1 for item in items if item < value)
+            for height, items in enumerate(self.compactors)
+        )
+
+    def percentile(self, value) -> float:
+        """Approximate percentage of values strictly below `value`."""
+        if not self.n:
+            return 0.0
+        return round(100.0 * min(self.rank(value), self.n) / self.n, 2)
+
+    def to_dict(self) -> dict:
+        return {"k": self.k, "c": self.c, "n": self.n, "compactors": self.compactors}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "KLLSketch":
+        sketch = cls(k=data["k"], c=data["c"])
+        sketch.n = data["n"]
+        sketch.compactors = [list(items) for items in data["compactors"]]
+        sketch._max_size = sum(sketch._capacity(h) for h in range(len(sketch.compactors)))
+        sketch._size = sum(len(c) for c in sketch.compactors)
+        return sketch
+
+
+class PercentileTracker:
+    """Per-mode sketches kept in sync with the leaderboard table."""
+
+    def __init__(
+        self,
+        k: int = SKETCH_K,
+        checkpoint_interval: float = SKETCH_CHECKPOINT_INTERVAL,
+        gap_seconds: float = SKETCH_GAP_SECONDS,
+    ):
+        self.k = k
+        self.checkpoint_interval = checkpoint_interval
+        self.gap_seconds = gap_seconds
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.sketches = {}
+        self.last_entry_id = 0
+        # Skipped id -> when it was skipped; may still be committed by an open transaction
+        self.gaps = {}
+        self.loaded = False
+        self.last_checkpoint = time.monotonic()
+
+    def rebuild(self):
+        """Forget the sketches; the next catch-up replays the whole table, not the checkpoint."""
+        with self._lock:
+            self.reset()
+            self.loaded = True
+
+    def _sketch(self, mode: str) -> KLLSketch:
+        if mode not in self.sketches:
+            self.sketches[mode] = KLLSketch(self.k)
+        return self.sketches[mode]
+
+    def _load(self, db: Session):
+        """Restore checkpointed sketches; catch-up replays everything newer."""
+        checkpoints = db.query(SketchCheckpoint).all()
+        if checkpoints:
+            self.sketches = {
+                cp.mode: KLLSketch.from_dict(json.loads(cp.payload)) for cp in checkpoints
+            }
+            self.last_entry_id = min(cp.last_entry_id for cp in checkpoints)
+        self.loaded = True
+
+    def _skip(self, first: int, last: int, now: float):
+        """Remember ids first..last-1 as gaps, keeping about the newest MAX_GAPS."""
+        for entry_id in range(max(first, last - MAX_GAPS), last):
+            self.gaps[entry_id] = now
+        if len(self.gaps) > 2 * MAX_GAPS:
+            self.gaps = dict(sorted(self.gaps.items())[-MAX_GAPS:])
+
+    def catch_up(self, db: Session) -> int:
+        """Fold leaderboard entries not seen yet into the sketches."""
+        with self._lock:
+            if not self.loaded:
+                self._load(db)
+            now = time.monotonic()
+            self.gaps = {entry_id: at for entry_id, at in self.gaps.items() if now - at < self.gap_seconds}
+            unseen = LeaderboardEntry.id > self.last_entry_id
+            if self.gaps:
+                unseen = or_(unseen, LeaderboardEntry.id.in_(list(self.gaps)))
+            rows = (
+                db.query(LeaderboardEntry.id, LeaderboardEntry.mode, LeaderboardEntry.score)
+                .filter(unseen)
+                .order_by(LeaderboardEntry.id)
+                .yield_per(10_000)
+            )
+            count = 0
+            for entry_id, mode, score in rows:
+                if entry_id > self.last_entry_id:
+                    self._skip(self.last_entry_id + 1, entry_id, now)
+                    self.last_entry_id = entry_id
+                else:
+                    del self.gaps[entry_id]
+                self._sketch(mode).update(score)
+                count += 1
+            return count
+
+    def percentile(self, db: Session, mode: str, score: int) -> float:
+        self.catch_up(db)
+        sketch = self.sketches.get(mode)
+        return sketch.percentile(score) if sketch else 0.0
+
+    def checkpoint(self, db: Session):
+        """Persist every sketch together with the last entry id it covers."""
+        with self._lock:
+            now = datetime.utcnow()
+            for mode, sketch in self.sketches.items():
+                db.merge(SketchCheckpoint(
+                    mode=mode,
+                    payload=json.dumps(sketch.to_dict()),
+                    last_entry_id=self.last_entry_id,
+                    updated_at=now,
+                ))
+            db.commit()
+            self.last_checkpoint = time.monotonic()
+
+    def maybe_checkpoint(self, db: Session) -> bool:
+        if time.monotonic() - self.last_checkpoint < self.checkpoint_interval:
+            return False
+        self.checkpoint(db)
+        return True
+
+
+percentile_tracker = PercentileTracker()
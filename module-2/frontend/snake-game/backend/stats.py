@@ -0,0 +1,194 @@
+"""
+Player and per-mode score statistics.
+
+All aggregation runs in SQL (COUNT/AVG/MAX and GROUP BY buckets) so only a
+handful of rows ever reach Python, regardless of leaderboard size. Results are
+cached per user and per mode; submitting a score invalidates the affected
+entries and everything else expires after STATS_CACHE_TTL seconds. At most
+STATS_CACHE_MAX_ENTRIES views are kept, least recently used evicted first.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import LeaderboardEntry, Game
+from partitions import partition_filter
+
+HISTOGRAM_BUCKET = int(os.getenv("STATS_HISTOGRAM_BUCKET", "50"))
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "300"))
+STATS_CACHE_MAX_ENTRIES = int(os.getenv("STATS_CACHE_MAX_ENTRIES", "10000"))
+
+
+class StatsCache:
+    """Thread-safe TTL and LRU cache keyed by ("user", id, mode) or ("mode", mode)."""
+
+    def __init__(self, ttl: float, max_entries: int = STATS_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                return None
+            expires, value = hit
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int, mode: str):
+        """Drop every cached view that a new score by `user_id` in `mode` changes."""
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] == "user" and key[1] == user_id:
+                    del self._entries[key]
+                elif key[0] == "mode" and key[1] in (mode, "all"):
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+stats_cache = StatsCache(STATS_CACHE_TTL)
+
+
+def _score_filters(mode: Optional[str]) -> list:
+    filters = partition_filter(LeaderboardEntry.date)
+    if mode and mode != "all":
+        filters.append(LeaderboardEntry.mode == mode)
+    return filters
+
+
+def _duration_seconds(db: Session):
+    if db.get_bind().dialect.name == "sqlite":
+        return (func.julianday(Game.end_time) - func.julianday(Game.start_time)) * 86400
+    return func.extract("epoch", Game.end_time - Game.start_time)
+
+
+def score_histogram(db: Session, filters: list, width: int = HISTOGRAM_BUCKET) -> list:
+    bucket = (LeaderboardEntry.score // width).label("bucket")
+    rows = (
+        db.query(bucket, func.count())
+        .filter(*filters)
+        .group_by(bucket)
+        .order_by(bucket)
+        .all()
+    )
+    return [{"from": b * width, "to": (b + 1) * width, "count": n} for b, n in rows]
+
+
+def score_percentile(db: Session, score: int, filters: list, total: int) -> float:
+    """Percentage of entries scoring strictly below `score`."""
+    if not total:
+        return 0.0
+    below = (
+        db.query(func.count())
+        .select_from(LeaderboardEntry)
+        .filter(LeaderboardEntry.score < score, *filters)
+        .scalar()
+    )
+    return round(100.0 * below / total, 2)
+
+
+def score_quantile(db: Session, filters: list, fraction: float, total: int) -> Optional[int]:
+    """Score at `fraction` of the ascending distribution, using the score index."""
+    if not total:
+        return None
+    offset = int(fraction * (total - 1))
+    return (
+        db.query(LeaderboardEntry.score)
+        .filter(*filters)
+        .order_by(LeaderboardEntry.score)
+        .offset(offset)
+        .limit(1)
+        .scalar()
+    )
+
+
+def _summary(db: Session, filters: list):
+    """Count, average and best score plus the number of days the entries span.
+
+    Each query is answerable from the (mode, score) / (mode, date) indexes.
+    """
+    count, average, best = (
+        db.query(func.count(), func.avg(LeaderboardEntry.score), func.max(LeaderboardEntry.score))
+        .select_from(LeaderboardEntry)
+        .filter(*filters)
+        .one()
+    )
+    first = db.query(func.min(LeaderboardEntry.date)).filter(*filters).scalar()
+    last = db.query(func.max(LeaderboardEntry.date)).filter(*filters).scalar()
+    days = (last.date() - first.date()).days + 1 if first and last else 0
+    return count, average, best, days
+
+
+def user_stats(db: Session, user_id: int, mode: Optional[str] = "all") -> dict:
+    key = ("user", user_id, mode)
+    cached = stats_cache.get(key)
+    if cached is not None:
+        return cached
+
+    mode_filters = _score_filters(mode)
+    user_filters = mode_filters + [LeaderboardEntry.user_id == user_id]
+    count, average, best, days = _summary(db, user_filters)
+
+    game_filters = [Game.user_id == user_id, Game.end_time.isnot(None)]
+    game_filters += partition_filter(Game.start_time)
+    if mode and mode != "all":
+        game_filters.append(Game.mode == mode)
+    average_duration = db.query(func.avg(_duration_seconds(db))).filter(*game_filters).scalar()
+
+    total = db.query(func.count()).select_from(LeaderboardEntry).filter(*mode_filters).scalar()
+    result = {
+        "userId": user_id,
+        "mode": mode,
+        "gamesPlayed": count,
+        "averageScore": round(float(average), 2) if average is not None else 0.0,
+        "highScore": best or 0,
+        "percentile": score_percentile(db, best, mode_filters, total) if count else 0.0,
+        "gamesPerDay": round(count / days, 2) if days else 0.0,
+        "averageGameDuration": round(float(average_duration), 2) if average_duration is not None else None,
+        "histogram": score_histogram(db, user_filters),
+    }
+    stats_cache.set(key, result)
+    return result
+
+
+def mode_stats(db: Session, mode: str) -> dict:
+    key = ("mode", mode)
+    cached = stats_cache.get(key)
+    if cached is not None:
+        return cached
+
+    filters = _score_filters(mode)
+    count, average, best, days = _summary(db, filters)
+    result = {
+        "mode": mode,
+        "entries": count,
+        "averageScore": round(float(average), 2) if average is not None else 0.0,
+        "highScore": best or 0,
+        "median": score_quantile(db, filters, 0.5, count),
+        "p90": score_quantile(db, filters, 0.9, count),
+        "gamesPerDay": round(count / days, 2) if days else 0.0,
+        "histogram": score_histogram(db, filters),
+    }
+    stats_cache.set(key, result)
+    return result
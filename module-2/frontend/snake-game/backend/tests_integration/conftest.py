@@ -1,60 +1,150 @@
 """
 Conftest for pytest: sets up test database fixtures.
-Uses SQLite in-memory database for fast, isolated tests.
+
+The schema is built once per session (per xdist worker) and every test gets a
+fresh copy of it:
+- SQLite (default): the in-memory template is cloned with the backup API.
+- PostgreSQL (TEST_DATABASE_URL): each worker gets its own database and every
+  test runs inside a transaction that is rolled back afterwards; the app's
+  commits become SAVEPOINT releases. DATABASE_URL points at the same worker
+  database, so code using the app's engine directly runs against PostgreSQL
+  too (outside the rolled-back transaction).
+
+Run in parallel with `pytest -n auto` (pytest-xdist).
 """
 
 import pytest
 import os
-from sqlalchemy import create_engine, event
+import sqlite3
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 from fastapi.testclient import TestClient
 
-# Import before app imports to set test DB
-os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite:///:memory:")
+WORKER_ID = os.getenv("PYTEST_XDIST_WORKER", "main")
+
+
+def _postgres_worker_url():
+    """This worker's own database on the TEST_DATABASE_URL server."""
+    url = make_url(TEST_DATABASE_URL)
+    return url.set(database=f"{url.database}_{WORKER_ID}")
+
+
+# Import before app imports to set test DB: code that uses the app's own
+# engine (readiness probe, retention, ingest) must hit the test database too
+if TEST_DATABASE_URL.startswith("sqlite"):
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+else:
+    os.environ["DATABASE_URL"] = _postgres_worker_url().render_as_string(hide_password=False)
 
 from models import Base, User, LeaderboardEntry, Game
-from main import app, get_db
+import main
+from main import app, get_db, database_probe, event_batcher
+from stats import stats_cache
+from sketches import percentile_tracker
+from singleflight import single_flight
+from game_registry import game_registry
+from admission import admission
 
 
-@pytest.fixture(scope="function")
-def test_db():
-    """Create and drop in-memory SQLite database for each test."""
-    # Create engine with connection pooling disabled and thread check off
-    engine = create_engine(
-        "sqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
-    
-    # Enable foreign keys for SQLite
-    @event.listens_for(engine, "connect")
-    def set_sqlite_pragma(dbapi_conn, connection_record):
-        cursor = dbapi_conn.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
-        cursor.close()
-    
+def _sqlite_template():
+    """Build the schema once in an in-memory database used as a clone source."""
+    template = sqlite3.connect(":memory:", check_same_thread=False)
+    engine = create_engine("sqlite://", creator=lambda: template, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return template
+
+
+def _sqlite_clone(template):
+    """Create an engine bound to a private copy of the template database."""
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    template.backup(conn)
+    # Enable foreign keys for SQLite (per connection, so not copied by backup)
+    conn.execute("PRAGMA foreign_keys=ON")
+    return create_engine("sqlite://", creator=lambda: conn, poolclass=StaticPool)
+
+
+def _postgres_worker_engine():
+    """Create (or recreate) this worker's database and build the schema in it."""
+    url = _postgres_worker_url()
+    name = url.database
+    admin = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT", poolclass=NullPool)
+    with admin.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+        conn.execute(text(f'CREATE DATABASE "{name}"'))
+    admin.dispose()
+
+    engine = create_engine(url, poolclass=StaticPool)
     Base.metadata.create_all(bind=engine)
-    
-    TestingSessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
-    
+    return engine
+
+
+@pytest.fixture(scope="session")
+def db_template():
+    """Schema built once per session (per worker when running under xdist)."""
+    if TEST_DATABASE_URL.startswith("sqlite"):
+        template = _sqlite_template()
+        yield template
+        template.close()
+    else:
+        engine = _postgres_worker_engine()
+        yield engine
+        engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def test_db(db_template):
+    """Give each test an isolated copy of the session's schema."""
+    if TEST_DATABASE_URL.startswith("sqlite"):
+        engine = _sqlite_clone(db_template)
+        connection = engine.connect()
+        transaction = None
+        session_options = {}
+    else:
+        engine = db_template
+        connection = engine.connect()
+        transaction = connection.begin()
+        session_options = {"join_transaction_mode": "create_savepoint"}
+
+    TestingSessionLocal = sessionmaker(bind=connection, expire_on_commit=False, **session_options)
+
     def override_get_db():
         db = TestingSessionLocal()
         try:
             yield db
         finally:
             db.close()
-    
+
     app.dependency_overrides[get_db] = override_get_db
-    
+    stats_cache.clear()
+    percentile_tracker.reset()
+    single_flight.reset()
+    game_registry.clear()
+    admission.reset()
+    database_probe.reset()
+    event_batcher.reset()
+
     yield
-    
+
     # Cleanup
-    Base.metadata.drop_all(bind=engine)
     app.dependency_overrides.clear()
+    if transaction is not None:
+        transaction.rollback()
+    connection.close()
+    if engine is not db_template:
+        engine.dispose()
 
 
 @pytest.fixture(scope="function")
 def client(test_db):
     """Provide a FastAPI test client with test database."""
     return TestClient(app)
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    """Set an admin token and return the headers that carry it."""
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    return {"X-Admin-Token": "secret"}
@@ -0,0 +1,122 @@
+"""
+Tests for admission control and the readiness probe.
+"""
+
+import asyncio
+
+from admission import HIGH, LOW, NORMAL, AdmissionController, admission, route_priority
+from main import database_probe
+
+
+def test_route_priorities():
+    """Test that writes outrank reads and probes bypass the limiter."""
+    assert route_priority("POST", "/leaderboard") == HIGH
+    assert route_priority("POST", "/games/12/end") == HIGH
+    assert route_priority("GET", "/leaderboard") == LOW
+    assert route_priority("GET", "/stats/walls") == LOW
+    assert route_priority("GET", "/games/12") == NORMAL
+    assert route_priority("GET", "/ready") is None
+    assert route_priority("GET", "/js/app.js") is None
+
+
+def test_low_priority_is_capped_below_the_limit():
+    """Test that reads cannot take the slots reserved for writes."""
+    controller = AdmissionController(limit=4, queue_size=0, queue_timeout=0.01, low_share=0.5)
+
+    async def run():
+        low = [await controller.acquire(LOW) for _ in range(3)]
+        high = [await controller.acquire(HIGH) for _ in range(3)]
+        return low, high
+
+    low, high = asyncio.run(run())
+    assert low == [True, True, False]
+    assert high == [True, True, False]
+    assert controller.status()["byPriority"]["low"]["shed"] == 1
+
+
+def test_freed_slot_goes_to_highest_priority_waiter():
+    """Test that waiting writes are admitted before earlier waiting reads."""
+    controller = AdmissionController(limit=1, queue_size=4, queue_timeout=1)
+    order = []
+
+    async def request(priority, name):
+        if await controller.acquire(priority):
+            order.append(name)
+            await asyncio.sleep(0.01)
+            controller.release()
+
+    async def run():
+        await controller.acquire(HIGH)
+        waiters = [asyncio.create_task(request(p, n)) for p, n in ((LOW, "read"), (HIGH, "write"))]
+        await asyncio.sleep(0.01)
+        controller.release()
+        await asyncio.gather(*waiters)
+
+    asyncio.run(run())
+    assert order == ["write", "read"]
+
+
+def test_full_queue_sheds_lowest_priority_waiter():
+    """Test that a write arriving at a full queue displaces a queued read."""
+    controller = AdmissionController(limit=1, queue_size=1, queue_timeout=1)
+
+    async def run():
+        await controller.acquire(HIGH)
+        read = asyncio.create_task(controller.acquire(LOW))
+        await asyncio.sleep(0)
+        write = asyncio.create_task(controller.acquire(HIGH))
+        assert await read is False
+        controller.release()
+        return await write
+
+    assert asyncio.run(run()) is True
+    assert controller.status()["active"] == 1
+
+
+def test_over_capacity_returns_503_with_retry_after(client, monkeypatch):
+    """Test that shed requests fail fast while writes still get through."""
+    monkeypatch.setattr(admission, "enabled", True)
+    monkeypatch.setattr(admission, "queue_timeout", 0.01)
+    monkeypatch.setattr(admission, "active", admission.capacity[LOW])
+
+    response = client.get("/leaderboard")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert client.post("/leaderboard", json={"score": 10, "mode": "walls"}).status_code == 201
+    assert admission.active == admission.capacity[LOW]
+
+
+def test_ready_reports_database_pool_and_admission(client):
+    """Test the readiness report and its cached database probe."""
+    response = client.get("/ready")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ready"
+    assert data["database"]["ok"] is True
+    assert "saturation" in data["pool"]
+    assert data["admission"]["limit"] == admission.limit
+
+    checked_at = data["database"]["checkedAt"]
+    assert client.get("/ready").json()["database"]["checkedAt"] == checked_at
+
+
+def test_ready_fails_when_database_is_down(client, monkeypatch):
+    """Test that a failing probe makes the instance unready."""
+    monkeypatch.setattr(database_probe, "_probe", lambda: {"ok": False, "error": "down", "checkedAt": 0})
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert response.json()["reasons"] == ["database unavailable"]
+    assert client.get("/health").status_code == 200
+
+
+def test_ready_while_admission_is_saturated(client, monkeypatch):
+    """Test that a full admission limit is reported but keeps the instance ready."""
+    assert admission.enabled is False
+    monkeypatch.setattr(admission, "enabled", True)
+    monkeypatch.setattr(admission, "active", admission.limit)
+
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["admission"]["saturation"] == 1.0
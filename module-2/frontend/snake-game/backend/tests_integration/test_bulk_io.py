@@ -0,0 +1,197 @@
+"""
+Integration tests for bulk export endpoints and the bulk importer.
+Uses SQLite in-memory database.
+"""
+
+import csv
+import io
+import json
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.pool import StaticPool
+
+from bulk_io import import_records, read_records
+from models import Base, User, LeaderboardEntry, Game
+
+
+def test_export_leaderboard_ndjson(client):
+    """Test streaming the leaderboard as NDJSON."""
+    client.post("/leaderboard", json={"score": 100, "mode": "walls"})
+    client.post("/leaderboard", json={"score": 300, "mode": "pass-through"})
+
+    response = client.get("/leaderboard/export?mode=walls")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows
+    assert all(row["mode"] == "walls" for row in rows)
+    assert 100 in [row["score"] for row in rows]
+    assert {"id", "user_id", "username", "score", "mode", "date"} <= set(rows[0])
+
+
+def test_export_leaderboard_csv(client):
+    """Test streaming the leaderboard as CSV with a header row."""
+    client.post("/leaderboard", json={"score": 120, "mode": "walls"})
+
+    response = client.get("/leaderboard/export?format=csv")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert "120" in [row["score"] for row in rows]
+
+
+def test_export_invalid_format(client):
+    """Test that unknown export formats are rejected."""
+    response = client.get("/leaderboard/export?format=xml")
+    assert response.status_code == 400
+
+
+def test_export_user_games(client):
+    """Test exporting a user's game history."""
+    game_id = client.post("/games", json={"mode": "walls"}).json()["gameSession"]["id"]
+    client.post(f"/games/{game_id}/end", json={"score": 42})
+    user_id = client.post("/games", json={"mode": "walls"}).json()["gameSession"]["userId"]
+
+    response = client.get(f"/users/{user_id}/games/export")
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 2
+    assert rows[0]["score"] == 42
+
+    response = client.get("/users/999/games/export")
+    assert response.status_code == 404
+
+
+def test_import_records_round_trip(tmp_path):
+    """Test bulk-loading NDJSON and CSV files with batched inserts."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), {"username": "p1", "email": "p1@test.com", "password": "x"})
+
+    ndjson = tmp_path / "scores.ndjson"
+    ndjson.write_text("\n".join(
+        json.dumps({"user_id": 1, "username": "p1", "score": i, "mode": "walls", "date": "2026-01-02T03:04:05"})
+        for i in range(25)
+    ))
+    report = import_records(LeaderboardEntry, read_records(str(ndjson)), bind=engine, batch_size=10)
+    assert report["rows"] == 25
+    assert report["rowsPerSecond"] > 0
+
+    games = tmp_path / "games.csv"
+    games.write_text(
+        "user_id,username,mode,start_time,end_time,score,is_active\n"
+        "1,p1,walls,2026-01-02T03:04:05,,,1\n"
+        "1,p1,walls,2026-01-02T03:04:05,2026-01-02T03:05:00,80,0\n"
+    )
+    assert import_records(Game, read_records(str(games)), bind=engine)["rows"] == 2
+
+    with engine.connect() as conn:
+        assert conn.scalar(select(func.sum(LeaderboardEntry.score))) == sum(range(25))
+        assert conn.scalar(select(func.count()).where(Game.end_time.is_(None))) == 1
+
+
+def test_import_records_with_differing_keys(tmp_path):
+    """Test that records with missing, extra or reordered keys land in the right columns."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), {"username": "p1", "email": "p1@test.com", "password": "x"})
+
+    ndjson = tmp_path / "mixed.ndjson"
+    ndjson.write_text("\n".join(json.dumps(record) for record in [
+        {"user_id": 1, "username": "p1", "score": 10, "mode": "walls"},
+        {"mode": "pass-through", "score": 20, "username": "p1", "user_id": 1, "date": "2026-01-02T03:04:05"},
+        {"id": 500, "user_id": 1, "username": "p1", "score": 30, "mode": "walls", "rank": 1},
+    ]))
+    assert import_records(LeaderboardEntry, read_records(str(ndjson)), bind=engine)["rows"] == 3
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(LeaderboardEntry.id, LeaderboardEntry.score, LeaderboardEntry.mode, LeaderboardEntry.date)
+            .order_by(LeaderboardEntry.score)
+        ).all()
+    assert [(score, mode) for _, score, mode, _ in rows] == [(10, "walls"), (20, "pass-through"), (30, "walls")]
+    assert rows[2].id == 500
+    assert rows[0].date is not None and rows[1].date.year == 2026
+
+
+def test_postgres_import_resets_sequence_for_empty_table():
+    """Test that the sequence reset handles a table with no rows (MAX(id) is NULL)."""
+
+    class Cursor:
+        def __init__(self):
+            self.statements = []
+
+        def copy_expert(self, sql, buffer):
+            pass
+
+        def execute(self, sql):
+            self.statements.append(sql)
+
+    class Raw:
+        def __init__(self):
+            self.cursor_ = Cursor()
+            self.committed = False
+
+        def cursor(self):
+            return self.cursor_
+
+        def commit(self):
+            self.committed = True
+
+        def close(self):
+            pass
+
+    class Bind:
+        class dialect:
+            name = "postgresql"
+
+        def __init__(self):
+            self.raw = Raw()
+
+        def raw_connection(self):
+            return self.raw
+
+    bind = Bind()
+    assert import_records(LeaderboardEntry, [], bind=bind)["rows"] == 0
+    (setval,) = bind.raw.cursor_.statements
+    assert "COALESCE(MAX(id), 1), MAX(id) IS NOT NULL" in setval
+    assert setval.endswith('FROM "leaderboard"')
+    assert bind.raw.committed
+
+
+def test_copy_batch_uses_one_column_list_per_group():
+    """Test that COPY batches write each value under its own column."""
+    from bulk_io import _by_columns, _coerce, _copy_batch
+
+    class Cursor:
+        def __init__(self):
+            self.copies = []
+
+        def copy_expert(self, sql, buffer):
+            columns = sql.split("(", 1)[1].split(")", 1)[0].replace('"', "").split(", ")
+            self.copies.extend(dict(zip(columns, line)) for line in csv.reader(buffer))
+
+    rows = [
+        _coerce(LeaderboardEntry, {"user_id": 1, "username": "p1", "score": 5, "mode": "walls"}),
+        _coerce(LeaderboardEntry, {"score": 6, "mode": "pass-through", "user_id": 2, "username": "p2", "id": 9}),
+    ]
+    cursor = Cursor()
+    for columns, group in _by_columns(rows):
+        _copy_batch(cursor, "leaderboard", columns, group)
+
+    first, second = cursor.copies
+    assert (first["score"], first["mode"], "id" in first) == ("5", "walls", False)
+    assert (second["score"], second["mode"], second["id"]) == ("6", "pass-through", "9")
+    assert first["date"] and second["date"]
@@ -0,0 +1,106 @@
+"""
+Tests for the in-memory registry of live games.
+"""
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from main import app, get_db
+from models import Game
+from game_registry import GameRegistry, LiveGame, game_registry
+from singleflight import single_flight
+
+
+def live(game_id, start_time=1_700_000_000.0):
+    return LiveGame(game_id, 1, "player1", "walls", start_time)
+
+
+def test_registry_is_bounded():
+    """Test that a full registry evicts the game heard from least recently."""
+    registry = GameRegistry(max_games=2)
+    for game_id in (1, 2):
+        registry.start(live(game_id))
+    registry.heartbeat(1, score=10)
+    registry.start(live(3))
+
+    assert len(registry) == 2
+    assert registry.get(2) is None
+    assert registry.get(1).score == 10
+    assert registry.footprint()["evicted"] == 1
+
+
+def test_stale_games_expire():
+    """Test that games without a recent heartbeat drop out of the listing."""
+    registry = GameRegistry(stale_seconds=60)
+    registry.start(live(1))
+    registry.start(live(2))
+    registry.get(1).heartbeat -= 120
+
+    assert [game.id for game in registry.active()] == [2]
+    assert registry.footprint()["expired"] == 1
+
+
+def test_footprint_reports_bytes_per_thousand_games():
+    """Test that the footprint counts records once and shared strings once."""
+    registry = GameRegistry()
+    for game_id in range(1000):
+        registry.start(live(game_id, start_time=1_700_000_000.0 + game_id))
+
+    footprint = registry.footprint()
+    assert footprint["games"] == 1000
+    assert footprint["bytesPer1kGames"] == footprint["bytes"]
+    # A slotted record is far smaller than an ORM row or a dict per game
+    assert footprint["bytes"] < 1000 * 400
+
+
+def test_live_game_served_without_query(client, admin):
+    """Test that a live game's state and heartbeats come from memory."""
+    game_id = client.post("/games", json={"mode": "walls"}).json()["gameSession"]["id"]
+    client.post(f"/games/{game_id}/heartbeat", json={"score": 40})
+
+    data = client.get(f"/games/{game_id}").json()
+    assert data["isActive"] is True
+    assert data["currentScore"] == 40
+    assert f"game:{game_id}" not in single_flight.metrics()["keys"]
+
+    assert client.get("/active-games").json()["games"][0]["currentScore"] == 40
+    assert client.get("/internal/active-games", headers=admin).json()["games"] == 1
+
+
+def test_end_game_retires_and_persists(client):
+    """Test that ending a game removes it from the registry and writes the row."""
+    game_id = client.post("/games", json={"mode": "walls"}).json()["gameSession"]["id"]
+    client.post(f"/games/{game_id}/end", json={"score": 77})
+
+    assert client.get("/active-games").json()["games"] == []
+    assert client.post(f"/games/{game_id}/heartbeat", json={"score": 1}).status_code == 404
+
+    db = next(app.dependency_overrides[get_db]())
+    game = db.query(Game).filter(Game.id == game_id).one()
+    assert game.score == 77
+    assert game.is_active == 0
+    assert game.end_time is not None
+
+    # Finished games are still answered from the table
+    assert client.get(f"/games/{game_id}").json()["score"] == 77
+
+
+def test_failed_end_keeps_game_live(client, monkeypatch):
+    """Test that a game stays registered when writing its end fails."""
+    game_id = client.post("/games", json={"mode": "walls"}).json()["gameSession"]["id"]
+
+    def fail(session):
+        raise OperationalError("UPDATE games", {}, Exception("database is locked"))
+
+    with monkeypatch.context() as patch:
+        patch.setattr(Session, "commit", fail)
+        with pytest.raises(OperationalError):
+            client.post(f"/games/{game_id}/end", json={"score": 77})
+
+    assert game_registry.get(game_id) is not None
+    assert client.post(f"/games/{game_id}/heartbeat", json={"score": 5}).status_code == 200
+    assert client.get(f"/games/{game_id}").json()["isActive"] is True
+
+    client.post(f"/games/{game_id}/end", json={"score": 77})
+    assert game_registry.get(game_id) is None
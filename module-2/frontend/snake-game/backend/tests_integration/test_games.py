@@ -59,14 +59,16 @@ def test_end_game_without_score(client):
 
 def test_get_active_games(client):
     """Test getting active games."""
+    client.post("/games", json={"mode": "walls"})
     response = client.get("/active-games")
     
     assert response.status_code == 200
     data = response.json()
     assert "games" in data
     assert isinstance(data["games"], list)
-    # Should have mock players
-    assert len(data["games"]) > 0
+    # Should list the game just started
+    assert len(data["games"]) == 1
+    assert data["games"][0]["isPlaying"] is True
 
 
 def test_health_check(client):
@@ -0,0 +1,188 @@
+"""
+Tests for the WebSocket game event channel and its batched writes.
+"""
+
+import asyncio
+
+import pytest
+
+from main import app, get_db, event_batcher
+from models import Game, LeaderboardEntry, User
+from game_registry import LiveGame, game_registry
+from ingest import EventBatcher, EventError, GameChannel
+from sketches import percentile_tracker
+
+
+def test_full_game_over_websocket(client):
+    """Test start, ticks and end on one socket with durable acks."""
+    with client.websocket_connect("/ws/games") as ws:
+        ws.send_json({"t": "start", "mode": "walls", "seq": 1})
+        ack = ws.receive_json()
+        assert ack["t"] == "ack" and ack["seq"] == 1
+        game_id = ack["id"]
+
+        ws.send_json({"t": "tick", "id": game_id, "score": 30})
+        ws.send_json({"t": "tick", "id": game_id, "score": 50, "seq": 2})
+        assert ws.receive_json() == {"t": "ack", "seq": 2, "id": game_id}
+        assert client.get("/active-games").json()["games"][0]["currentScore"] == 50
+
+        ws.send_json({"t": "end", "id": game_id, "score": 77, "seq": 3})
+        ack = ws.receive_json()
+        assert ack["seq"] == 3
+        assert 0 <= ack["percentile"] <= 100
+
+    db = next(app.dependency_overrides[get_db]())
+    game = db.query(Game).filter(Game.id == game_id).one()
+    assert (game.score, game.is_active) == (77, 0)
+    assert db.query(LeaderboardEntry).filter(LeaderboardEntry.score == 77).count() == 1
+    assert client.get("/active-games").json()["games"] == []
+    assert event_batcher.stats["events"] == 2
+
+
+def test_invalid_messages_get_errors(client):
+    """Test that bad messages are answered with errors, not disconnects."""
+    with client.websocket_connect("/ws/games") as ws:
+        ws.send_text("not json")
+        assert ws.receive_json()["error"] == "invalid JSON"
+        ws.send_bytes(b'{"t": "start"}')
+        assert ws.receive_json()["error"] == "invalid JSON"
+        ws.send_json({"t": "tick", "id": 999, "score": 1, "seq": 5})
+        assert ws.receive_json() == {"t": "error", "seq": 5, "error": "unknown game 999"}
+        ws.send_json({"t": "jump", "seq": 6})
+        assert ws.receive_json()["t"] == "error"
+        ws.send_json({"t": "start", "mode": "walls", "seq": 7})
+        assert ws.receive_json()["t"] == "ack"
+
+
+def test_malformed_scores_are_rejected(client):
+    """Test that non-integer or negative scores never reach the batch."""
+    with client.websocket_connect("/ws/games") as ws:
+        ws.send_json({"t": "start", "mode": "walls", "seq": 1})
+        game_id = ws.receive_json()["id"]
+        for seq, score in enumerate(("lots", -5, 1.5, True), start=2):
+            ws.send_json({"t": "tick", "id": game_id, "score": score, "seq": seq})
+            assert ws.receive_json()["error"] == "score must be a non-negative integer"
+        ws.send_json({"t": "end", "id": game_id, "score": "77", "seq": 9})
+        assert ws.receive_json()["t"] == "error"
+
+        # The game is still live and can be ended properly
+        ws.send_json({"t": "end", "id": game_id, "score": 77, "seq": 10})
+        assert ws.receive_json()["seq"] == 10
+
+    assert client.post("/leaderboard", json={"score": 10, "mode": "walls"}).status_code == 201
+
+
+def test_failed_end_can_be_retried():
+    """Test that a game leaves the registry only once its end has committed."""
+    attempts = []
+
+    class Flaky(EventBatcher):
+        def write(self, events):
+            attempts.append(len(events))
+            if len(attempts) == 1:
+                raise RuntimeError("database went away")
+            return [{"id": event["id"]} for event in events]
+
+    channel = GameChannel(Flaky(session_factory=None, flush_ms=1), 1, "player1")
+    game_registry.start(LiveGame(5, 1, "player1", "walls", 0.0))
+    try:
+        with pytest.raises(RuntimeError):
+            asyncio.run(channel.handle({"t": "end", "id": 5, "score": 10}))
+        assert game_registry.get(5) is not None
+        assert asyncio.run(channel.handle({"t": "end", "id": 5, "score": 10})) == {"id": 5}
+    finally:
+        game_registry.end(5)
+
+
+def test_end_of_game_missing_from_registry(client):
+    """Test that an evicted game is ended from its row, and only by its owner."""
+    with client.websocket_connect("/ws/games") as ws:
+        ws.send_json({"t": "start", "mode": "walls", "seq": 1})
+        game_id = ws.receive_json()["id"]
+        game_registry.end(game_id)  # As if evicted or the app had restarted
+
+        ws.send_json({"t": "tick", "id": game_id, "score": 5, "seq": 2})
+        assert ws.receive_json()["error"] == f"unknown game {game_id}"
+        ws.send_json({"t": "end", "id": game_id, "score": 42, "seq": 3})
+        assert ws.receive_json()["t"] == "ack"
+        ws.send_json({"t": "end", "id": game_id, "score": 42, "seq": 4})
+        assert ws.receive_json()["error"] == f"unknown game {game_id}"
+
+    db = next(app.dependency_overrides[get_db]())
+    game = db.query(Game).filter(Game.id == game_id).one()
+    assert (game.score, game.is_active) == (42, 0)
+    assert game.mode == "walls"
+
+    other = GameChannel(event_batcher, game.user_id + 1, "intruder")
+    db.query(Game).filter(Game.id == game_id).update({Game.is_active: 1})
+    db.commit()
+    db.close()
+    with pytest.raises(EventError):
+        asyncio.run(other.handle({"t": "end", "id": game_id, "score": 1}))
+
+
+def test_percentile_failure_does_not_fail_the_batch(client, monkeypatch):
+    """Test that one event's percentile error leaves the rest of its batch acked."""
+    with client.websocket_connect("/ws/games") as ws:
+        for seq, mode in enumerate(("walls", "pass-through"), start=1):
+            ws.send_json({"t": "start", "mode": mode, "seq": seq})
+            ws.receive_json()
+    db = next(app.dependency_overrides[get_db]())
+    user = db.query(User).first()
+    games = db.query(Game).order_by(Game.id).all()
+    db.close()
+
+    real = percentile_tracker.percentile
+
+    def flaky(db, mode, score):
+        if mode == "pass-through":
+            raise TypeError("sketch unavailable")
+        return real(db, mode, score)
+
+    monkeypatch.setattr(percentile_tracker, "percentile", flaky)
+    results = event_batcher.write([
+        {"t": "end", "id": game.id, "user_id": user.id, "username": user.username, "mode": game.mode, "score": 50}
+        for game in games
+    ])
+    assert results[0]["percentile"] is not None
+    assert results[1] == {"id": games[1].id, "percentile": None}
+    db = next(app.dependency_overrides[get_db]())
+    assert db.query(LeaderboardEntry).filter(LeaderboardEntry.score == 50).count() == 2
+    assert client.get("/active-games").json()["games"] == []
+
+
+def test_concurrent_events_share_one_transaction():
+    """Test that events submitted together are written as one batch."""
+    batches = []
+
+    class Recording(EventBatcher):
+        def write(self, events):
+            batches.append(len(events))
+            return [{"id": n} for n in range(len(events))]
+
+    batcher = Recording(session_factory=None, batch_size=100, flush_ms=5)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit({"t": "start"}) for _ in range(30)))
+
+    results = asyncio.run(run())
+    assert batches == [30]
+    assert [r["id"] for r in results] == list(range(30))
+
+
+def test_batch_size_triggers_immediate_flush():
+    """Test that a full batch is written without waiting for the timer."""
+    batches = []
+
+    class Recording(EventBatcher):
+        def write(self, events):
+            batches.append(len(events))
+            return [{}] * len(events)
+
+    batcher = Recording(session_factory=None, batch_size=10, flush_ms=10_000)
+
+    async def run():
+        await asyncio.wait_for(asyncio.gather(*(batcher.submit({"t": "end"}) for _ in range(20))), 2)
+
+    asyncio.run(run())
+    assert batches == [10, 10]
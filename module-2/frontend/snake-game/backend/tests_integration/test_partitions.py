@@ -0,0 +1,76 @@
+"""
+Tests for the PostgreSQL partition maintenance helpers.
+DDL is captured with a recording connection; no PostgreSQL server is needed.
+"""
+
+from datetime import datetime
+
+import partitions
+from models import LeaderboardEntry
+
+
+class RecordingConnection:
+    def __init__(self, existing=()):
+        self.statements = []
+        self.existing = existing
+
+    def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        if "pg_inherits" in str(statement):
+            return [(name,) for name in self.existing]
+        return []
+
+
+def test_partitioning_disabled_on_sqlite():
+    """Test that SQLite deployments never partition or filter."""
+    assert partitions.PARTITIONING_ENABLED is False
+    assert partitions.partition_table_args("date") == {}
+    assert partitions.partition_filter(LeaderboardEntry.date) == []
+    assert partitions.maintain_partitions() == {}
+
+
+def test_add_months_wraps_years():
+    """Test month arithmetic across year boundaries."""
+    assert partitions.add_months(datetime(2026, 11, 1), 3) == datetime(2027, 2, 1)
+    assert partitions.add_months(datetime(2026, 1, 1), -1) == datetime(2025, 12, 1)
+
+
+def test_partition_filter_uses_retention_floor(monkeypatch):
+    """Test that queries get a lower bound on the partition key."""
+    monkeypatch.setattr(partitions, "PARTITIONING_ENABLED", True)
+    monkeypatch.setattr(partitions, "PARTITION_RETENTION_MONTHS", 3)
+
+    now = datetime(2026, 10, 19)
+    assert partitions.partition_floor(now=now) == datetime(2026, 8, 1)
+    assert partitions.partition_floor(1, now=now) == datetime(2026, 10, 1)
+    clauses = partitions.partition_filter(LeaderboardEntry.date, now=now)
+    assert len(clauses) == 1
+
+
+def test_ensure_partitions_creates_upcoming_months(monkeypatch):
+    """Test that the current month plus the premake horizon is created."""
+    monkeypatch.setattr(partitions, "PARTITIONING_ENABLED", True)
+    monkeypatch.setattr(partitions, "PARTITION_PREMAKE_MONTHS", 2)
+    monkeypatch.setattr(partitions, "PARTITION_BY_MODE", True)
+
+    conn = RecordingConnection()
+    created = partitions.ensure_partitions(conn, "leaderboard", datetime(2026, 12, 5))
+
+    assert created == ["leaderboard_p202612", "leaderboard_p202701", "leaderboard_p202702"]
+    ddl = "\n".join(conn.statements)
+    assert "FROM ('2026-12-01T00:00:00') TO ('2027-01-01T00:00:00') PARTITION BY LIST (mode)" in ddl
+    assert "\"leaderboard_p202612_pass_through\" PARTITION OF \"leaderboard_p202612\"" in ddl
+    assert "\"leaderboard_default\" PARTITION OF \"leaderboard\" DEFAULT" in ddl
+
+
+def test_expire_partitions_detaches_and_drops_old_months(monkeypatch):
+    """Test that partitions older than the retention window are removed."""
+    monkeypatch.setattr(partitions, "PARTITIONING_ENABLED", True)
+    monkeypatch.setattr(partitions, "PARTITION_RETENTION_MONTHS", 2)
+
+    conn = RecordingConnection(["games_p202607", "games_p202609", "games_p202610", "games_default"])
+    expired = partitions.expire_partitions(conn, "games", datetime(2026, 10, 19))
+
+    assert expired == ["games_p202607"]
+    assert 'ALTER TABLE "games" DETACH PARTITION "games_p202607"' in conn.statements
+    assert 'DROP TABLE "games_p202607"' in conn.statements
@@ -0,0 +1,111 @@
+"""
+Tests for the on-demand sampling profiler and memory growth endpoints.
+"""
+
+import threading
+import time
+
+import pytest
+
+import profiler
+from profiler import SamplingProfiler, captures, flamegraph_svg
+
+
+@pytest.fixture
+def enabled(monkeypatch, admin):
+    """Turn the profiler on and return the admin headers."""
+    monkeypatch.setattr(profiler, "PROFILER_ENABLED", True)
+    return admin
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(200))
+
+
+def test_sampler_sees_other_threads():
+    """Test that every thread's stack is sampled under its thread name."""
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy-worker")
+    worker.start()
+    sampler = SamplingProfiler(interval_ms=1)
+    sampler.start()
+    time.sleep(0.1)
+    sampler.stop()
+    stop.set()
+    worker.join()
+
+    assert sampler.samples > 0
+    busy = [stack for stack in sampler.stacks if stack.startswith("busy-worker;")]
+    assert busy and all("busy_loop (tests_integration/test_profiler.py:" in stack for stack in busy)
+    assert not any(stack.startswith("profiler;") for stack in sampler.stacks)
+    assert sampler.summary()["samplerMsPerSample"] > 0
+
+
+def test_flamegraph_svg_renders_frames():
+    """Test that collapsed stacks render as an SVG with escaped labels."""
+    svg = flamegraph_svg({"MainThread;a (x.py:1);<b> (x.py:2)": 3, "MainThread;a (x.py:1)": 1}, title="demo")
+    assert svg.startswith("<svg") and svg.endswith("</svg>")
+    assert "demo (4 samples)" in svg
+    assert "&lt;b&gt; (x.py:2) (3 samples, 75.0%)" in svg
+
+
+def test_profiler_is_off_by_default(client, admin):
+    """Test that the endpoints are hidden unless explicitly enabled."""
+    assert profiler.PROFILER_ENABLED is False
+    assert client.get("/internal/profile", headers=admin).status_code == 404
+    assert client.get("/internal/memory", headers=admin).status_code == 404
+
+
+def test_profiler_requires_admin_token(client, enabled):
+    """Test that a missing or wrong admin token is rejected."""
+    assert client.get("/internal/profile?seconds=0.05").status_code == 403
+    assert client.get("/internal/memory?seconds=0.05", headers={"X-Admin-Token": "nope"}).status_code == 403
+
+
+def test_profile_returns_collapsed_stacks(client, enabled):
+    """Test that a capture returns flamegraph.pl-style lines with counts."""
+    response = client.get("/internal/profile?seconds=0.2&interval_ms=2", headers=enabled)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert int(response.headers["X-Profile-Samples"]) > 0
+    lines = response.text.splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and stack
+    # The event loop serving the app is sampled while the capture awaits
+    assert any("BaseEventLoop._run_once (base_events.py:" in line for line in lines)
+
+
+def test_profile_formats_and_limits(client, enabled):
+    """Test the SVG and JSON formats and the parameter checks."""
+    svg = client.get("/internal/profile?seconds=0.05&format=svg", headers=enabled)
+    assert svg.headers["content-type"] == "image/svg+xml"
+    assert svg.text.startswith("<svg")
+
+    data = client.get("/internal/profile?seconds=0.05&format=json&interval_ms=2", headers=enabled).json()
+    assert data["intervalMs"] == 2 and 0 < data["samples"] <= sum(data["stacks"].values())
+
+    assert client.get("/internal/profile?format=pprof", headers=enabled).status_code == 400
+    assert client.get("/internal/profile?seconds=3600", headers=enabled).status_code == 400
+    assert client.get("/internal/profile?interval_ms=0.1", headers=enabled).status_code == 400
+
+
+def test_one_capture_at_a_time(client, enabled):
+    """Test that a second capture in the same worker is refused."""
+    with captures:
+        assert client.get("/internal/profile?seconds=0.05", headers=enabled).status_code == 409
+        assert client.get("/internal/memory?seconds=0.05", headers=enabled).status_code == 409
+    assert client.get("/internal/profile?seconds=0.05", headers=enabled).status_code == 200
+
+
+def test_memory_growth_reports_top_lines(client, enabled):
+    """Test that the memory diff lists source lines that allocated."""
+    data = client.get("/internal/memory?seconds=0.05&limit=5", headers=enabled).json()
+    assert data["seconds"] == 0.05
+    assert len(data["top"]) <= 5
+    for stat in data["top"]:
+        assert stat["sizeDiffBytes"] > 0 and ":" in stat["location"]
+    import tracemalloc
+    assert not tracemalloc.is_tracing()
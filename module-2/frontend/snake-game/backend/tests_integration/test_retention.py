@@ -0,0 +1,98 @@
+"""
+Tests for the leaderboard retention policy and compaction job.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.pool import StaticPool
+
+from models import Base, User, LeaderboardEntry
+from retention import compact_leaderboard
+
+NOW = datetime(2026, 6, 1)
+
+
+@pytest.fixture
+def bind():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": i, "username": f"player{i}", "email": f"p{i}@test.com", "password": "x"} for i in (1, 2)
+        ])
+    yield engine
+    engine.dispose()
+
+
+def add_entries(bind, user_id, mode, scores, days_ago):
+    with bind.begin() as conn:
+        conn.execute(LeaderboardEntry.__table__.insert(), [
+            {"user_id": user_id, "username": f"player{user_id}", "score": score, "mode": mode,
+             "date": NOW - timedelta(days=days_ago)}
+            for score in scores
+        ])
+
+
+def remaining(bind, user_id, mode):
+    table = LeaderboardEntry.__table__
+    with bind.connect() as conn:
+        return sorted(conn.execute(
+            select(table.c.score).where(table.c.user_id == user_id, table.c.mode == mode)
+        ).scalars(), reverse=True)
+
+
+def test_keeps_best_per_user_and_mode_plus_recent(bind):
+    """Test that old entries outside each player's best N are deleted."""
+    add_entries(bind, 1, "walls", [10, 50, 30, 40, 20], days_ago=90)
+    add_entries(bind, 1, "walls", [5], days_ago=1)
+    add_entries(bind, 1, "pass-through", [7, 8], days_ago=90)
+    add_entries(bind, 2, "walls", [60, 15], days_ago=90)
+
+    report = compact_leaderboard(bind, keep_best=2, keep_days=30, batch_size=2, pause=0, now=NOW)
+
+    assert remaining(bind, 1, "walls") == [50, 40, 5]
+    assert remaining(bind, 1, "pass-through") == [8, 7]
+    assert remaining(bind, 2, "walls") == [60, 15]
+    assert report["deleted"] == 3
+    assert report["batches"] == 2
+    assert report["users"] == 2
+    assert report["seconds"] >= 0
+
+
+def test_dry_run_deletes_nothing(bind):
+    """Test that a dry run reports the same count without deleting."""
+    add_entries(bind, 1, "walls", range(20), days_ago=90)
+
+    report = compact_leaderboard(bind, keep_best=5, keep_days=30, pause=0, dry_run=True, now=NOW)
+
+    assert report == {**report, "dryRun": True, "deleted": 15}
+    assert len(remaining(bind, 1, "walls")) == 20
+
+
+def test_days_only_and_best_only_policies(bind):
+    """Test each half of the policy on its own."""
+    add_entries(bind, 1, "walls", [100, 90], days_ago=90)
+    add_entries(bind, 1, "walls", [1, 2, 3], days_ago=1)
+
+    compact_leaderboard(bind, keep_best=1, keep_days=0, pause=0, now=NOW)
+    assert remaining(bind, 1, "walls") == [100]
+
+    add_entries(bind, 1, "walls", [4], days_ago=1)
+    compact_leaderboard(bind, keep_best=0, keep_days=30, pause=0, now=NOW)
+    assert remaining(bind, 1, "walls") == [4]
+
+
+def test_refuses_policy_that_keeps_nothing(bind):
+    """Test that keep_best=0 and keep_days=0 is rejected."""
+    with pytest.raises(ValueError):
+        compact_leaderboard(bind, keep_best=0, keep_days=0)
+
+
+def test_retention_status_endpoint(client, admin):
+    """Test that the configured policy is reported."""
+    assert client.get("/internal/retention").status_code == 403
+    data = client.get("/internal/retention", headers=admin).json()
+    assert data["keepBest"] >= 0
+    assert data["lastRun"] is None
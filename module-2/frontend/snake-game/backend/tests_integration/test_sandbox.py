@@ -0,0 +1,150 @@
+"""
+Tests for the pooled Python execution service.
+"""
+
+import asyncio
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from sandbox import ExecutionPool, PoolBusy
+
+
+def run_pool(coro_fn, **options):
+    """Run `coro_fn(pool)` against a small pool, then shut the pool down.
+
+    Isolation is not required: the test machine may not be root or have
+    network namespaces. test_pool_fails_closed_without_isolation covers that.
+    """
+    options = {"workers": 1, "timeout": 2, "cpu_seconds": 1, "memory_mb": 128, "require_isolation": False, **options}
+    pool = ExecutionPool(**options)
+
+    async def run():
+        try:
+            return await coro_fn(pool)
+        finally:
+            await pool.close()
+
+    return asyncio.run(run())
+
+
+def test_runs_snippets_and_captures_output():
+    """Test stdout capture, errors and the audit guard."""
+    async def scenario(pool):
+        return [
+            await pool.run("print(sum(range(10)))"),
+            await pool.run("1 / 0"),
+            await pool.run("import subprocess\nsubprocess.run(['true'])"),
+            await pool.run("open('notes.txt', 'w')"),
+        ]
+
+    ok, failed, blocked, no_files = run_pool(scenario)
+    assert ok["success"] and ok["output"] == "45\n"
+    assert not failed["success"] and "ZeroDivisionError" in failed["error"]
+    assert "sandbox.py" not in failed["error"]
+    assert "not allowed" in blocked["error"]
+    assert "PermissionError" in no_files["error"]
+
+
+def test_workers_are_isolated_from_the_app(monkeypatch):
+    """Test that snippets see no app environment and the audit guard covers every route in."""
+    monkeypatch.setenv("DATABASE_URL", "postgresql://app:secret@db/snake")
+
+    async def scenario(pool):
+        return [
+            await pool.run("import random\nprint(sorted(random._os.environ))"),
+            await pool.run("exec('import os')\nos.listdir('/')"),
+            await pool.run("import _io\n_io.open('/etc/hostname')"),
+            await pool.run("import io\nio.FileIO('/etc/hostname')"),
+            await pool.run("import socket\nsocket.socket()"),
+            await pool.run(f"open('/proc/{os.getpid()}/environ')"),
+            await pool.run("import json\nprint(json.dumps([1]))"),
+            await pool.run("import os\nprint(os.getuid())"),
+        ], pool.status()
+
+    (env, *blocked, stdlib, uid), status = run_pool(scenario)
+    assert env["output"] == "['LANG', 'PATH']\n"
+    assert all("not allowed" in result["error"] for result in blocked)
+    assert stdlib["output"] == "[1]\n"
+    assert status["isolation"]["uid"] == int(uid["output"])
+    if os.getuid() == 0:
+        # Started as root: the worker runs as CODE_EXEC_USER instead
+        assert status["isolation"]["uid"] != 0
+
+
+def test_pool_fails_closed_without_isolation():
+    """Test that the pool refuses to start when workers cannot drop to CODE_EXEC_USER."""
+    pool = ExecutionPool(workers=2, user="no-such-sandbox-user")
+    with pytest.raises(RuntimeError, match="could not be isolated"):
+        asyncio.run(pool.start())
+    assert pool.status()["idle"] == 0
+
+
+def test_limits_kill_and_replace_workers():
+    """Test that runaway snippets hit the limits and the pool recovers."""
+    async def scenario(pool):
+        results = [
+            await pool.run("import time\ntime.sleep(10)"),
+            await pool.run("while True: pass"),
+            await pool.run("x = 'a' * (512 * 1024 * 1024)"),
+            await pool.run("print('still alive')"),
+        ]
+        return results, pool.status()
+
+    (timeout, cpu, memory, after), status = run_pool(scenario, timeout=3)
+    assert "timeout" in timeout["error"]
+    assert "CPU time limit" in cpu["error"]
+    assert "MemoryError" in memory["error"]
+    assert after["output"] == "still alive\n"
+    assert status["killed"] == 2
+
+
+def test_workers_are_recycled():
+    """Test that workers are replaced after max_runs and state does not leak."""
+    async def scenario(pool):
+        await pool.run("leaked = 1")
+        second = await pool.run("print('leaked' in globals())")
+        await pool.run("pass")
+        return second, pool.status()
+
+    second, status = run_pool(scenario, max_runs=2)
+    assert second["output"] == "False\n"
+    assert status["recycled"] == 1
+
+
+def test_queue_applies_backpressure():
+    """Test that requests beyond the queue are rejected instead of piling up."""
+    async def scenario(pool):
+        return await asyncio.gather(
+            *(pool.run("import time\ntime.sleep(0.2)") for _ in range(4)), return_exceptions=True,
+        )
+
+    results = run_pool(scenario, queue_size=1)
+    assert sum(isinstance(r, dict) and r["success"] for r in results) == 2
+    assert sum(isinstance(r, PoolBusy) for r in results) == 2
+
+
+def test_endpoint_disabled_by_default(client, admin):
+    """Test that /execute is off unless CODE_EXEC_ENABLED is set."""
+    assert client.post("/execute", json={"code": "print(1)"}, headers=admin).status_code == 404
+    assert client.get("/execute/status", headers=admin).status_code == 404
+
+
+def test_endpoint_runs_python(test_db, admin, monkeypatch):
+    """Test the execute endpoint with the pool warmed at startup."""
+    monkeypatch.setattr(main, "CODE_EXEC_ENABLED", True)
+    monkeypatch.setattr(main, "execution_pool", ExecutionPool(workers=1, timeout=2, require_isolation=False))
+
+    with TestClient(main.app) as client:
+        assert client.get("/execute/status", headers=admin).json()["idle"] == 1
+        assert client.post("/execute", json={"code": "print('hi')"}).status_code == 403
+
+        response = client.post("/execute", json={"code": "print('hi')", "language": "python"}, headers=admin)
+        assert response.status_code == 200
+        assert response.json()["output"] == "hi\n"
+        assert response.json()["language"] == "python"
+
+        assert client.post("/execute", json={"code": "x", "language": "ruby"}, headers=admin).status_code == 400
+        assert client.post("/execute", json={"code": "   "}, headers=admin).status_code == 400
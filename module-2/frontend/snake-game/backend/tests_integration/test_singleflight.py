@@ -0,0 +1,149 @@
+"""
+Tests for single-flight coalescing of identical concurrent reads.
+"""
+
+import asyncio
+import threading
+import time
+
+
+import main
+from singleflight import SingleFlight
+
+
+def slow_counter():
+    calls = []
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            calls.append(1)
+        time.sleep(0.05)
+        return {"value": 42}
+
+    return fn, calls
+
+
+def test_concurrent_calls_share_one_execution():
+    """Test that concurrent callers of one key run the function once."""
+    flight = SingleFlight(enabled=True, threaded=True)
+    fn, calls = slow_counter()
+
+    async def run():
+        return await asyncio.gather(*(flight.do("leaderboard:walls:50", fn) for _ in range(20)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(result == {"value": 42} for result in results)
+
+    metrics = flight.metrics()
+    assert metrics["keys"]["leaderboard:walls:50"] == {"calls": 20, "executions": 1, "coalesced": 19}
+    assert metrics["coalescedRatio"] == 0.95
+    assert metrics["inflight"] == 0
+
+
+def test_distinct_keys_and_sequential_calls_run_separately():
+    """Test that only concurrent calls with the same key are coalesced."""
+    flight = SingleFlight(enabled=True)
+    fn, calls = slow_counter()
+
+    async def run():
+        await asyncio.gather(flight.do("a", fn), flight.do("b", fn))
+        await flight.do("a", fn)
+
+    asyncio.run(run())
+    assert len(calls) == 3
+
+
+def test_errors_reach_every_caller():
+    """Test that a failing query fails all coalesced callers."""
+    flight = SingleFlight(enabled=True)
+
+    def fail():
+        time.sleep(0.02)
+        raise RuntimeError("db down")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_disabled_runs_every_call():
+    """Test that SINGLEFLIGHT_ENABLED=false bypasses coalescing."""
+    flight = SingleFlight(enabled=False)
+    fn, calls = slow_counter()
+
+    async def run():
+        await asyncio.gather(*(flight.do("k", fn) for _ in range(5)))
+
+    asyncio.run(run())
+    assert len(calls) == 5
+    assert flight.metrics()["coalesced"] == 0
+
+
+def test_sqlite_queries_stay_on_the_event_loop():
+    """Test that unthreaded flights run on the loop's thread and still coalesce."""
+    threads = []
+
+    def fn():
+        threads.append(threading.get_ident())
+        return {"value": 1}
+
+    async def run(flight):
+        return await asyncio.gather(*(flight.do("k", fn) for _ in range(5)))
+
+    assert asyncio.run(run(SingleFlight(enabled=True, threaded=False))) == [{"value": 1}] * 5
+    assert threads == [threading.get_ident()]
+    asyncio.run(run(SingleFlight(enabled=True, threaded=True)))
+    assert threads[1] != threading.get_ident()
+
+
+def test_flight_outlives_a_cancelled_leader():
+    """Test that followers get the result after the leader is cancelled."""
+    flight = SingleFlight(enabled=True, threaded=True)
+    fn, calls = slow_counter()
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do("k", fn))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("k", fn))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == {"value": 42}
+    assert len(calls) == 1
+
+
+def test_metrics_keep_recent_keys_only():
+    """Test that per-key metrics are bounded."""
+    flight = SingleFlight(enabled=True, metrics_keys=2)
+
+    async def run():
+        for key in ("game:1", "game:2", "game:3"):
+            await flight.do(key, lambda: None)
+
+    asyncio.run(run())
+    assert list(flight.metrics()["keys"]) == ["game:2", "game:3"]
+
+
+def test_endpoints_report_metrics(client, admin):
+    """Test that the coalesced endpoints still answer and are counted."""
+    assert client.get("/leaderboard?mode=walls&limit=5").status_code == 200
+    assert client.get("/users/me/highscore").json()["highScore"] >= 0
+    assert client.get("/games/999").json()["gameId"] == 999
+
+    keys = client.get("/internal/singleflight", headers=admin).json()["keys"]
+    assert keys["leaderboard:walls:5"]["executions"] == 1
+    assert "highscore:all" in keys
+    assert "game:999" in keys
+
+
+def test_metrics_require_admin_token(client, admin, monkeypatch):
+    """Test that the metrics endpoint is hidden without a token and checks it."""
+    assert client.get("/internal/singleflight").status_code == 403
+    assert client.get("/internal/singleflight", headers={"X-Admin-Token": "nope"}).status_code == 403
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "")
+    assert client.get("/internal/singleflight", headers=admin).status_code == 404
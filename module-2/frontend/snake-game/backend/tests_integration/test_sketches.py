@@ -0,0 +1,168 @@
+"""
+Tests for approximate percentile ranking with KLL sketches.
+Uses SQLite in-memory database.
+"""
+
+import random
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models import Base, User, LeaderboardEntry, SketchCheckpoint
+from sketches import KLLSketch, PercentileTracker, percentile_tracker
+
+
+def exact_percentile(values, score):
+    return 100.0 * sum(1 for v in values if v < score) / len(values)
+
+
+def test_sketch_matches_exact_ranks():
+    """Test that sketch percentiles stay within the documented error bound."""
+    rng = random.Random(7)
+    values = [int(rng.gammavariate(2.0, 60.0)) for _ in range(100_000)]
+    sketch = KLLSketch(k=200, seed=7)
+    for value in values:
+        sketch.update(value)
+
+    assert sketch.n == len(values)
+    assert sum(len(c) for c in sketch.compactors) < 3_000
+    for score in (10, 50, 100, 200, 400):
+        assert abs(sketch.percentile(score) - exact_percentile(values, score)) < 1.65
+
+
+def test_sketch_round_trip():
+    """Test that a serialized sketch answers the same queries."""
+    sketch = KLLSketch(k=50, seed=1)
+    for value in range(5_000):
+        sketch.update(value)
+
+    restored = KLLSketch.from_dict(sketch.to_dict())
+    assert restored.n == sketch.n
+    assert restored.percentile(2_500) == sketch.percentile(2_500)
+    restored.update(10_000)
+    assert restored.n == 5_001
+
+
+def test_submit_score_returns_percentile(client):
+    """Test that score submissions report an approximate percentile."""
+    for score in range(10, 110, 10):
+        client.post("/leaderboard", json={"score": score, "mode": "walls"})
+
+    response = client.post("/leaderboard", json={"score": 95, "mode": "walls"})
+    assert response.status_code == 201
+    # Seeded 150 plus 10..100 and 95: nine of twelve walls scores are below 95
+    assert response.json()["percentile"] == 75.0
+
+    response = client.post("/leaderboard", json={"score": 1, "mode": "pass-through"})
+    assert response.json()["percentile"] == 0.0
+
+
+def test_tracker_checkpoint_and_restore():
+    """Test that a restarted tracker resumes from the checkpoint."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(User(username="p1", email="p1@test.com", password="x"))
+    db.add_all([LeaderboardEntry(user_id=1, username="p1", score=s, mode="walls") for s in range(100)])
+    db.commit()
+
+    tracker = PercentileTracker(k=200)
+    assert tracker.percentile(db, "walls", 50) == 50.0
+    tracker.checkpoint(db)
+    assert db.query(SketchCheckpoint).one().last_entry_id == 100
+
+    db.add_all([LeaderboardEntry(user_id=1, username="p1", score=s, mode="walls") for s in range(100, 200)])
+    db.commit()
+
+    restarted = PercentileTracker(k=200)
+    # Only the 100 entries after the checkpoint are replayed
+    assert restarted.catch_up(db) == 100
+    assert restarted.sketches["walls"].n == 200
+    assert restarted.percentile(db, "walls", 150) == 75.0
+    db.close()
+
+
+def test_tracker_counts_ids_committed_out_of_order():
+    """Test that an entry committed after a higher id is still folded in."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(User(username="p1", email="p1@test.com", password="x"))
+    db.add_all([LeaderboardEntry(id=i, user_id=1, username="p1", score=i, mode="walls") for i in (1, 2, 4)])
+    db.commit()
+
+    tracker = PercentileTracker(k=200)
+    assert tracker.catch_up(db) == 3
+    assert tracker.last_entry_id == 4 and list(tracker.gaps) == [3]
+
+    # Id 3 was allocated before 4 but its transaction commits afterwards
+    db.add(LeaderboardEntry(id=3, user_id=1, username="p1", score=3, mode="walls"))
+    db.commit()
+    assert tracker.catch_up(db) == 1
+    assert tracker.sketches["walls"].n == 4 and not tracker.gaps
+
+    # Gaps that never fill (rolled back, deleted) are forgotten
+    db.add(LeaderboardEntry(id=9, user_id=1, username="p1", score=9, mode="walls"))
+    db.commit()
+    tracker.gap_seconds = 0
+    assert tracker.catch_up(db) == 1
+    assert tracker.catch_up(db) == 0 and not tracker.gaps
+    db.close()
+
+
+def test_unknown_modes_get_no_sketch(client):
+    """Test that submissions with an unknown mode are rejected before reaching the tracker."""
+    assert client.post("/leaderboard", json={"score": 10, "mode": "mode-123"}).status_code == 422
+    assert client.post("/games", json={"mode": "mode-123"}).status_code == 422
+    assert client.post("/leaderboard", json={"score": 10, "mode": "walls"}).status_code == 201
+    assert set(percentile_tracker.sketches) <= {"walls", "pass-through"}
+
+
+def test_rebuild_drops_deleted_rows():
+    """Test that a rebuild after retention counts only the remaining rows."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(User(username="p1", email="p1@test.com", password="x"))
+    db.add_all([LeaderboardEntry(user_id=1, username="p1", score=s, mode="walls") for s in range(100)])
+    db.commit()
+
+    tracker = PercentileTracker(k=200)
+    tracker.catch_up(db)
+    tracker.checkpoint(db)
+    db.query(LeaderboardEntry).filter(LeaderboardEntry.score < 50).delete()
+    db.commit()
+
+    tracker.rebuild()
+    # Replayed from the table, not restored from the checkpoint
+    assert tracker.catch_up(db) == 50
+    assert tracker.percentile(db, "walls", 75) == 50.0
+    db.close()
+
+
+def test_app_startup_builds_sketches(test_db, monkeypatch):
+    """Test that the sketches are built before the first score submission."""
+    import main
+
+    def session():
+        return next(main.app.dependency_overrides[main.get_db]())
+
+    main.seed_default_users(session())
+    monkeypatch.setattr(main, "SessionLocal", session)
+    with TestClient(main.app):
+        assert percentile_tracker.loaded
+        assert percentile_tracker.sketches["walls"].n == 1
@@ -0,0 +1,80 @@
+"""
+Integration tests for player and mode statistics endpoints.
+Uses SQLite in-memory database.
+"""
+
+from stats import StatsCache, stats_cache
+
+
+def test_user_stats(client):
+    """Test aggregated statistics for a single player."""
+    for score in (40, 60, 120):
+        client.post("/leaderboard", json={"score": score, "mode": "walls"})
+    game_id = client.post("/games", json={"mode": "walls"}).json()["gameSession"]["id"]
+    client.post(f"/games/{game_id}/end", json={"score": 120})
+
+    response = client.get("/users/1/stats?mode=walls")
+    assert response.status_code == 200
+    data = response.json()
+    # Seeded entry (150) plus the three submitted scores
+    assert data["gamesPlayed"] == 4
+    assert data["highScore"] == 150
+    assert data["averageScore"] == 92.5
+    assert data["gamesPerDay"] >= 1
+    assert data["averageGameDuration"] is not None
+    assert sum(bucket["count"] for bucket in data["histogram"]) == 4
+    assert {"from": 100, "to": 150, "count": 1} in data["histogram"]
+
+
+def test_user_stats_unknown_user(client):
+    """Test statistics for a user that does not exist."""
+    response = client.get("/users/999/stats")
+    assert response.status_code == 404
+
+
+def test_user_stats_invalidated_on_new_score(client):
+    """Test that submitting a score refreshes cached statistics."""
+    first = client.get("/users/1/stats?mode=walls").json()
+    client.post("/leaderboard", json={"score": 900, "mode": "walls"})
+
+    second = client.get("/users/1/stats?mode=walls").json()
+    assert second["gamesPlayed"] == first["gamesPlayed"] + 1
+    assert second["highScore"] == 900
+    assert second["percentile"] > 0
+
+
+def test_mode_stats(client):
+    """Test aggregated statistics for a game mode."""
+    for score in (10, 20, 30, 40):
+        client.post("/leaderboard", json={"score": score, "mode": "pass-through"})
+
+    response = client.get("/stats/pass-through")
+    assert response.status_code == 200
+    data = response.json()
+    # Seeded entry (230) plus the four submitted scores
+    assert data["entries"] == 5
+    assert data["highScore"] == 230
+    assert data["median"] == 30
+    assert data["p90"] == 40
+
+    client.post("/leaderboard", json={"score": 500, "mode": "pass-through"})
+    assert client.get("/stats/pass-through").json()["entries"] == 6
+    assert client.get("/stats/all").json()["highScore"] == 500
+
+
+def test_unknown_modes_never_reach_the_cache(client):
+    """Test that arbitrary mode strings are rejected before they are cached."""
+    assert client.get("/stats/no-such-mode").status_code == 422
+    assert client.get("/users/1/stats?mode=x1").status_code == 422
+    assert stats_cache._entries == {}
+
+
+def test_cache_evicts_least_recently_used():
+    """Test that the cache holds at most max_entries views."""
+    cache = StatsCache(ttl=60, max_entries=2)
+    cache.set(("mode", "walls"), 1)
+    cache.set(("mode", "pass-through"), 2)
+    assert cache.get(("mode", "walls")) == 1
+    cache.set(("mode", "all"), 3)
+    assert cache.get(("mode", "pass-through")) is None
+    assert cache.get(("mode", "walls")) == 1 and cache.get(("mode", "all")) == 3
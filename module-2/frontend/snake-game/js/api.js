@@ -142,6 +142,17 @@ class APIClient {
         return { success: false, error: result.error };
     }
 
+    async heartbeat(gameId, score) {
+        const result = await this.request(`/games/${gameId}/heartbeat`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ score })
+        });
+
+        if (result.success) return { success: true, ...result.data };
+        return { success: false, status: result.status, error: result.error };
+    }
+
     async endGame(gameId, score) {
         const body = score !== undefined ? { score } : undefined;
         const result = await this.request(`/games/${gameId}/end`, {
@@ -153,6 +164,24 @@ class APIClient {
         if (result.success) return { success: true, ...result.data };
         return { success: false, error: result.error };
     }
+
+    // Server-side code execution (404 when disabled on the backend)
+    async getExecuteStatus() {
+        const result = await this.request('/execute/status', { method: 'GET' });
+        if (result.success) return { success: true, ...result.data };
+        return { success: false, status: result.status, error: result.error };
+    }
+
+    async executeCode(code, language = 'python') {
+        const result = await this.request('/execute', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ code, language })
+        });
+
+        if (result.success) return { status: result.status, ...result.data };
+        return { success: false, status: result.status, error: result.error || 'Execution failed', language };
+    }
 }
 
 export const api = new APIClient();
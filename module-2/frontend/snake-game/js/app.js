@@ -10,6 +10,9 @@ import { CodeEditorController } from './editor.js';
 import { SnakeGame, GameRenderer, DIRECTIONS, GAME_MODES } from './game.js';
 import { api } from './api.js';
 
+// Keeps the game live for spectators; the server drops games silent for ACTIVE_GAMES_STALE_SECONDS
+const HEARTBEAT_INTERVAL_MS = 5000;
+
 class App {
     constructor() {
         this.authController = new AuthController();
@@ -22,6 +25,9 @@ class App {
         this.gameLoop = null;
         this.currentMode = GAME_MODES.PASS_THROUGH;
         this.isPlaying = false;
+        this.liveGameId = null;
+        this.lastHeartbeat = 0;
+        this.gameRound = 0;
 
         this.setupGame();
         this.setupNavigation();
@@ -186,10 +192,27 @@ class App {
             radio.disabled = true;
         });
 
+        // Register the game so others can watch it
+        this.liveGameId = null;
+        this.lastHeartbeat = Date.now();
+        const round = ++this.gameRound;
+        api.startGame(this.currentMode).then(result => {
+            if (!result.success) return;
+            // Ended before the server answered: close it right away
+            if (this.isPlaying && this.gameRound === round) this.liveGameId = result.gameSession.id;
+            else api.endGame(result.gameSession.id);
+        });
+
         // Start game loop
         this.runGameLoop();
     }
 
+    sendHeartbeat(now) {
+        if (this.liveGameId === null || now - this.lastHeartbeat < HEARTBEAT_INTERVAL_MS) return;
+        this.lastHeartbeat = now;
+        api.heartbeat(this.liveGameId, this.game.score);
+    }
+
     runGameLoop() {
         let lastUpdate = Date.now();
         const updateSpeed = 100; // 100ms between updates
@@ -202,6 +225,7 @@ class App {
 
                 // Update score display
                 document.getElementById('score').textContent = this.game.score;
+                this.sendHeartbeat(now);
 
                 // Render game
                 this.renderer.render(this.game.getState());
@@ -249,6 +273,10 @@ class App {
         }
 
         const finalScore = this.game.score;
+        if (this.liveGameId !== null) {
+            api.endGame(this.liveGameId, finalScore);
+            this.liveGameId = null;
+        }
 
         // Update UI
         document.getElementById('final-score').textContent = finalScore;
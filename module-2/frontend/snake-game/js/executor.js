@@ -2,15 +2,17 @@
  * Code Executor Module
  * Executes JavaScript and Python code in WASM for security
  * - JavaScript: Native browser execution (sandboxed)
- * - Python: Pyodide WASM runtime
+ * - Python: backend worker pool when enabled, otherwise Pyodide WASM runtime
  */
 
 import * as Pyodide from 'pyodide';
+import { api } from './api.js';
 
 class CodeExecutor {
     constructor() {
         this.pythonReady = false;
         this.pythonInterpreter = null;
+        this.pythonBackend = null; // 'server' or 'pyodide'
         this.executionTimeout = 5000; // 5 second timeout
     }
 
@@ -18,12 +20,27 @@ class CodeExecutor {
      * Initialize Python WASM runtime
      */
     async initPython() {
-        if (this.pythonReady) return;
+        if (this.pythonReady) return { success: true };
 
+        // Prefer the backend pool: it skips the multi-megabyte Pyodide download
+        const status = await api.getExecuteStatus();
+        if (status.success) {
+            this.pythonBackend = 'server';
+            this.pythonReady = true;
+            return { success: true, message: 'Python server execution available' };
+        }
+        return this.initPyodide();
+    }
+
+    /**
+     * Load the in-browser Pyodide runtime
+     */
+    async initPyodide() {
         try {
             this.pythonInterpreter = await Pyodide.loadPyodide({
                 indexURL: 'https://cdn.jsdelivr.net/pyodide/v0.23.4/full/'
             });
+            this.pythonBackend = 'pyodide';
             this.pythonReady = true;
             return { success: true, message: 'Python WASM initialized' };
         } catch (error) {
@@ -109,6 +126,20 @@ class CodeExecutor {
             }
         }
 
+        if (this.pythonBackend === 'server') {
+            const result = await api.executeCode(code, 'python');
+            // Backend switched off or unreachable: fall back to the browser runtime
+            if (!result.success && (result.status === 404 || result.status === undefined)) {
+                this.pythonReady = false;
+                const initResult = await this.initPyodide();
+                if (!initResult.success) {
+                    return { success: false, error: initResult.error, language: 'python' };
+                }
+            } else {
+                return result;
+            }
+        }
+
         return new Promise((resolve) => {
             const timeout = setTimeout(() => {
                 resolve({ success: false, error: 'Python execution timeout (5s)', language: 'python' });
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todoproject.settings')
+# Persistent connections are not safe with async views; see settings.DATABASES
+os.environ.setdefault('TODO_DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
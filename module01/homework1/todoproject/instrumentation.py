@@ -0,0 +1,223 @@
+"""
+Per-request query budget instrumentation.
+
+RequestBudgetMiddleware records, for every request, the number of queries and
+time spent in the database, the time spent rendering templates and the size
+of the response. Requests over any limit in settings.REQUEST_BUDGET are
+logged to the `todoproject.budget` logger, and per-view aggregates are served
+as JSON at /_internal/stats/ to staff users, and with DEBUG on to clients
+listed in INTERNAL_IPS (behind a proxy every client has the proxy's address,
+so the IP alone never grants access). Requests that
+resolve to no view share one aggregate, so arbitrary URLs cannot grow it.
+
+Template time is measured by rendering TemplateResponses in the middleware's
+process_template_response; views that call render() themselves report 0.
+
+Work done while a StreamingHttpResponse is consumed (the JSON API list)
+happens after the middleware returns and is not counted; streaming responses
+report no size.
+
+Tests can assert a view's budget with QueryBudgetTestMixin, which reads the
+stats the middleware attaches to each response as `response.request_stats`.
+"""
+
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, JsonResponse
+
+logger = logging.getLogger('todoproject.budget')
+
+DEFAULT_BUDGET = {
+    'queries': 10,
+    'db_ms': 100.0,
+    'template_ms': 100.0,
+    'response_bytes': 512 * 1024,
+}
+
+# Aggregate key for requests that match no URL pattern (404s)
+UNRESOLVED_VIEW = '<unresolved>'
+
+_current = ContextVar('request_stats', default=None)
+
+
+@dataclass
+class RequestStats:
+    view: str = ''
+    queries: int = 0
+    db_ms: float = 0.0
+    template_ms: float = 0.0
+    response_bytes: int = None
+    total_ms: float = 0.0
+    over_budget: list = field(default_factory=list)
+
+
+def budget():
+    return {**DEFAULT_BUDGET, **getattr(settings, 'REQUEST_BUDGET', {})}
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if stats is not None:
+            stats.queries += 1
+            stats.db_ms += (time.perf_counter() - started) * 1000
+
+
+def _instrument(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+# Connections are per thread and async views query from sync_to_async threads,
+# so every connection carries the wrapper and the (copied) context decides
+# which request, if any, the query is counted against.
+connection_created.connect(_instrument)
+for _connection in connections.all(initialized_only=True):
+    _instrument(_connection)
+
+
+class BudgetStats:
+    """Thread-safe per-view aggregates of RequestStats."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def add(self, stats):
+        with self._lock:
+            view = self._views.setdefault(stats.view, {
+                'requests': 0, 'over_budget': 0, 'queries': 0, 'max_queries': 0,
+                'db_ms': 0.0, 'template_ms': 0.0, 'response_bytes': 0, 'max_total_ms': 0.0,
+            })
+            view['requests'] += 1
+            view['over_budget'] += bool(stats.over_budget)
+            view['queries'] += stats.queries
+            view['max_queries'] = max(view['max_queries'], stats.queries)
+            view['db_ms'] += stats.db_ms
+            view['template_ms'] += stats.template_ms
+            view['response_bytes'] += stats.response_bytes or 0
+            view['max_total_ms'] = max(view['max_total_ms'], stats.total_ms)
+
+    def snapshot(self):
+        """Totals plus per-request averages for every view seen so far."""
+        with self._lock:
+            views = {}
+            for name, view in self._views.items():
+                requests = view['requests']
+                views[name] = {
+                    **view,
+                    'avg_queries': round(view['queries'] / requests, 2),
+                    'avg_db_ms': round(view['db_ms'] / requests, 2),
+                    'avg_template_ms': round(view['template_ms'] / requests, 2),
+                    'avg_response_bytes': round(view['response_bytes'] / requests),
+                }
+            return views
+
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+
+
+budget_stats = BudgetStats()
+
+
+class RequestBudgetMiddleware:
+    """Collect RequestStats for each request; put this first in MIDDLEWARE."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, started)
+
+    def process_template_response(self, request, response):
+        # First in MIDDLEWARE means last to see the TemplateResponse, so it can
+        # be rendered (and timed) here; the handler then skips rendering it
+        stats = _current.get()
+        started = time.perf_counter()
+        try:
+            return response.render()
+        finally:
+            if stats is not None:
+                stats.template_ms += (time.perf_counter() - started) * 1000
+
+    def start(self):
+        stats = RequestStats()
+        return stats, _current.set(stats), time.perf_counter()
+
+    def finish(self, request, response, stats, started):
+        stats.total_ms = (time.perf_counter() - started) * 1000
+        match = request.resolver_match
+        stats.view = match.view_name if match else UNRESOLVED_VIEW
+        if not response.streaming:
+            stats.response_bytes = len(response.content)
+
+        limits = budget()
+        for name in ('queries', 'db_ms', 'template_ms', 'response_bytes'):
+            value = getattr(stats, name)
+            if value is not None and value > limits[name]:
+                stats.over_budget.append(name)
+        if stats.over_budget:
+            logger.warning(
+                'Request over budget (%s): %s %s', ', '.join(stats.over_budget),
+                request.method, request.path, extra={'request_stats': asdict(stats)},
+            )
+
+        budget_stats.add(stats)
+        response.request_stats = stats
+        return response
+
+
+def stats_view(request):
+    """Per-view aggregates as JSON; only served to staff, or to INTERNAL_IPS under DEBUG."""
+    internal = settings.DEBUG and request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+    if not (internal or request.user.is_staff):
+        raise Http404
+    return JsonResponse({'budget': budget(), 'views': budget_stats.snapshot()})
+
+
+class QueryBudgetTestMixin:
+    """TestCase mixin for asserting a response stayed within a budget.
+
+    Limits default to settings.REQUEST_BUDGET; pass keyword arguments
+    (queries, db_ms, template_ms, response_bytes) to tighten them per view.
+    """
+
+    def assertWithinBudget(self, response, **limits):
+        stats = response.request_stats
+        limits = {**budget(), **limits}
+        for name, limit in limits.items():
+            value = getattr(stats, name)
+            if value is not None and value > limit:
+                self.fail(f'{stats.view}: {name} is {value:g}, over the budget of {limit:g}')
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its counts include every other middleware
+    'todoproject.instrumentation.RequestBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,12 +75,99 @@ WSGI_APPLICATION = 'todoproject.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# TODO_DATABASE_NAME points the app at another SQLite file (used by the
+# server load test so it never touches db.sqlite3).
+#
+# SQLite is tuned for several concurrent worker processes:
+# - WAL lets readers run alongside the single writer; synchronous=NORMAL is
+#   durable across application crashes in WAL mode and only risks the last
+#   transactions on power loss. The journal mode is stored in the database
+#   file, so migration 0006 sets it once instead of every connection doing so
+#   (which rewrote the file on any management command).
+# - IMMEDIATE transactions take the write lock up front, so a transaction that
+#   read first cannot fail with "database is locked" when it later writes;
+#   waiting writers retry for TODO_DB_BUSY_TIMEOUT seconds instead.
+# - Connections are kept for TODO_DB_CONN_MAX_AGE seconds (0 = per request).
+#   Only under WSGI: Django's docs say to disable persistent connections in
+#   async mode, where the async views' queries run on executor threads that
+#   do not see request boundaries, so asgi.py defaults it to 0.
+# Set TODO_DB_TUNING=0 to get Django's defaults back (used by benchmark_sqlite).
+
+DB_TUNING = os.environ.get('TODO_DB_TUNING', '1') != '0'
+SQLITE_JOURNAL_MODE = os.environ.get('TODO_DB_JOURNAL_MODE', 'WAL') if DB_TUNING else None
+SQLITE_PRAGMAS = {
+    'synchronous': os.environ.get('TODO_DB_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': int(float(os.environ.get('TODO_DB_BUSY_TIMEOUT', '5')) * 1000),
+    'mmap_size': int(os.environ.get('TODO_DB_MMAP_SIZE', str(128 * 1024 * 1024))),
+    # Negative values are KiB rather than pages
+    'cache_size': -int(os.environ.get('TODO_DB_CACHE_KIB', '20000')),
+    'temp_store': 'MEMORY',
+}
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('TODO_DATABASE_NAME', BASE_DIR / 'db.sqlite3'),
+    }
+}
+
+if DB_TUNING:
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.environ.get('TODO_DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000,
+        },
+    })
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory is per process; set TODO_CACHE_DIR to share the cache (and its
+# invalidation) between several worker processes.
+
+if os.environ.get('TODO_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['TODO_CACHE_DIR'],
+        }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'todos',
+        }
+    }
+
+
+# Request budget
+# Requests over any of these limits are logged to `todoproject.budget`;
+# per-view aggregates are served at /_internal/stats/ to staff users, and to
+# INTERNAL_IPS only while DEBUG is on.
+# See todoproject/instrumentation.py.
+
+REQUEST_BUDGET = {
+    'queries': int(os.environ.get('TODO_BUDGET_QUERIES', '10')),
+    'db_ms': float(os.environ.get('TODO_BUDGET_DB_MS', '100')),
+    'template_ms': float(os.environ.get('TODO_BUDGET_TEMPLATE_MS', '100')),
+    'response_bytes': int(os.environ.get('TODO_BUDGET_RESPONSE_BYTES', str(512 * 1024))),
+}
+
+INTERNAL_IPS = ['127.0.0.1']
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'todoproject.budget': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
 }
 
 
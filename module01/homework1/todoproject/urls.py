@@ -17,7 +17,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from .instrumentation import stats_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('_internal/stats/', stats_view, name='internal_stats'),
     path('', include('todos.urls')),
 ]
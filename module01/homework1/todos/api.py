@@ -0,0 +1,215 @@
+"""
+JSON API for todos, mounted under /api/ next to the HTML views.
+
+    GET    /api/todos/             all todos, streamed
+    GET    /api/todos/?since=T     todos changed and ids deleted at or after T
+    POST   /api/todos/             create
+    GET    /api/todos/<pk>/        detail
+    PATCH  /api/todos/<pk>/        partial update (PUT is accepted too)
+    DELETE /api/todos/<pk>/        delete
+
+List responses are {"sync_token": ..., "todos": [...], "deleted": [...]} and
+are streamed from a chunked queryset iterator, so memory stays flat however
+many todos there are. Clients pass the returned sync_token as `since` on
+their next call; the token lags the request by SYNC_OVERLAP so writes that
+were still committing are picked up next time, at the cost of occasionally
+seeing a todo twice. Deletions come from TodoTombstone rows, which are kept
+for TOMBSTONE_RETENTION (see the purge_todo_tombstones command); older tokens
+get 410 and must resync from scratch.
+
+Writes only accept application/json bodies. That keeps plain HTML forms on
+other sites from reaching them, so the API is exempt from CSRF checks and
+usable from scripts without a session.
+"""
+
+import json
+from datetime import date, timedelta, timezone as dt_timezone
+
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from .caching import ainvalidate_todo_list
+from .models import Todo, TodoTombstone
+from .views import aupdate_or_404
+
+FIELDS = ('id', 'title', 'description', 'due_date', 'resolved', 'created_at', 'updated_at')
+ITERATOR_CHUNK_SIZE = 2_000
+# Rows encoded per chunk written to the client
+STREAM_BATCH_SIZE = 500
+SYNC_OVERLAP = timedelta(seconds=5)
+TOMBSTONE_RETENTION = timedelta(days=30)
+TITLE_MAX_LENGTH = Todo._meta.get_field('title').max_length
+
+
+def _dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder)
+
+
+def _error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _batches(rows):
+    """Encode rows as comma-separated JSON, STREAM_BATCH_SIZE rows per chunk."""
+    batch, separator = [], ''
+    for row in rows:
+        batch.append(separator + _dumps(row))
+        separator = ', '
+        if len(batch) == STREAM_BATCH_SIZE:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+async def _abatches(rows):
+    batch, separator = [], ''
+    async for row in rows:
+        batch.append(separator + _dumps(row))
+        separator = ', '
+        if len(batch) == STREAM_BATCH_SIZE:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def _document(sync_token, todos, deleted):
+    yield f'{{"sync_token": {_dumps(sync_token)}, "todos": ['
+    yield from _batches(todos.iterator(chunk_size=ITERATOR_CHUNK_SIZE))
+    yield '], "deleted": ['
+    yield from _batches(deleted.iterator(chunk_size=ITERATOR_CHUNK_SIZE))
+    yield ']}'
+
+
+async def _adocument(sync_token, todos, deleted):
+    yield f'{{"sync_token": {_dumps(sync_token)}, "todos": ['
+    async for chunk in _abatches(todos.aiterator(chunk_size=ITERATOR_CHUNK_SIZE)):
+        yield chunk
+    yield '], "deleted": ['
+    async for chunk in _abatches(deleted.aiterator(chunk_size=ITERATOR_CHUNK_SIZE)):
+        yield chunk
+    yield ']}'
+
+
+def stream_list_response(request, sync_token, todos, deleted):
+    """Stream the list document with the iterator type the server consumes.
+
+    Django buffers a streaming response whose iterator does not match the
+    handler (sync under WSGI, async under ASGI), which would defeat streaming.
+    """
+    document = _adocument if isinstance(request, ASGIRequest) else _document
+    return StreamingHttpResponse(
+        document(sync_token, todos, deleted), content_type='application/json'
+    )
+
+
+def parse_todo(data, partial=False):
+    """Validate a JSON body into model fields; raises ValueError."""
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object')
+    fields = {}
+    if 'title' in data or not partial:
+        title = data.get('title')
+        if not isinstance(title, str) or not title.strip():
+            raise ValueError('title is required')
+        if len(title) > TITLE_MAX_LENGTH:
+            raise ValueError(f'title is longer than {TITLE_MAX_LENGTH} characters')
+        fields['title'] = title
+    if 'description' in data:
+        if not isinstance(data['description'], str):
+            raise ValueError('description must be a string')
+        fields['description'] = data['description']
+    if 'due_date' in data:
+        due_date = data['due_date']
+        if due_date is not None and not isinstance(due_date, str):
+            raise ValueError('due_date must be an ISO date or null')
+        fields['due_date'] = date.fromisoformat(due_date) if due_date else None
+    if 'resolved' in data:
+        if not isinstance(data['resolved'], bool):
+            raise ValueError('resolved must be a boolean')
+        fields['resolved'] = data['resolved']
+    return fields
+
+
+def read_json(request):
+    """Parsed JSON body; raises ValueError for other content types or bad JSON."""
+    if request.content_type != 'application/json':
+        raise ValueError('Content-Type must be application/json')
+    return json.loads(request.body)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class TodoCollectionView(View):
+    async def get(self, request):
+        sync_token = timezone.now() - SYNC_OVERLAP
+        todos = Todo.objects.order_by().values(*FIELDS)
+        deleted = TodoTombstone.objects.none().values_list('todo_id', flat=True)
+
+        since = request.GET.get('since')
+        if since:
+            try:
+                since = parse_datetime(since)
+            except ValueError:
+                since = None
+            if since is None:
+                return _error('Invalid since')
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since, dt_timezone.utc)
+            if since < timezone.now() - TOMBSTONE_RETENTION:
+                return _error('since is older than the tombstone retention; resync', status=410)
+            todos = todos.filter(updated_at__gte=since).order_by('updated_at', 'id')
+            deleted = (
+                TodoTombstone.objects.filter(deleted_at__gte=since)
+                .order_by('deleted_at', 'id')
+                .values_list('todo_id', flat=True)
+            )
+        else:
+            todos = todos.order_by('id')
+
+        return stream_list_response(request, sync_token, todos, deleted)
+
+    async def post(self, request):
+        try:
+            fields = parse_todo(read_json(request))
+        except ValueError as exc:
+            return _error(str(exc))
+        todo = await Todo.objects.acreate(**fields)
+        await ainvalidate_todo_list()
+        return JsonResponse({field: getattr(todo, field) for field in FIELDS}, status=201)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class TodoDetailView(View):
+    async def get(self, request, pk):
+        todo = await Todo.objects.filter(pk=pk).values(*FIELDS).afirst()
+        if todo is None:
+            return _error('Not found', status=404)
+        return JsonResponse(todo)
+
+    async def patch(self, request, pk):
+        try:
+            fields = parse_todo(read_json(request), partial=True)
+        except ValueError as exc:
+            return _error(str(exc))
+        if fields:
+            try:
+                await aupdate_or_404(Todo.objects.filter(pk=pk), **fields)
+            except Http404:
+                return _error('Not found', status=404)
+        return await self.get(request, pk)
+
+    put = patch
+
+    async def delete(self, request, pk):
+        deleted, _ = await Todo.objects.filter(pk=pk).adelete()
+        if not deleted:
+            return _error('Not found', status=404)
+        await ainvalidate_todo_list()
+        return HttpResponse(status=204)
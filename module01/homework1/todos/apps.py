@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class TodosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'todos'
+
+    def ready(self):
+        from django.db.models.signals import post_save
+        from .caching import invalidate_todo_list
+        from .models import Todo
+
+        # Instance saves outside the views (admin, shell) also invalidate the list.
+        # No post_delete receiver: it would stop Django from fast-deleting querysets.
+        post_save.connect(invalidate_todo_list, sender=Todo, dispatch_uid='todos_list_cache')
@@ -0,0 +1,131 @@
+"""Helpers shared by the benchmark management commands."""
+
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from .models import Todo
+
+
+@contextmanager
+def benchmark_database():
+    """Run against a freshly migrated throwaway database, never db.sqlite3."""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def populate_todos(count, batch_size=5_000):
+    """Bulk-create `count` simple todos."""
+    batch = []
+    for i in range(count):
+        batch.append(Todo(
+            title=f'Todo {i}',
+            description=f'Description for todo {i} ' * 4,
+            resolved=i % 3 == 0,
+        ))
+        if len(batch) == batch_size:
+            Todo.objects.bulk_create(batch)
+            batch = []
+    Todo.objects.bulk_create(batch)
+
+
+VERBS = ['Buy', 'Call', 'Email', 'Fix', 'Review', 'Plan', 'Book', 'Pay', 'Clean', 'Write', 'Update', 'Renew']
+OBJECTS = [
+    'groceries', 'dentist', 'landlord', 'car insurance', 'quarterly report', 'birthday gift',
+    'flight tickets', 'electricity bill', 'garage', 'project proposal', 'passport', 'team offsite',
+]
+QUALIFIERS = ['', '', 'today', 'before Friday', 'for mom', 'again', 'ASAP', 'next week', 'with Alex']
+WORDS = (
+    'remember to check the details and confirm with everyone involved before the deadline '
+    'bring documents receipts notes laptop charger keys call back if nobody answers '
+    'compare prices online first ask about discounts schedule a reminder follow up later'
+).split()
+
+
+@contextmanager
+def explicit_timestamps():
+    """Let bulk_create keep created_at/updated_at values set on the instances."""
+    fields = [Todo._meta.get_field('created_at'), Todo._meta.get_field('updated_at')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def fake_todo(rng, now):
+    """One todo with a realistic mix of text length, dates and status."""
+    created_at = now - timedelta(seconds=rng.uniform(0, 365 * 86400))
+    updated_at = created_at
+    if rng.random() < 0.5:
+        updated_at += (now - created_at) * rng.random()
+    due_date = None
+    if rng.random() < 0.7:
+        due_date = created_at.date() + timedelta(days=rng.randint(-3, 60))
+    overdue = due_date is not None and due_date < now.date()
+    sentences = rng.choice([0, 1, 1, 2, 3, 8])
+    return Todo(
+        title=' '.join(filter(None, [rng.choice(VERBS), rng.choice(OBJECTS), rng.choice(QUALIFIERS)])),
+        description=' '.join(
+            ' '.join(rng.choices(WORDS, k=rng.randint(6, 20))).capitalize() + '.' for _ in range(sentences)
+        ),
+        due_date=due_date,
+        resolved=rng.random() < (0.7 if overdue else 0.2),
+        created_at=created_at,
+        updated_at=updated_at,
+    )
+
+
+def generate_todos(count, batch_size=10_000, seed=0, progress=None):
+    """Bulk-create `count` realistic todos, one transaction per batch.
+
+    Instances are built one batch at a time, so memory does not grow with
+    `count`. `progress(created)` is called after each batch.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    created = 0
+    with explicit_timestamps():
+        while created < count:
+            batch = [fake_todo(rng, now) for _ in range(min(batch_size, count - created))]
+            with transaction.atomic():
+                Todo.objects.bulk_create(batch)
+            created += len(batch)
+            if progress:
+                progress(created)
+
+
+def timings(fn, repeat):
+    """Run `fn` `repeat` times; return ({best, median} seconds, last result)."""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return {'best': min(samples), 'median': statistics.median(samples)}, result
+
+
+def best_of(fn, repeat):
+    """Run `fn` `repeat` times; return (best seconds, last result)."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
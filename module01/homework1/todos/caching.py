@@ -0,0 +1,64 @@
+"""
+Caching for the todo list.
+
+Every write bumps a version stored under LIST_STATE_KEY. List pages are
+cached under that version, so a bump invalidates all of them at once without
+having to know which pages a todo appeared on. The same state drives the
+ETag/Last-Modified headers for conditional GETs.
+
+The state lives in the configured cache, so deployments running several
+workers need a shared backend (file-based or Redis) for invalidation to reach
+every worker; see CACHES in todoproject/settings.py.
+"""
+
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import Todo
+
+LIST_STATE_KEY = 'todos:list-state'
+LIST_PAGE_TIMEOUT = 300
+
+
+def _state_from_db(stats):
+    modified = stats['modified'] or timezone.now()
+    return {'version': f"{stats['count']}-{modified.timestamp()}", 'modified': modified}
+
+
+async def alist_state():
+    """Current {'version', 'modified'} of the todo list, derived from the DB on a miss."""
+    state = await cache.aget(LIST_STATE_KEY)
+    if state is None:
+        stats = await Todo.objects.aaggregate(modified=Max('updated_at'), count=Count('id'))
+        state = _state_from_db(stats)
+        await cache.aadd(LIST_STATE_KEY, state, None)
+        state = await cache.aget(LIST_STATE_KEY, state)
+    return state
+
+
+def _new_state():
+    return {'version': uuid.uuid4().hex, 'modified': timezone.now()}
+
+
+def invalidate_todo_list(**kwargs):
+    """Bump the list version; usable directly or as a model signal receiver."""
+    cache.set(LIST_STATE_KEY, _new_state(), None)
+
+
+async def ainvalidate_todo_list():
+    await cache.aset(LIST_STATE_KEY, _new_state(), None)
+
+
+def page_cache_key(request, version):
+    """Cache key for one list page: version + query string (+ today, for overdue)."""
+    query = request.GET.urlencode()
+    digest = hashlib.md5(f'{query}|{timezone.localdate()}'.encode()).hexdigest()
+    return f'todos:list:{version}:{digest}'
+
+
+def list_etag(request, state):
+    return hashlib.md5(page_cache_key(request, state['version']).encode()).hexdigest()
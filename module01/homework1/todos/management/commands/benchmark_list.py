@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from todos.benchmarks import benchmark_database, best_of, populate_todos
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the TODO list view against a throwaway database with many todos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todos', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            populate_todos(options['todos'])
+            self.stdout.write(f"Created {options['todos']} todos")
+            self.run(options['repeat'])
+
+    def measure(self, client, label, url, repeat):
+        seconds, response = best_of(lambda: client.get(url), repeat)
+        self.stdout.write(
+            f'{label:<20} {seconds * 1000:10.1f} ms {len(response.content) / 1024:12.1f} KiB'
+        )
+        return response
+
+    def run(self, repeat):
+        client = Client()
+        response = self.measure(client, 'first page', '/', repeat)
+        cursor = response.context.get('next_cursor') if response.context else None
+        if cursor:
+            self.measure(client, 'second page', f'/?cursor={cursor}', repeat)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from todos.benchmarks import benchmark_database, best_of, populate_todos
+from todos.models import Todo
+from todos.search import search_todos
+
+
+class Command(BaseCommand):
+    help = 'Compare FTS5 search with an icontains scan on a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todos', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--query', default='todo 4242')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            populate_todos(options['todos'])
+            self.stdout.write(f"Created {options['todos']} todos")
+            query = options['query']
+
+            def icontains():
+                return list(
+                    Todo.objects.filter(Q(title__icontains=query) | Q(description__icontains=query))[:50]
+                )
+
+            for label, fn in (('icontains', icontains), ('fts5', lambda: search_todos(query))):
+                seconds, results = best_of(fn, options['repeat'])
+                self.stdout.write(f'{label:<12} {seconds * 1000:10.2f} ms {len(results):6d} results')
@@ -0,0 +1,175 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SERVERS = {
+    # Threaded WSGI: one OS thread per in-flight request
+    'wsgi': lambda port, workers, threads: [
+        sys.executable, '-m', 'gunicorn', 'todoproject.wsgi:application',
+        '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+        '--threads', str(threads), '--log-level', 'warning',
+    ],
+    # Event loop: in-flight requests are coroutines, the ORM runs in a thread pool
+    'asgi': lambda port, workers, threads: [
+        sys.executable, '-m', 'uvicorn', 'todoproject.asgi:application',
+        '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers),
+        '--log-level', 'warning',
+    ],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError(f'Server on port {port} did not start')
+
+
+def process_tree(pid):
+    """`pid` plus every descendant, read from /proc."""
+    children = {}
+    for status in Path('/proc').glob('[0-9]*/status'):
+        try:
+            fields = dict(line.split(':', 1) for line in status.read_text().splitlines() if ':' in line)
+        except OSError:
+            continue
+        children.setdefault(int(fields['PPid']), []).append(int(fields['Pid']))
+    pids, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        pids.append(current)
+        stack.extend(children.get(current, []))
+    return pids
+
+
+def memory_kib(pid, field='VmHWM'):
+    """Sum of `field` (peak RSS by default) over the server's process tree."""
+    total = 0
+    for member in process_tree(pid):
+        try:
+            for line in Path(f'/proc/{member}/status').read_text().splitlines():
+                if line.startswith(field + ':'):
+                    total += int(line.split()[1])
+        except OSError:
+            pass
+    return total
+
+
+async def fetch(port, path):
+    """One keep-alive-free HTTP/1.1 GET; returns the status code."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n'.encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+async def load(port, paths, concurrency, duration):
+    """Keep `concurrency` requests in flight for `duration` seconds."""
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    async def worker(offset):
+        nonlocal errors
+        i = offset
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                status = await fetch(port, paths[i % len(paths)])
+            except OSError:
+                status = None
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+            i += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors, time.monotonic() - started
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
+
+
+class Command(BaseCommand):
+    help = 'Load-test the todo views under a WSGI (gunicorn) and an ASGI (uvicorn) server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todos', type=int, default=1_000)
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 100, 500])
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+        parser.add_argument('--servers', nargs='+', choices=SERVERS, default=list(SERVERS))
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, TODO_DATABASE_NAME=str(Path(tmp) / 'load.sqlite3'))
+            self.prepare(env, options['todos'])
+            # List pages (served from the page cache after their first hit) mixed
+            # with edit forms, which always read the database
+            paths = [f'/?page_size={size}' for size in range(10, 60)]
+            paths += [f'/edit/{pk}/' for pk in range(1, 51)]
+
+            self.stdout.write(
+                f"{'server':<6} {'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+                f"{'errors':>7} {'peak RSS MiB':>13}"
+            )
+            for name in options['servers']:
+                for concurrency in options['concurrency']:
+                    self.run(name, env, paths, concurrency, options)
+
+    def prepare(self, env, count):
+        """Migrate and fill the throwaway database in a child process."""
+        manage = [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py')]
+        subprocess.run(manage + ['migrate', '--verbosity', '0'], env=env, check=True)
+        subprocess.run(
+            manage + ['shell', '-c', f'from todos.benchmarks import populate_todos; populate_todos({count})'],
+            env=env, check=True,
+        )
+
+    def run(self, name, env, paths, concurrency, options):
+        port = free_port()
+        command = SERVERS[name](port, options['workers'], options['threads'])
+        try:
+            server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+        except FileNotFoundError as exc:
+            raise CommandError(f'{name} server not available: {exc}')
+        try:
+            wait_for_port(port)
+            latencies, errors, elapsed = asyncio.run(
+                load(port, paths, concurrency, options['duration'])
+            )
+            peak = memory_kib(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+
+        self.stdout.write(
+            f'{name:<6} {concurrency:>5} {len(latencies) / elapsed:>9.1f} '
+            f'{percentile(latencies, 0.5) * 1000:>8.1f} {percentile(latencies, 0.99) * 1000:>8.1f} '
+            f'{errors:>7} {peak / 1024:>13.1f}'
+        )
@@ -0,0 +1,114 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from todos.models import Todo
+
+# Environment for each configuration under test; see DATABASES in settings.py
+CONFIGS = {
+    'default': {'TODO_DB_TUNING': '0'},
+    'tuned': {'TODO_DB_TUNING': '1'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure concurrent write throughput and lock errors with default vs tuned SQLite settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8)
+        parser.add_argument('--writes', type=int, default=300, help='writes per process')
+        parser.add_argument('--todos', type=int, default=1_000)
+        parser.add_argument('--configs', nargs='+', choices=CONFIGS, default=list(CONFIGS))
+        # Internal: run as one writer process against an existing database
+        parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+        parser.add_argument('--start-at', type=float, help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['worker'] is not None:
+            return self.worker(options)
+
+        self.stdout.write(
+            f"{'config':<8} {'writes/s':>9} {'ok':>7} {'locked':>7} {'p99 ms':>8} {'connect ms':>11}"
+        )
+        for name in options['configs']:
+            with tempfile.TemporaryDirectory() as tmp:
+                env = dict(os.environ, TODO_DATABASE_NAME=str(Path(tmp) / 'bench.sqlite3'), **CONFIGS[name])
+                self.prepare(env, options['todos'])
+                self.run(name, env, options)
+
+    def manage(self):
+        return [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py')]
+
+    def prepare(self, env, count):
+        """Migrate and fill a throwaway database with the configuration's settings."""
+        subprocess.run(self.manage() + ['migrate', '--verbosity', '0'], env=env, check=True)
+        subprocess.run(
+            self.manage() + ['shell', '-c', f'from todos.benchmarks import populate_todos; populate_todos({count})'],
+            env=env, check=True,
+        )
+
+    def run(self, name, env, options):
+        start_at = time.time() + 2
+        workers = [
+            subprocess.Popen(
+                self.manage() + [
+                    'benchmark_sqlite', '--worker', str(i), '--writes', str(options['writes']),
+                    '--todos', str(options['todos']), '--start-at', str(start_at),
+                ],
+                env=env, stdout=subprocess.PIPE, text=True,
+            )
+            for i in range(options['processes'])
+        ]
+        results = [json.loads(worker.communicate()[0].strip().splitlines()[-1]) for worker in workers]
+
+        elapsed = max(r['finished'] for r in results) - start_at
+        ok = sum(r['ok'] for r in results)
+        locked = sum(r['locked'] for r in results)
+        latencies = sorted(latency for r in results for latency in r['latencies'])
+        p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] if latencies else 0.0
+        connect = sum(r['connect'] for r in results) / len(results)
+        self.stdout.write(
+            f'{name:<8} {ok / elapsed:>9.1f} {ok:>7} {locked:>7} {p99 * 1000:>8.1f} {connect * 1000:>11.1f}'
+        )
+
+    def worker(self, options):
+        """Simulate requests that read a todo and then write, like the HTML views."""
+        time.sleep(max(0.0, options['start_at'] - time.time()))
+        ok = locked = 0
+        latencies = []
+        connect = 0.0
+        for i in range(options['writes']):
+            pk = (options['worker'] * options['writes'] + i) % options['todos'] + 1
+            started = time.perf_counter()
+            if connection.connection is None:
+                connection.ensure_connection()
+                connect += time.perf_counter() - started
+            try:
+                with transaction.atomic():
+                    todo = Todo.objects.filter(pk=pk).first()
+                    if todo is None or i % 4 == 0:
+                        Todo.objects.create(title=f'Worker {options["worker"]} todo {i}')
+                    else:
+                        Todo.objects.filter(pk=pk).update(resolved=not todo.resolved, updated_at=timezone.now())
+                ok += 1
+                latencies.append(time.perf_counter() - started)
+            except OperationalError as exc:
+                if 'locked' not in str(exc):
+                    raise
+                locked += 1
+            # End of "request": closes the connection unless CONN_MAX_AGE keeps it
+            close_old_connections()
+        self.stdout.write(json.dumps({
+            'ok': ok, 'locked': locked, 'latencies': latencies,
+            'connect': connect, 'finished': time.time(),
+        }))
@@ -0,0 +1,165 @@
+import json
+import platform
+import sqlite3
+import subprocess
+import time
+from datetime import timedelta
+from itertools import count
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.test import Client
+from django.utils import timezone
+
+from todos.benchmarks import benchmark_database, generate_todos, timings
+from todos.models import Todo
+
+BULK_SIZE = 500
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Scenarios:
+    """Requests timed at every dataset size; each method returns one response."""
+
+    def __init__(self, client):
+        self.client = client
+        # Mutations take fresh pks from the top so repeats never hit a deleted todo
+        self.pks = count(Todo.objects.aggregate(top=Max('id'))['top'], -1)
+
+    def get(self, url, params=None):
+        # Time the queries, not the page cache
+        cache.clear()
+        return self.client.get(url, params)
+
+    def list_first_page(self):
+        return self.get('/')
+
+    def list_deep_page(self):
+        second = self.get('/').context['next_cursor']
+        return self.get('/', {'cursor': second})
+
+    def filter_open(self):
+        return self.get('/', {'status': 'open'})
+
+    def filter_overdue(self):
+        return self.get('/', {'overdue': '1'})
+
+    def filter_due_range(self):
+        # The quarter up to today; generate_todos spreads due dates over the past year
+        today = timezone.localdate()
+        return self.get('/', {'due_after': (today - timedelta(days=90)).isoformat(), 'due_before': today.isoformat()})
+
+    def search(self):
+        return self.get('/search/', {'q': 'insurance renew'})
+
+    def toggle(self):
+        return self.client.post(f'/toggle/{next(self.pks)}/')
+
+    def update(self):
+        return self.client.post(f'/update/{next(self.pks)}/', {'title': 'Benchmark update'})
+
+    def bulk_resolve(self):
+        pks = [next(self.pks) for _ in range(BULK_SIZE)]
+        return self.client.post('/bulk/', {'action': 'resolve', 'pks': pks})
+
+    def delete(self):
+        return self.client.post(f'/delete/{next(self.pks)}/')
+
+    def bulk_delete(self):
+        pks = [next(self.pks) for _ in range(BULK_SIZE)]
+        return self.client.post('/bulk/', {'action': 'delete', 'pks': pks})
+
+
+SCENARIOS = [name for name in vars(Scenarios) if not name.startswith('_') and name != 'get']
+
+
+class Command(BaseCommand):
+    help = 'Time list, filter, search and mutation views at several dataset sizes and write JSON results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+        parser.add_argument('--output', help='results file (default: benchmarks-<commit>.json)')
+        parser.add_argument('--compare', help='earlier results file to compare against')
+
+    def handle(self, *args, **options):
+        commit = git_commit()
+        report = {
+            'commit': commit,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'machine': platform.machine(),
+            'repeat': options['repeat'],
+            'results': [],
+        }
+
+        with benchmark_database():
+            client = Client()
+            generated = 0
+            for size in sorted(options['sizes']):
+                started = time.perf_counter()
+                generate_todos(size - generated, seed=size)
+                generated = size
+                self.stdout.write(f'{size:,} todos (generated in {time.perf_counter() - started:.1f} s)')
+                report['results'] += self.run(client, size, options)
+
+        output = options['output'] or f"benchmarks-{commit or 'local'}.json"
+        with open(output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {output}'))
+
+        if options['compare']:
+            self.compare(report, options['compare'])
+
+    def run(self, client, size, options):
+        scenarios = Scenarios(client)
+        results = []
+        for name in options['scenarios']:
+            seconds, response = timings(getattr(scenarios, name), options['repeat'])
+            if response.status_code >= 400:
+                raise CommandError(f'{name} returned {response.status_code}')
+            stats = response.request_stats
+            result = {
+                'size': size,
+                'scenario': name,
+                'best_ms': round(seconds['best'] * 1000, 3),
+                'median_ms': round(seconds['median'] * 1000, 3),
+                'queries': stats.queries,
+                'db_ms': round(stats.db_ms, 3),
+                'response_bytes': stats.response_bytes,
+            }
+            results.append(result)
+            self.stdout.write(
+                f"  {name:<18} {result['best_ms']:10.2f} ms best {result['median_ms']:10.2f} ms median "
+                f"{result['queries']:3d} queries"
+            )
+        return results
+
+    def compare(self, report, path):
+        with open(path) as fh:
+            baseline = json.load(fh)
+        before = {(r['size'], r['scenario']): r for r in baseline['results']}
+        self.stdout.write(f"Median vs {baseline.get('commit') or path}:")
+        for result in report['results']:
+            old = before.get((result['size'], result['scenario']))
+            if old and old['median_ms']:
+                ratio = result['median_ms'] / old['median_ms']
+                self.stdout.write(
+                    f"  {result['size']:>10,} {result['scenario']:<18} "
+                    f"{old['median_ms']:10.2f} -> {result['median_ms']:10.2f} ms ({ratio:.2f}x)"
+                )
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from todos.benchmarks import generate_todos
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-generate realistic todos in the configured database '
+        '(point TODO_DATABASE_NAME elsewhere to keep them out of db.sqlite3)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('count', type=int)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        count = options['count']
+        started = time.perf_counter()
+
+        def progress(created):
+            if created % (options['batch_size'] * 10) == 0 or created == count:
+                rate = created / (time.perf_counter() - started)
+                self.stdout.write(f'{created:>12,} / {count:,} todos ({rate:,.0f}/s)')
+
+        generate_todos(count, batch_size=options['batch_size'], seed=options['seed'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {count:,} todos in {connection.settings_dict['NAME']}"
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from todos.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for todos'
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            self.stdout.write('Full-text search needs SQLite; nothing to rebuild')
+            return
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS('Rebuilt todo search index'))
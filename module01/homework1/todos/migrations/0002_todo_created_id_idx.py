@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['-created_at', 'id'], name='todo_created_id_idx'),
+        ),
+    ]
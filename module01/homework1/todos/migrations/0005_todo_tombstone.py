@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:20
+
+from django.db import migrations, models
+
+# SQLite's %f has millisecond precision; padding with 999 rounds the timestamp
+# up, so a deletion is never recorded as earlier than a sync token handed out
+# before it (at worst a client sees the tombstone twice).
+CREATE_SQL = [
+    """
+    CREATE TRIGGER todos_todo_tombstone AFTER DELETE ON todos_todo BEGIN
+        INSERT INTO todos_todotombstone(todo_id, deleted_at)
+        VALUES (old.id, strftime('%Y-%m-%d %H:%M:%f', 'now') || '999');
+    END
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS todos_todo_tombstone",
+]
+
+
+def run_sqlite(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0004_todo_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TodoTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('todo_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['updated_at', 'id'], name='todo_updated_id_idx'),
+        ),
+        migrations.RunPython(run_sqlite(CREATE_SQL), run_sqlite(DROP_SQL)),
+    ]
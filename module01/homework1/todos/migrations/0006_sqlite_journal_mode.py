@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def set_journal_mode(apps, schema_editor):
+    # Stored in the database file: set once here, not by every connection
+    if schema_editor.connection.vendor != 'sqlite' or not settings.SQLITE_JOURNAL_MODE:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}')
+
+
+class Migration(migrations.Migration):
+    # journal_mode cannot change inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('todos', '0005_todo_tombstone'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_journal_mode, migrations.RunPython.noop),
+    ]
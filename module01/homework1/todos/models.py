@@ -15,3 +15,26 @@ class Todo(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination orders used by TodoListView and its filters
+            models.Index(fields=['-created_at', 'id'], name='todo_created_id_idx'),
+            models.Index(fields=['resolved', '-created_at', 'id'], name='todo_resolved_created_idx'),
+            models.Index(fields=['resolved', 'due_date', 'id'], name='todo_resolved_due_idx'),
+            models.Index(fields=['due_date', 'id'], name='todo_due_id_idx'),
+            # `?since=` incremental sync in the JSON API
+            models.Index(fields=['updated_at', 'id'], name='todo_updated_id_idx'),
+        ]
+
+
+class TodoTombstone(models.Model):
+    """Records a deleted todo so the JSON API can report deletions to syncing clients.
+
+    Rows are written by a database trigger on todos_todo (migration 0005), so
+    queryset deletes stay single-statement and deletes from the admin or shell
+    are recorded as well.
+    """
+    todo_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f'Todo {self.todo_id} deleted at {self.deleted_at}'
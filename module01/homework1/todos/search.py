@@ -0,0 +1,86 @@
+"""
+Full-text search over todo titles and descriptions.
+
+On SQLite, an FTS5 external-content table (`todos_todo_fts`, created in
+migration 0004) indexes `todos_todo` and is kept in sync by triggers, so
+bulk_create and queryset updates are covered too. Other databases fall back
+to an `icontains` filter.
+"""
+
+import re
+import secrets
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Todo
+
+FTS_TABLE = 'todos_todo_fts'
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    return ' '.join(f'"{token}"*' for token in _TOKEN.findall(text))
+
+
+def _markers():
+    """Match markers for one query, replaced with <mark> tags after escaping.
+
+    A fresh random nonce per query means stored text (which may hold any
+    character, control characters included) can never contain a marker.
+    """
+    nonce = secrets.token_hex(8)
+    return f'\x02{nonce}\x02', f'\x03{nonce}\x03'
+
+
+def _highlight(text, open_marker, close_marker):
+    return mark_safe(escape(text).replace(open_marker, '<mark>').replace(close_marker, '</mark>'))
+
+
+def search_todos(text, limit=50):
+    """Return todos matching `text`, best match first, with highlighted fields."""
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    if not fts_available():
+        todos = Todo.objects.filter(Q(title__icontains=text) | Q(description__icontains=text))[:limit]
+        for todo in todos:
+            todo.title_highlighted = todo.title
+            todo.snippet = todo.description
+        return list(todos)
+
+    open_marker, close_marker = _markers()
+    todos = Todo.objects.raw(
+        f'''
+        SELECT t.id, t.title, t.due_date, t.resolved, t.created_at,
+               highlight({FTS_TABLE}, 0, %s, %s) AS title_highlighted,
+               snippet({FTS_TABLE}, 1, %s, %s, '...', 16) AS snippet
+        FROM {FTS_TABLE}
+        JOIN todos_todo t ON t.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s
+        ORDER BY bm25({FTS_TABLE}, 10.0, 1.0)
+        LIMIT %s
+        ''',
+        [open_marker, close_marker, open_marker, close_marker, match, limit],
+    )
+    results = list(todos)
+    for todo in results:
+        todo.title_highlighted = _highlight(todo.title_highlighted, open_marker, close_marker)
+        todo.snippet = _highlight(todo.snippet, open_marker, close_marker)
+    return results
+
+
+def rebuild_index():
+    """Repopulate the FTS index from todos_todo."""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
@@ -1,7 +1,18 @@
-from django.test import TestCase, Client
+import json
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from todoproject.instrumentation import QueryBudgetTestMixin, budget_stats
 from .models import Todo
-from datetime import date
+from datetime import date, timedelta
 
 # Create your tests here.
 
@@ -113,7 +124,535 @@ class TodoViewTests(TestCase):
         self.assertEqual(todos[0].title, "Second TODO")
         self.assertEqual(todos[1].title, "First TODO")
 
+    def test_todo_list_pagination(self):
+        """Test keyset pagination walks every TODO exactly once"""
+        for i in range(5):
+            Todo.objects.create(title=f"TODO {i}")
+
+        response = self.client.get(reverse('todo_list'), {'page_size': 2})
+        seen = [todo.title for todo in response.context['todos']]
+        while response.context['next_cursor']:
+            response = self.client.get(reverse('todo_list'), {
+                'page_size': 2,
+                'cursor': response.context['next_cursor'],
+            })
+            seen += [todo.title for todo in response.context['todos']]
+
+        self.assertEqual(seen, [f"TODO {i}" for i in reversed(range(5))])
+
+    def test_todo_list_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get(reverse('todo_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_todo_list_truncates_description(self):
+        """Test that the list renders a summary and no inline edit form"""
+        Todo.objects.create(title="Long TODO", description="x" * 500)
+
+        response = self.client.get(reverse('todo_list'))
+        self.assertContains(response, "x" * 200 + "&hellip;")
+        self.assertNotContains(response, "x" * 201)
+        self.assertNotContains(response, "Edit TODO")
+
+    def test_edit_form_view(self):
+        """Test that the edit form is rendered on demand"""
+        todo = Todo.objects.create(title="Editable", description="Full description")
+
+        response = self.client.get(reverse('todo_edit_form', args=[todo.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Edit TODO")
+        self.assertContains(response, "Full description")
+
     def test_get_nonexistent_todo(self):
         """Test accessing a TODO that doesn't exist"""
         response = self.client.post(reverse('todo_delete', args=[999]))
         self.assertEqual(response.status_code, 404)
+
+class TodoFilterTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        today = timezone.localdate()
+        self.open_todo = Todo.objects.create(title="Open TODO", due_date=today + timedelta(days=3))
+        self.overdue_todo = Todo.objects.create(title="Overdue TODO", due_date=today - timedelta(days=2))
+        self.resolved_todo = Todo.objects.create(
+            title="Resolved TODO", due_date=today - timedelta(days=5), resolved=True
+        )
+        self.undated_todo = Todo.objects.create(title="Undated TODO")
+
+    def titles(self, params):
+        response = self.client.get(reverse('todo_list'), params)
+        self.assertEqual(response.status_code, 200)
+        return [todo.title for todo in response.context['todos']]
+
+    def query_plan(self, params):
+        """EXPLAIN QUERY PLAN for the list query the view actually ran"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('todo_list'), params)
+        sql = next(q['sql'] for q in queries if 'FROM "todos_todo"' in q['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return ' '.join(row[-1] for row in cursor.fetchall())
+
+    def test_status_filters(self):
+        """Test open and resolved views"""
+        self.assertEqual(self.titles({'status': 'open'}), ["Undated TODO", "Overdue TODO", "Open TODO"])
+        self.assertEqual(self.titles({'status': 'resolved'}), ["Resolved TODO"])
+
+    def test_overdue_filter(self):
+        """Test that overdue shows unresolved TODOs past their due date"""
+        self.assertEqual(self.titles({'overdue': '1'}), ["Overdue TODO"])
+
+    def test_due_date_range_filter(self):
+        """Test due date range filtering ordered by due date"""
+        today = timezone.localdate()
+        params = {'due_after': (today - timedelta(days=5)).isoformat(), 'due_before': today.isoformat()}
+        self.assertEqual(self.titles(params), ["Resolved TODO", "Overdue TODO"])
+        params['status'] = 'open'
+        self.assertEqual(self.titles(params), ["Overdue TODO"])
+
+    def test_filtered_pagination(self):
+        """Test that cursors follow the due date order of filtered views"""
+        params = {'due_after': '2000-01-01', 'page_size': 1}
+        response = self.client.get(reverse('todo_list'), params)
+        seen = [todo.title for todo in response.context['todos']]
+        while response.context['next_cursor']:
+            response = self.client.get(reverse('todo_list'), {**params, 'cursor': response.context['next_cursor']})
+            seen += [todo.title for todo in response.context['todos']]
+        self.assertEqual(seen, ["Resolved TODO", "Overdue TODO", "Open TODO"])
+
+    def test_invalid_filters(self):
+        """Test that invalid filter values are rejected"""
+        self.assertEqual(self.client.get(reverse('todo_list'), {'status': 'done'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('todo_list'), {'due_after': 'soon'}).status_code, 400)
+
+    def test_filters_use_indexes(self):
+        """Test that every filter seeks an index instead of scanning and sorting"""
+        today = timezone.localdate().isoformat()
+        for params in (
+            {'status': 'open'},
+            {'status': 'resolved'},
+            {'overdue': '1'},
+            {'due_after': '2000-01-01', 'due_before': today},
+            {'status': 'open', 'due_before': today},
+        ):
+            plan = self.query_plan(params)
+            self.assertIn('SEARCH todos_todo USING INDEX', plan, params)
+            self.assertNotIn('TEMP B-TREE', plan, params)
+
+class TodoSearchTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        Todo.objects.create(title="Buy groceries", description="Milk, eggs and bread")
+        Todo.objects.create(title="Write report", description="Quarterly groceries budget")
+        Todo.objects.create(title="Call plumber", description="Kitchen sink <leaks>")
+
+    def search(self, query):
+        response = self.client.get(reverse('todo_search'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_search_ranks_title_matches_first(self):
+        """Test that title matches outrank description matches"""
+        results = self.search("groceries").context['results']
+        self.assertEqual([todo.title for todo in results], ["Buy groceries", "Write report"])
+
+    def test_search_highlights_matches(self):
+        """Test that matched terms are highlighted and other text is escaped"""
+        self.assertContains(self.search("groc"), "Buy <mark>groceries</mark>")
+        self.assertContains(self.search("sink"), "Kitchen <mark>sink</mark> &lt;leaks&gt;")
+
+    def test_search_escapes_stored_marker_characters(self):
+        """Test that control characters in stored text cannot inject markup"""
+        Todo.objects.create(title="Fix \x02<b>urgent</b>\x03 gate", description="")
+        [todo] = self.search("gate").context['results']
+        self.assertEqual(todo.title_highlighted.count("<mark>"), 1)
+        self.assertIn("&lt;b&gt;urgent&lt;/b&gt;\x03 <mark>gate</mark>", todo.title_highlighted)
+
+    def test_search_tracks_updates_and_deletes(self):
+        """Test that the index follows edits, bulk updates and deletes"""
+        todo = Todo.objects.get(title="Call plumber")
+        self.client.post(reverse('todo_update', args=[todo.pk]), {'title': 'Call electrician'})
+        self.assertEqual(len(self.search("plumber").context['results']), 0)
+        self.assertEqual(len(self.search("electrician").context['results']), 1)
+
+        Todo.objects.filter(pk=todo.pk).update(title="Call roofer")
+        self.assertEqual(len(self.search("roofer").context['results']), 1)
+
+        Todo.objects.filter(pk=todo.pk).delete()
+        self.assertEqual(len(self.search("roofer").context['results']), 0)
+
+    def test_search_ignores_query_syntax(self):
+        """Test that FTS operators in user input cannot break the query"""
+        self.assertEqual(len(self.search('"groceries -(').context['results']), 2)
+        self.assertEqual(len(self.search('***').context['results']), 0)
+
+    def test_rebuild_search_index(self):
+        """Test rebuilding the index with the management command"""
+        out = StringIO()
+        call_command('rebuild_todo_search', stdout=out)
+        self.assertIn("Rebuilt", out.getvalue())
+        self.assertEqual(len(self.search("bread").context['results']), 1)
+
+class TodoMutationQueryTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.todos = [Todo.objects.create(title=f"TODO {i}") for i in range(3)]
+        self.pks = [todo.pk for todo in self.todos]
+
+    def test_single_item_views_use_one_query(self):
+        """Test that update, toggle and delete each issue a single query"""
+        todo = self.todos[0]
+        with self.assertNumQueries(1):
+            self.client.post(reverse('todo_update', args=[todo.pk]), {'title': 'Renamed'})
+        with self.assertNumQueries(1):
+            self.client.post(reverse('todo_toggle', args=[todo.pk]))
+        with self.assertNumQueries(1):
+            self.client.post(reverse('todo_delete', args=[todo.pk]))
+        self.assertFalse(Todo.objects.filter(pk=todo.pk).exists())
+
+    def test_update_keeps_missing_fields(self):
+        """Test that fields absent from the form are left unchanged"""
+        todo = Todo.objects.create(title="Keep me", description="Original")
+        self.client.post(reverse('todo_update', args=[todo.pk]), {'due_date': '2025-12-31'})
+        todo.refresh_from_db()
+        self.assertEqual(todo.title, "Keep me")
+        self.assertEqual(todo.description, "Original")
+        self.assertEqual(todo.due_date, date(2025, 12, 31))
+
+    def test_update_bumps_updated_at(self):
+        """Test that single-statement updates still refresh updated_at"""
+        todo = self.todos[0]
+        before = todo.updated_at
+        self.client.post(reverse('todo_toggle', args=[todo.pk]))
+        todo.refresh_from_db()
+        self.assertGreater(todo.updated_at, before)
+
+    def test_missing_todo_returns_404(self):
+        """Test that update and toggle of a missing TODO return 404"""
+        self.assertEqual(self.client.post(reverse('todo_update', args=[999])).status_code, 404)
+        self.assertEqual(self.client.post(reverse('todo_toggle', args=[999])).status_code, 404)
+
+    def test_bulk_resolve_and_unresolve(self):
+        """Test resolving and unresolving many TODOs in one query"""
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse('todo_bulk'), {'action': 'resolve', 'pks': self.pks[:2]})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Todo.objects.filter(resolved=True).count(), 2)
+
+        with self.assertNumQueries(1):
+            self.client.post(reverse('todo_bulk'), {'action': 'unresolve', 'pks': self.pks})
+        self.assertEqual(Todo.objects.filter(resolved=True).count(), 0)
+
+    def test_bulk_toggle(self):
+        """Test toggling mixed TODOs flips each one"""
+        Todo.objects.filter(pk=self.pks[0]).update(resolved=True)
+        with self.assertNumQueries(1):
+            self.client.post(reverse('todo_bulk'), {'action': 'toggle', 'pks': self.pks})
+        self.assertEqual(
+            list(Todo.objects.filter(pk__in=self.pks).order_by('pk').values_list('resolved', flat=True)),
+            [False, True, True],
+        )
+
+    def test_bulk_reschedule(self):
+        """Test moving many TODOs to a new due date"""
+        with self.assertNumQueries(1):
+            self.client.post(reverse('todo_bulk'), {
+                'action': 'reschedule', 'pks': self.pks, 'due_date': '2026-01-15'
+            })
+        self.assertEqual(Todo.objects.filter(due_date=date(2026, 1, 15)).count(), 3)
+
+    def test_bulk_delete(self):
+        """Test deleting many TODOs in one query"""
+        with self.assertNumQueries(1):
+            self.client.post(reverse('todo_bulk'), {'action': 'delete', 'pks': self.pks[1:]})
+        self.assertEqual(list(Todo.objects.values_list('pk', flat=True)), [self.pks[0]])
+
+    def test_bulk_rejects_invalid_input(self):
+        """Test that unknown actions and malformed pks are rejected"""
+        self.assertEqual(
+            self.client.post(reverse('todo_bulk'), {'action': 'archive', 'pks': self.pks}).status_code, 400
+        )
+        self.assertEqual(
+            self.client.post(reverse('todo_bulk'), {'action': 'resolve', 'pks': ['x']}).status_code, 400
+        )
+        self.assertEqual(
+            self.client.post(reverse('todo_bulk'), {
+                'action': 'reschedule', 'pks': self.pks, 'due_date': 'tomorrow'
+            }).status_code, 400
+        )
+
+class TodoListCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.todo = Todo.objects.create(title="Cached TODO")
+
+    def test_repeat_list_served_from_cache(self):
+        """Test that an unchanged list page needs no queries"""
+        self.client.get(reverse('todo_list'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('todo_list'))
+        self.assertContains(response, "Cached TODO")
+
+    def test_writes_invalidate_cached_list(self):
+        """Test that every mutation view refreshes the cached page"""
+        self.client.get(reverse('todo_list'))
+
+        self.client.post(reverse('todo_toggle', args=[self.todo.pk]))
+        self.assertContains(self.client.get(reverse('todo_list')), "Unresolve")
+
+        self.client.post(reverse('todo_update', args=[self.todo.pk]), {'title': 'Renamed TODO'})
+        self.assertContains(self.client.get(reverse('todo_list')), "Renamed TODO")
+
+        self.client.post(reverse('todo_create'), {'title': 'Another TODO'})
+        self.assertContains(self.client.get(reverse('todo_list')), "Another TODO")
+
+        self.client.post(reverse('todo_delete', args=[self.todo.pk]))
+        self.assertNotContains(self.client.get(reverse('todo_list')), "Renamed TODO")
+
+    def test_etag_returns_not_modified(self):
+        """Test conditional GETs with ETag and Last-Modified"""
+        response = self.client.get(reverse('todo_list'))
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(reverse('todo_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.client.post(reverse('todo_toggle', args=[self.todo.pk]))
+        response = self.client.get(reverse('todo_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_differs_per_page(self):
+        """Test that filtered views have their own ETag"""
+        all_etag = self.client.get(reverse('todo_list'))['ETag']
+        open_etag = self.client.get(reverse('todo_list'), {'status': 'open'})['ETag']
+        self.assertNotEqual(all_etag, open_etag)
+
+
+class TodoAsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    async def test_views_run_on_async_client(self):
+        """Test the async views end to end through AsyncClient"""
+        client = AsyncClient()
+        await client.post(reverse('todo_create'), {'title': 'Async TODO'})
+        todo = await Todo.objects.aget(title='Async TODO')
+
+        response = await client.get(reverse('todo_list'))
+        self.assertContains(response, 'Async TODO')
+
+        await client.post(reverse('todo_toggle', args=[todo.pk]))
+        await todo.arefresh_from_db()
+        self.assertTrue(todo.resolved)
+
+        response = await client.get(reverse('todo_edit_form', args=[todo.pk]))
+        self.assertEqual(response.status_code, 200)
+
+        await client.post(reverse('todo_delete', args=[todo.pk]))
+        self.assertFalse(await Todo.objects.filter(pk=todo.pk).aexists())
+        response = await client.get(reverse('todo_edit_form', args=[todo.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class TodoApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.todo = Todo.objects.create(title="API TODO", due_date=date(2026, 1, 2))
+
+    def get_list(self, **params):
+        response = self.client.get(reverse('api_todo_list'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_list_streams_all_todos(self):
+        """Test that the list endpoint streams every todo as JSON"""
+        Todo.objects.create(title="Second TODO")
+        data = self.get_list()
+        self.assertEqual([t['title'] for t in data['todos']], ["API TODO", "Second TODO"])
+        self.assertEqual(data['todos'][0]['due_date'], '2026-01-02')
+        self.assertEqual(data['deleted'], [])
+        self.assertIn('sync_token', data)
+
+    def test_since_returns_changes_and_tombstones(self):
+        """Test incremental sync with updates, creates and deletes"""
+        since = (timezone.now() - timedelta(seconds=1)).isoformat()
+        old = Todo.objects.filter(pk=self.todo.pk)
+        old.update(updated_at=timezone.now() - timedelta(days=1))
+        kept = Todo.objects.create(title="Kept TODO")
+        gone = Todo.objects.create(title="Gone TODO")
+        gone_pk = gone.pk
+        gone.delete()
+
+        data = self.get_list(since=since)
+        self.assertEqual([t['id'] for t in data['todos']], [kept.pk])
+        self.assertEqual(data['deleted'], [gone_pk])
+
+    def test_since_validation(self):
+        """Test rejecting malformed and expired sync tokens"""
+        response = self.client.get(reverse('api_todo_list'), {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+        expired = (timezone.now() - timedelta(days=365)).isoformat()
+        response = self.client.get(reverse('api_todo_list'), {'since': expired})
+        self.assertEqual(response.status_code, 410)
+
+    def test_create_update_delete(self):
+        """Test the JSON write endpoints"""
+        response = self.client.post(
+            reverse('api_todo_list'), {'title': 'Created', 'resolved': True},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        pk = response.json()['id']
+        self.assertTrue(Todo.objects.get(pk=pk).resolved)
+
+        url = reverse('api_todo_detail', args=[pk])
+        response = self.client.patch(url, {'description': 'Patched'}, content_type='application/json')
+        self.assertEqual(response.json()['description'], 'Patched')
+        self.assertEqual(response.json()['title'], 'Created')
+
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+
+    def test_write_validation(self):
+        """Test that invalid bodies and form posts are rejected"""
+        url = reverse('api_todo_list')
+        self.assertEqual(self.client.post(url, {'title': ''}, content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.post(url, {'title': 'Form post'}).status_code, 400)
+        response = self.client.patch(
+            reverse('api_todo_detail', args=[self.todo.pk]), {'resolved': 'yes'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(reverse('api_todo_detail', args=[999])).status_code, 404)
+
+    async def test_list_streams_under_asgi(self):
+        """Test that ASGI requests get an async iterator instead of a buffered one"""
+        response = await AsyncClient().get(reverse('api_todo_list'))
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(json.loads(content)['todos'][0]['title'], "API TODO")
+
+
+class TodoQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        budget_stats.clear()
+        self.client = Client()
+        for i in range(30):
+            Todo.objects.create(title=f"Budget TODO {i}", description="Details " * 50)
+        self.todo = Todo.objects.first()
+
+    def test_views_stay_within_query_budget(self):
+        """Test that query counts do not grow with the number of todos"""
+        self.assertWithinBudget(self.client.get(reverse('todo_list')), queries=2)
+        self.assertWithinBudget(self.client.get(reverse('todo_list')), queries=1)
+        self.assertWithinBudget(self.client.get(reverse('todo_list'), {'status': 'open'}), queries=1)
+        self.assertWithinBudget(self.client.get(reverse('todo_search'), {'q': 'budget'}), queries=1)
+        self.assertWithinBudget(self.client.get(reverse('todo_edit_form', args=[self.todo.pk])), queries=1)
+        self.assertWithinBudget(self.client.post(reverse('todo_toggle', args=[self.todo.pk])), queries=1)
+        self.assertWithinBudget(self.client.post(reverse('todo_create'), {'title': 'New'}), queries=1)
+
+    def test_records_db_and_template_time(self):
+        """Test the recorded per-request stats"""
+        stats = self.client.get(reverse('todo_list')).request_stats
+        self.assertEqual(stats.view, 'todo_list')
+        self.assertGreater(stats.queries, 0)
+        self.assertGreater(stats.db_ms, 0)
+        self.assertGreater(stats.template_ms, 0)
+        self.assertGreater(stats.response_bytes, 0)
+
+    def test_assert_within_budget_fails_over_budget(self):
+        """Test that the helper reports the exceeded limit"""
+        response = self.client.get(reverse('todo_list'))
+        with self.assertRaisesMessage(AssertionError, 'todo_list: queries is'):
+            self.assertWithinBudget(response, queries=0)
+
+    def test_over_budget_requests_are_logged(self):
+        """Test logging requests that exceed the configured budget"""
+        with self.settings(REQUEST_BUDGET={'queries': 0}):
+            with self.assertLogs('todoproject.budget', 'WARNING') as logs:
+                self.client.get(reverse('todo_list'))
+        self.assertIn('queries', logs.output[0])
+
+    def test_stats_endpoint(self):
+        """Test the internal per-view aggregates"""
+        self.client.get(reverse('todo_list'))
+        self.client.get(reverse('todo_list'))
+        with self.settings(DEBUG=True):
+            data = self.client.get(reverse('internal_stats')).json()
+            response = self.client.get(reverse('internal_stats'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(data['views']['todo_list']['requests'], 2)
+        self.assertIn('queries', data['budget'])
+        self.assertEqual(response.status_code, 404)
+
+    def test_stats_endpoint_needs_staff_without_debug(self):
+        """Test that an internal IP alone is not enough outside DEBUG (e.g. behind a proxy)"""
+        self.assertEqual(self.client.get(reverse('internal_stats')).status_code, 404)
+
+        self.client.force_login(User.objects.create_user('viewer', password='x'))
+        self.assertEqual(self.client.get(reverse('internal_stats')).status_code, 404)
+
+        self.client.force_login(User.objects.create_user('admin', password='x', is_staff=True))
+        response = self.client.get(reverse('internal_stats'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 200)
+
+    def test_unresolved_paths_share_one_aggregate(self):
+        """Test that 404s for arbitrary URLs do not add a view each"""
+        for path in ('/no-such-page/', '/another/missing/url/'):
+            self.assertEqual(self.client.get(path).status_code, 404)
+        with self.settings(DEBUG=True):
+            views = self.client.get(reverse('internal_stats')).json()['views']
+        self.assertEqual(views['<unresolved>']['requests'], 2)
+        self.assertNotIn('/no-such-page/', views)
+
+    async def test_times_template_rendering_under_asgi(self):
+        """Test that TemplateResponses rendered off the event loop are timed"""
+        response = await AsyncClient().get(reverse('todo_edit_form', args=[self.todo.pk]))
+        self.assertGreater(response.request_stats.template_ms, 0)
+
+    async def test_counts_queries_under_asgi(self):
+        """Test that async views' ORM calls are counted"""
+        response = await AsyncClient().get(reverse('todo_edit_form', args=[self.todo.pk]))
+        self.assertEqual(response.request_stats.queries, 1)
+
+
+class TodoGeneratorTests(TestCase):
+    def test_generate_todos_command(self):
+        """Test bulk-generating realistic todos in batches"""
+        out = StringIO()
+        call_command('generate_todos', '250', '--batch-size', '100', stdout=out)
+        self.assertIn('Created 250 todos', out.getvalue())
+        self.assertEqual(Todo.objects.count(), 250)
+
+        todos = list(Todo.objects.all())
+        self.assertGreater(len({t.created_at.date() for t in todos}), 30)
+        self.assertTrue(all(t.updated_at >= t.created_at for t in todos))
+        self.assertTrue(any(t.due_date is None for t in todos))
+        self.assertTrue(any(t.resolved for t in todos))
+        self.assertTrue(any(not t.resolved for t in todos))
+
+    def test_benchmark_due_range_matches_generated_data(self):
+        """Test that the due-date scenario window overlaps generated todos"""
+        from todos.management.commands.benchmark_suite import Scenarios
+
+        # Some later year, so a window pinned to fixed dates would find nothing
+        later = timezone.now() + timedelta(days=3 * 365)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            call_command('generate_todos', '300', '--seed', '3', stdout=StringIO())
+            response = Scenarios(Client()).filter_due_range()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['todos'])
+
+    def test_generation_is_seeded(self):
+        """Test that the same seed produces the same todos"""
+        call_command('generate_todos', '20', '--seed', '7', stdout=StringIO())
+        first = list(Todo.objects.order_by('id').values_list('title', 'due_date'))
+        Todo.objects.all().delete()
+        call_command('generate_todos', '20', '--seed', '7', stdout=StringIO())
+        self.assertEqual(list(Todo.objects.order_by('id').values_list('title', 'due_date')), first)
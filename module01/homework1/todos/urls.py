@@ -1,10 +1,16 @@
 from django.urls import path
-from .views import TodoListView, TodoCreateView, TodoUpdateView, TodoDeleteView, TodoToggleResolvedView
+from .api import TodoCollectionView, TodoDetailView
+from .views import TodoListView, TodoSearchView, TodoEditFormView, TodoCreateView, TodoUpdateView, TodoDeleteView, TodoToggleResolvedView, TodoBulkView
 
 urlpatterns = [
     path('', TodoListView.as_view(), name='todo_list'),
+    path('search/', TodoSearchView.as_view(), name='todo_search'),
+    path('edit/<int:pk>/', TodoEditFormView.as_view(), name='todo_edit_form'),
     path('create/', TodoCreateView.as_view(), name='todo_create'),
     path('update/<int:pk>/', TodoUpdateView.as_view(), name='todo_update'),
     path('delete/<int:pk>/', TodoDeleteView.as_view(), name='todo_delete'),
     path('toggle/<int:pk>/', TodoToggleResolvedView.as_view(), name='todo_toggle'),
+    path('bulk/', TodoBulkView.as_view(), name='todo_bulk'),
+    path('api/todos/', TodoCollectionView.as_view(), name='api_todo_list'),
+    path('api/todos/<int:pk>/', TodoDetailView.as_view(), name='api_todo_detail'),
 ]
@@ -1,47 +1,252 @@
-from django.shortcuts import render, redirect, get_object_or_404
+import base64
+from datetime import date, datetime
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db.models import Case, Q, Value, When
+from django.db.models.functions import Left, Length
+from django.http import Http404, HttpResponseBadRequest
+from django.shortcuts import aget_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.views import View
+from .caching import LIST_PAGE_TIMEOUT, ainvalidate_todo_list, alist_state, list_etag, page_cache_key
 from .models import Todo
+from .search import search_todos
 
 # Create your views here.
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+SUMMARY_LENGTH = 200
+
+
+# `resolved__in` renders as `resolved IN (0)`, an equality SQLite can seek on
+# in the (resolved, ...) indexes; `resolved=False` renders as `NOT resolved`.
+STATUS_FILTERS = {
+    'all': Q(),
+    'open': Q(resolved__in=[False]),
+    'resolved': Q(resolved__in=[True]),
+}
+
+MAX_BULK_SIZE = 500
+
+# Flips `resolved` inside the UPDATE statement, without reading the row first
+TOGGLE_RESOLVED = Case(When(resolved=True, then=Value(False)), default=Value(True))
+
+# Bulk action -> new value for `resolved` (delete/reschedule handled separately)
+BULK_ACTIONS = {
+    'resolve': True,
+    'unresolve': False,
+    'toggle': TOGGLE_RESOLVED,
+    'delete': None,
+    'reschedule': None,
+}
+
+# Keyset orderings: (sort field, descending). Each is backed by an index on
+# Todo (optionally prefixed with `resolved`), so no filter needs a sort step.
+CREATED_ORDER = ('created_at', True)
+DUE_ORDER = ('due_date', False)
+
+
+def encode_cursor(todo, order=CREATED_ORDER):
+    """Opaque keyset cursor pointing just past `todo` in the given order."""
+    field, _ = order
+    raw = f'{getattr(todo, field).isoformat()}|{todo.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor, order=CREATED_ORDER):
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    value, pk = raw.split('|')
+    field, _ = order
+    parse = date.fromisoformat if field == 'due_date' else datetime.fromisoformat
+    return parse(value), int(pk)
+
+
+def keyset_filter(order, value, pk):
+    """Rows strictly after (value, pk) in `order`, ties broken by ascending id.
+
+    The non-strict bound on the sort field lets the database range-scan the
+    index; the OR only discards ties already shown on the previous page.
+    """
+    field, descending = order
+    op = 'lt' if descending else 'gt'
+    bound = Q(**{f'{field}__{op}e': value})
+    after = Q(**{f'{field}__{op}': value}) | Q(id__gt=pk)
+    return bound & after
+
+
+def parse_filters(params):
+    """Validate list filters; returns (Q, order, active params) or raises ValueError."""
+    status = params.get('status', 'all')
+    if status not in STATUS_FILTERS:
+        raise ValueError('Invalid status')
+    conditions = STATUS_FILTERS[status]
+    active = {'status': status} if status != 'all' else {}
+    order = CREATED_ORDER
+
+    for param, lookup in (('due_after', 'due_date__gte'), ('due_before', 'due_date__lte')):
+        if params.get(param):
+            conditions &= Q(**{lookup: date.fromisoformat(params[param])})
+            active[param] = params[param]
+            order = DUE_ORDER
+
+    if params.get('overdue'):
+        conditions &= Q(resolved__in=[False], due_date__lt=timezone.localdate())
+        active['overdue'] = '1'
+        order = DUE_ORDER
+
+    return conditions, order, active
+
+
 class TodoListView(View):
+    async def get(self, request):
+        state = await alist_state()
+        etag = quote_etag(list_etag(request, state))
+        last_modified = int(state['modified'].timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            return response
+
+        try:
+            page_size = int(request.GET.get('page_size', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return HttpResponseBadRequest('Invalid page_size')
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+
+        try:
+            conditions, order, active = parse_filters(request.GET)
+        except ValueError:
+            return HttpResponseBadRequest('Invalid filter')
+
+        field, descending = order
+        todos = (
+            Todo.objects.only('id', 'title', 'due_date', 'resolved', 'created_at', 'updated_at')
+            .annotate(
+                summary=Left('description', SUMMARY_LENGTH),
+                description_length=Length('description'),
+            )
+            .filter(conditions)
+            .order_by(f'-{field}' if descending else field, 'id')
+        )
+        cursor = request.GET.get('cursor')
+        if cursor:
+            try:
+                value, pk = decode_cursor(cursor, order)
+            except ValueError:
+                return HttpResponseBadRequest('Invalid cursor')
+            todos = todos.filter(keyset_filter(order, value, pk))
+
+        key = page_cache_key(request, state['version'])
+        cached = await cache.aget(key)
+        if cached is None:
+            # One extra row tells us whether another page exists
+            page = [todo async for todo in todos[:page_size + 1]]
+            next_cursor = encode_cursor(page[page_size - 1], order) if len(page) > page_size else None
+            cached = (page[:page_size], next_cursor)
+            await cache.aset(key, cached, LIST_PAGE_TIMEOUT)
+        page, next_cursor = cached
+
+        response = TemplateResponse(request, 'todos/home.html', {
+            'todos': page,
+            'page_size': page_size,
+            'is_first_page': not cursor,
+            'next_cursor': next_cursor,
+            'summary_length': SUMMARY_LENGTH,
+            'filters': active,
+            'filter_query': urlencode(active),
+        })
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(last_modified)
+        return response
+
+async def aupdate_or_404(queryset, **fields):
+    """Run a single UPDATE; update() skips auto_now, so bump updated_at here."""
+    if not await queryset.aupdate(updated_at=timezone.now(), **fields):
+        raise Http404('No Todo matches the given query.')
+    await ainvalidate_todo_list()
+
+
+class TodoSearchView(View):
     def get(self, request):
-        todos = Todo.objects.all()
-        return render(request, 'todos/home.html', {'todos': todos})
+        query = request.GET.get('q', '').strip()
+        results = search_todos(query) if query else []
+        return TemplateResponse(request, 'todos/search.html', {'query': query, 'results': results})
+
+class TodoEditFormView(View):
+    async def get(self, request, pk):
+        todo = await aget_object_or_404(Todo, pk=pk)
+        return TemplateResponse(request, 'todos/edit_form.html', {'todo': todo})
 
 class TodoCreateView(View):
-    def post(self, request):
+    async def post(self, request):
         title = request.POST.get('title')
         description = request.POST.get('description', '')
         due_date = request.POST.get('due_date')
 
         if title:
-            Todo.objects.create(
+            await Todo.objects.acreate(
                 title=title,
                 description=description,
                 due_date=due_date if due_date else None
             )
+            await ainvalidate_todo_list()
         return redirect('todo_list')
 
 class TodoUpdateView(View):
-    def post(self, request, pk):
-        todo = get_object_or_404(Todo, pk=pk)
-        todo.title = request.POST.get('title', todo.title)
-        todo.description = request.POST.get('description', todo.description)
+    async def post(self, request, pk):
+        fields = {}
+        for name in ('title', 'description'):
+            if name in request.POST:
+                fields[name] = request.POST[name]
         due_date = request.POST.get('due_date')
-        todo.due_date = due_date if due_date else None
-        todo.save()
+        fields['due_date'] = due_date if due_date else None
+        await aupdate_or_404(Todo.objects.filter(pk=pk), **fields)
         return redirect('todo_list')
 
 class TodoDeleteView(View):
-    def post(self, request, pk):
-        todo = get_object_or_404(Todo, pk=pk)
-        todo.delete()
+    async def post(self, request, pk):
+        deleted, _ = await Todo.objects.filter(pk=pk).adelete()
+        if not deleted:
+            raise Http404('No Todo matches the given query.')
+        await ainvalidate_todo_list()
         return redirect('todo_list')
 
 class TodoToggleResolvedView(View):
-    def post(self, request, pk):
-        todo = get_object_or_404(Todo, pk=pk)
-        todo.resolved = not todo.resolved
-        todo.save()
+    async def post(self, request, pk):
+        await aupdate_or_404(Todo.objects.filter(pk=pk), resolved=TOGGLE_RESOLVED)
+        return redirect('todo_list')
+
+class TodoBulkView(View):
+    """Apply one action to many todos with a single UPDATE or DELETE."""
+
+    async def post(self, request):
+        action = request.POST.get('action')
+        if action not in BULK_ACTIONS:
+            return HttpResponseBadRequest('Invalid action')
+        try:
+            pks = [int(pk) for pk in request.POST.getlist('pks')]
+        except ValueError:
+            return HttpResponseBadRequest('Invalid pks')
+        if len(pks) > MAX_BULK_SIZE:
+            return HttpResponseBadRequest(f'At most {MAX_BULK_SIZE} todos per request')
+        if not pks:
+            return redirect('todo_list')
+
+        todos = Todo.objects.filter(pk__in=pks)
+        if action == 'delete':
+            await todos.adelete()
+        elif action == 'reschedule':
+            due_date = request.POST.get('due_date')
+            try:
+                due_date = date.fromisoformat(due_date) if due_date else None
+            except ValueError:
+                return HttpResponseBadRequest('Invalid due_date')
+            await todos.aupdate(due_date=due_date, updated_at=timezone.now())
+        else:
+            await todos.aupdate(resolved=BULK_ACTIONS[action], updated_at=timezone.now())
+        await ainvalidate_todo_list()
         return redirect('todo_list')